@@ -16,17 +16,141 @@ class Settings:
     VERSION: str = "1.0.0"
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
 
+    # Server (production launcher, see serve.py)
+    SERVER_HOST: str = os.getenv("HOST", "0.0.0.0")
+    SERVER_PORT: int = int(os.getenv("PORT", "8000"))
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "0"))  # 0 = one worker per CPU
+    SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", "512"))
+    SERVER_GRACEFUL_TIMEOUT: int = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+    SERVER_KEEPALIVE_TIMEOUT: int = int(os.getenv("SERVER_KEEPALIVE_TIMEOUT", "5"))
+    MAX_REQUESTS: int = int(os.getenv("MAX_REQUESTS", "10000"))  # 0 = never recycle
+    MAX_REQUESTS_JITTER: int = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+    FORWARDED_ALLOW_IPS: str = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+    # Logging: json or text; sample rates keep a fraction of sub-WARNING lines
+    # per logger prefix, e.g. "app.payment=0.1,app.db=0.5"
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json").lower()
+    LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "")
+
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    # Optional read replica for @read_only service methods
+    DATABASE_READ_URL: str = os.getenv("DATABASE_READ_URL", "")
+    DB_READ_POOL_MIN_SIZE: int = int(os.getenv("DB_READ_POOL_MIN_SIZE", "2"))
+    DB_READ_POOL_MAX_SIZE: int = int(os.getenv("DB_READ_POOL_MAX_SIZE", "10"))
+    # Seconds a session reads from the primary after it writes
+    DB_READ_YOUR_WRITES_SECONDS: float = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_POOL_OPEN_TIMEOUT: float = float(os.getenv("DB_POOL_OPEN_TIMEOUT", "10"))
+    DB_POOL_MAX_IDLE: float = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+    DB_POOL_MAX_LIFETIME: float = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+    # Circuit breaker: fail fast for RESET seconds after THRESHOLD consecutive
+    # connection failures; public reads fall back to data up to STALE_MAX_AGE old
+    DB_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("DB_BREAKER_FAILURE_THRESHOLD", "5"))
+    DB_BREAKER_RESET_SECONDS: float = float(os.getenv("DB_BREAKER_RESET_SECONDS", "10"))
+    DB_STALE_MAX_AGE: float = float(os.getenv("DB_STALE_MAX_AGE", "86400"))
+    DB_STALE_CACHE_SIZE: int = int(os.getenv("DB_STALE_CACHE_SIZE", "1000"))
+    # Server-side prepared statements; disable behind poolers that don't support them
+    DB_PREPARE_STATEMENTS: bool = os.getenv("DB_PREPARE_STATEMENTS", "True").lower() == "true"
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "200"))
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0"))
 
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
 
+    # bcrypt cost: calibrated at startup so a verify takes about BCRYPT_TARGET_MS
+    # on this machine, unless pinned with BCRYPT_ROUNDS. Logins rehash only
+    # hashes below BCRYPT_MIN_ROUNDS
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "0"))  # 0 = calibrate
+    BCRYPT_TARGET_MS: float = float(os.getenv("BCRYPT_TARGET_MS", "50"))
+    BCRYPT_MIN_ROUNDS: int = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+    BCRYPT_MAX_ROUNDS: int = int(os.getenv("BCRYPT_MAX_ROUNDS", "14"))
+
+    # Revoked tokens (logout): held in memory per worker behind a Bloom filter
+    # and synced from the revoked_tokens table
+    TOKEN_REVOCATION_SYNC_INTERVAL: float = float(os.getenv("TOKEN_REVOCATION_SYNC_INTERVAL", "5"))
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = int(os.getenv("TOKEN_REVOCATION_BLOOM_CAPACITY", "100000"))
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE: float = float(os.getenv("TOKEN_REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+
     # Paystack
     PAYSTACK_SECRET_KEY: str = os.getenv("PAYSTACK_SECRET_KEY", "")
     PAYSTACK_PUBLIC_KEY: str = os.getenv("PAYSTACK_PUBLIC_KEY", "")
+    PAYSTACK_BASE_URL: str = os.getenv("PAYSTACK_BASE_URL", "https://api.paystack.co")
+
+    # Terminal payment verifications kept in memory per worker
+    PAYMENT_VERIFY_CACHE_SIZE: int = int(os.getenv("PAYMENT_VERIFY_CACHE_SIZE", "10000"))
+
+    # Per-worker entitlement cache (who owns which workflows); cached "no"
+    # answers are re-checked against the database after RECHECK seconds
+    ENTITLEMENT_CACHE_SIZE: int = int(os.getenv("ENTITLEMENT_CACHE_SIZE", "50000"))
+    ENTITLEMENT_TTL_SECONDS: float = float(os.getenv("ENTITLEMENT_TTL_SECONDS", "300"))
+    ENTITLEMENT_RECHECK_SECONDS: float = float(os.getenv("ENTITLEMENT_RECHECK_SECONDS", "10"))
+
+    # Background reconciliation of sales left pending (e.g. lost webhooks)
+    RECONCILE_ENABLED: bool = os.getenv("RECONCILE_ENABLED", "True").lower() == "true"
+    RECONCILE_INTERVAL: float = float(os.getenv("RECONCILE_INTERVAL", "60"))
+    RECONCILE_BATCH_SIZE: int = int(os.getenv("RECONCILE_BATCH_SIZE", "100"))
+    RECONCILE_CONCURRENCY: int = int(os.getenv("RECONCILE_CONCURRENCY", "10"))
+    RECONCILE_STALE_AFTER: float = float(os.getenv("RECONCILE_STALE_AFTER", "300"))
+    RECONCILE_ABANDON_AFTER: float = float(os.getenv("RECONCILE_ABANDON_AFTER", "86400"))
+
+    # Monthly sales partitions: created ahead by a background task; with a
+    # retention period, older months are detached into the sales_archive schema
+    SALES_PARTITIONS_ENABLED: bool = os.getenv("SALES_PARTITIONS_ENABLED", "True").lower() == "true"
+    SALES_PARTITION_INTERVAL: float = float(os.getenv("SALES_PARTITION_INTERVAL", "3600"))
+    SALES_PARTITION_MONTHS_AHEAD: int = int(os.getenv("SALES_PARTITION_MONTHS_AHEAD", "3"))
+    SALES_RETENTION_MONTHS: int = int(os.getenv("SALES_RETENTION_MONTHS", "0"))  # 0 = keep everything
+
+    # Idempotency-Key support for payment initialization
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_MAX_ENTRIES: int = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+    IDEMPOTENCY_WAIT_TIMEOUT: float = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "35"))
+    # How long a claim holds while the Paystack call runs: above HTTP_CLIENT_TIMEOUT
+    # plus a margin, so a slow call that is still running is never claimed again
+    IDEMPOTENCY_CLAIM_LEASE: float = float(os.getenv("IDEMPOTENCY_CLAIM_LEASE", "90"))
+
+    # Outbound HTTP (Paystack)
+    HTTP_CLIENT_TIMEOUT: float = float(os.getenv("HTTP_CLIENT_TIMEOUT", "30"))
+    HTTP_CLIENT_MAX_CONNECTIONS: int = int(os.getenv("HTTP_CLIENT_MAX_CONNECTIONS", "50"))
+
+    # Custom request intake queue (per worker)
+    CUSTOM_REQUEST_QUEUE_SIZE: int = int(os.getenv("CUSTOM_REQUEST_QUEUE_SIZE", "1000"))
+    CUSTOM_REQUEST_BATCH_SIZE: int = int(os.getenv("CUSTOM_REQUEST_BATCH_SIZE", "100"))
+    CUSTOM_REQUEST_FLUSH_INTERVAL: float = float(os.getenv("CUSTOM_REQUEST_FLUSH_INTERVAL", "0.5"))
+    # Rows that could not be written are spooled here and replayed on start
+    INTAKE_SPOOL_DIR: str = os.getenv("INTAKE_SPOOL_DIR", "var/spool")
+    INTAKE_DRAIN_TIMEOUT: float = float(os.getenv("INTAKE_DRAIN_TIMEOUT", "10"))
+
+    # Analytics event ingestion (per worker); sample rates per event type,
+    # e.g. "page_view=0.25"
+    EVENTS_BUFFER_MAX_BYTES: int = int(os.getenv("EVENTS_BUFFER_MAX_BYTES", str(32 * 1024 * 1024)))
+    EVENTS_FLUSH_SIZE: int = int(os.getenv("EVENTS_FLUSH_SIZE", "5000"))
+    EVENTS_FLUSH_INTERVAL: float = float(os.getenv("EVENTS_FLUSH_INTERVAL", "2"))
+    EVENTS_MAX_EVENT_BYTES: int = int(os.getenv("EVENTS_MAX_EVENT_BYTES", "4096"))
+    EVENTS_SAMPLE_RATES: str = os.getenv("EVENTS_SAMPLE_RATES", "")
+
+    # Landing page catalog snapshot; workflow writes on this worker refresh it
+    # at once, the TTL bounds staleness for writes made on other workers
+    CATALOG_SNAPSHOT_TTL_SECONDS: float = float(os.getenv("CATALOG_SNAPSHOT_TTL_SECONDS", "60"))
+    # Static catalog files, served at /assets/catalog/ by default
+    CATALOG_EXPORT_ENABLED: bool = os.getenv("CATALOG_EXPORT_ENABLED", "True").lower() == "true"
+    CATALOG_EXPORT_DIR: str = os.getenv("CATALOG_EXPORT_DIR", os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "..", "public", "assets", "catalog"
+    ))
+
+    # Admin sales analytics: most buckets one request may return
+    ANALYTICS_MAX_BUCKETS: int = int(os.getenv("ANALYTICS_MAX_BUCKETS", "2000"))
+
+    # Admin bulk operations: most ids one request may change
+    BULK_MAX_IDS: int = int(os.getenv("BULK_MAX_IDS", "1000"))
+
+    # Startup warm-up (DB connections, bcrypt, HTTP client, route schemas)
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "True").lower() == "true"
 
     # Pricing
     SINGLE_WORKFLOW_PRICE: float = float(os.getenv("SINGLE_WORKFLOW_PRICE", "149"))
@@ -51,6 +175,23 @@ class Settings:
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
     SMTP_USER: str = os.getenv("SMTP_USER", "")
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
+    # "starttls", "ssl" (implicit TLS, usually port 465) or "none" (local sink)
+    SMTP_SECURITY: str = os.getenv("SMTP_SECURITY", "ssl" if SMTP_PORT == 465 else "starttls")
+    SMTP_TIMEOUT: float = float(os.getenv("SMTP_TIMEOUT", "10"))
+    # Pooled connections idle longer than this are reopened rather than reused
+    SMTP_MAX_IDLE_SECONDS: float = float(os.getenv("SMTP_MAX_IDLE_SECONDS", "60"))
+    EMAIL_FROM: str = os.getenv("EMAIL_FROM", SMTP_USER)
+
+    # Outbound email queue (one SMTP connection per worker)
+    EMAIL_WORKERS: int = int(os.getenv("EMAIL_WORKERS", "2"))
+    EMAIL_QUEUE_SIZE: int = int(os.getenv("EMAIL_QUEUE_SIZE", "1000"))
+    EMAIL_MAX_ATTEMPTS: int = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+    EMAIL_RETRY_BASE_DELAY: float = float(os.getenv("EMAIL_RETRY_BASE_DELAY", "5"))
+    EMAIL_RETRY_MAX_DELAY: float = float(os.getenv("EMAIL_RETRY_MAX_DELAY", "300"))
+    EMAIL_DRAIN_TIMEOUT: float = float(os.getenv("EMAIL_DRAIN_TIMEOUT", "10"))
+    # Admin alerts are collected into one digest per interval (or per N alerts)
+    EMAIL_DIGEST_INTERVAL: float = float(os.getenv("EMAIL_DIGEST_INTERVAL", "300"))
+    EMAIL_DIGEST_MAX_ITEMS: int = int(os.getenv("EMAIL_DIGEST_MAX_ITEMS", "100"))
 
 
 settings = Settings()
@@ -2,14 +2,80 @@
 VexaAI Backend Application
 A scalable FastAPI application for selling n8n workflow automations.
 """
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
+import asyncio
 import os
+import psycopg
 
 from app.config import settings
-from app.routers import auth_router, workflows_router, admin_router, payment_router
+from app.routers import auth_router, workflows_router, admin_router, payment_router, events_router
+from app.services.catalog_service import CatalogService
+from app.services.custom_request_service import custom_request_writer
+from app.services.email_service import email_queue
+from app.services.event_service import event_buffer
+from app.services.partition_service import SalesPartitionService
+from app.services.reconciliation_service import reconciler
+from app.utils.auth import configure_password_hashing
+from app.utils.circuit_breaker import CircuitOpen
+from app.utils.database import open_pool, close_pool, get_breaker, ReadYourWritesMiddleware
+from app.utils.http_client import close_http_client
+from app.utils.log import configure_logging, shutdown_logging, RequestIdMiddleware
+from app.utils.static_files import PrecompressedStaticFiles
+from app.utils.revocation import revocation_list
+from app.utils.metrics import MetricsMiddleware, CONTENT_TYPE_LATEST, monitor_event_loop_lag, registry
+from app.utils.warmup import warm_up, warm_up_before_serving
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop per-worker background resources"""
+    configure_logging()
+    # Connections are opened before the worker accepts traffic
+    await asyncio.to_thread(open_pool)
+    # Before traffic: login latency depends on it
+    await asyncio.to_thread(configure_password_hashing)
+    # Before the intake writer: replayed custom requests queue their confirmations
+    if settings.SMTP_HOST:
+        await email_queue.start()
+    await custom_request_writer.start()
+    await event_buffer.start()
+    if settings.WARMUP_ENABLED:
+        await warm_up_before_serving(app)
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    warmup = asyncio.create_task(warm_up(app)) if settings.WARMUP_ENABLED else None
+    reconciliation = None
+    if settings.RECONCILE_ENABLED and settings.DATABASE_URL:
+        reconciliation = asyncio.create_task(reconciler.run_forever(settings.RECONCILE_INTERVAL))
+    partitions = None
+    if settings.SALES_PARTITIONS_ENABLED and settings.DATABASE_URL:
+        partitions = asyncio.create_task(SalesPartitionService.run_forever(settings.SALES_PARTITION_INTERVAL))
+    revocations = None
+    if settings.DATABASE_URL:
+        revocations = asyncio.create_task(revocation_list.run_forever(settings.TOKEN_REVOCATION_SYNC_INTERVAL))
+    try:
+        yield
+    finally:
+        lag_monitor.cancel()
+        if warmup is not None:
+            warmup.cancel()
+        if reconciliation is not None:
+            reconciliation.cancel()
+        if partitions is not None:
+            partitions.cancel()
+        if revocations is not None:
+            revocations.cancel()
+        # Drain queued writes while the pool is still open
+        await custom_request_writer.stop(settings.INTAKE_DRAIN_TIMEOUT)
+        await event_buffer.stop()
+        await email_queue.stop(settings.EMAIL_DRAIN_TIMEOUT)
+        await close_http_client()
+        await asyncio.to_thread(close_pool)
+        shutdown_logging()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -17,9 +83,23 @@ app = FastAPI(
     version=settings.VERSION,
     description="API for selling n8n workflow automations",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    lifespan=lifespan
 )
 
+
+@app.exception_handler(CircuitOpen)
+@app.exception_handler(psycopg.OperationalError)
+async def database_unavailable(request: Request, exc: Exception):
+    """Answer 503 (not 500) while the database is unreachable"""
+    retry_after = exc.retry_after if isinstance(exc, CircuitOpen) else get_breaker().retry_after()
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database temporarily unavailable"},
+        headers={"Retry-After": str(max(1, round(retry_after)))}
+    )
+
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -30,22 +110,45 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# Pin sessions to the primary for a short window after they write
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Request metrics (wraps CORS and read-your-writes, so latency includes them)
+app.add_middleware(MetricsMiddleware)
+
+# Request IDs for log correlation (added last, so outermost: every log line
+# written while handling the request carries one)
+app.add_middleware(RequestIdMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(workflows_router)
 app.include_router(admin_router)
 app.include_router(payment_router)
+app.include_router(events_router)
 
 # Get public path
 public_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "public")
 
+
+async def index_response(request: Request, index_path: str):
+    """Serve index.html with the catalog snapshot inlined (plain file as fallback)"""
+    page = await CatalogService.get_index_page(index_path)
+    if page is None:
+        return FileResponse(index_path)
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == page.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=page.body, media_type="text/html; charset=utf-8", headers=headers)
+
+
 # Define HTML page routes BEFORE static files mount
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Serve the main index page"""
     index_path = os.path.join(public_path, "index.html")
     if os.path.exists(index_path):
-        return FileResponse(index_path)
+        return await index_response(request, index_path)
     return {
         "message": "VexaAI API",
         "version": settings.VERSION,
@@ -89,6 +192,12 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/api")
 async def api_info():
     """API information"""
@@ -99,7 +208,8 @@ async def api_info():
             "auth": "/api/auth",
             "workflows": "/api/workflows",
             "admin": "/api/admin",
-            "payment": "/api/payment"
+            "payment": "/api/payment",
+            "events": "/api/events"
         },
         "docs": "/api/docs"
     }
@@ -115,20 +225,23 @@ if os.path.exists(public_path):
         app.mount("/css", StaticFiles(directory=css_path), name="css")
     if os.path.exists(js_path):
         app.mount("/js", StaticFiles(directory=js_path), name="js")
+    if settings.CATALOG_EXPORT_ENABLED:
+        # The catalog export is published under assets/, so make sure it's mounted
+        os.makedirs(settings.CATALOG_EXPORT_DIR, exist_ok=True)
     if os.path.exists(assets_path):
-        app.mount("/assets", StaticFiles(directory=assets_path), name="assets")
+        app.mount("/assets", PrecompressedStaticFiles(directory=assets_path), name="assets")
 
 
 # Catch-all route for SPA behavior - serve index.html for any unmatched route
 # This must be LAST to not override other routes
 @app.get("/{full_path:path}")
-async def catch_all(full_path: str):
+async def catch_all(request: Request, full_path: str):
     """Catch all other routes and serve index.html for SPA routing"""
     # Don't catch empty path (root), it's handled by the / route above
     if not full_path or full_path == "":
         index_path = os.path.join(public_path, "index.html")
         if os.path.exists(index_path):
-            return FileResponse(index_path)
+            return await index_response(request, index_path)
 
     # Ignore API routes and static files
     if full_path.startswith("api/") or full_path.startswith("css/") or full_path.startswith("js/") or full_path.startswith("assets/"):
@@ -137,7 +250,7 @@ async def catch_all(full_path: str):
     # Serve index.html for all other routes
     index_path = os.path.join(public_path, "index.html")
     if os.path.exists(index_path):
-        return FileResponse(index_path)
+        return await index_response(request, index_path)
     return {"error": "Page not found"}
 
 
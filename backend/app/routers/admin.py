@@ -2,21 +2,27 @@
 Admin routes
 Admin dashboard, workflow management, and statistics
 """
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, BackgroundTasks, Depends, Query
+from app.schemas.admin import BulkRequestStatusUpdate, BulkWorkflowUpdate, RequestStatus
 from app.schemas.user import AdminLogin
 from app.schemas.workflow import WorkflowUpload
 from app.services.auth_service import AuthService
+from app.services.catalog_service import CatalogService
 from app.services.workflow_service import WorkflowService
 from app.services.admin_service import AdminService
-from app.utils.auth import get_current_user
+from app.utils.auth import get_current_user, require_admin
+from app.utils.query_stats import query_stats
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
 
 @router.post("/login")
-async def admin_login(credentials: AdminLogin):
+async def admin_login(credentials: AdminLogin, background_tasks: BackgroundTasks):
     """Admin login with admin privileges check"""
-    return AuthService.admin_login(credentials)
+    return AuthService.admin_login(credentials, background_tasks)
 
 
 @router.get("/stats")
@@ -25,6 +31,18 @@ async def get_admin_stats():
     return AdminService.get_dashboard_stats()
 
 
+@router.get("/analytics/sales")
+async def get_sales_analytics(
+    interval: str = Query("day", pattern="^(hour|day|week)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    purchase_type: Optional[str] = Query(None, pattern="^(single|all-access)$"),
+    workflow_id: Optional[int] = None
+):
+    """Revenue, sales and unique customers per hour/day/week (admin only)"""
+    return AdminService.get_sales_analytics(interval, start, end, purchase_type, workflow_id)
+
+
 @router.get("/workflows")
 async def get_all_workflows_admin():
     """Get all workflows with full details (admin only)"""
@@ -55,19 +73,34 @@ async def get_all_workflows_admin():
 @router.post("/workflows")
 async def upload_workflow(workflow_data: WorkflowUpload):
     """Upload/create a new workflow (admin only)"""
-    return WorkflowService.create_workflow(workflow_data)
+    result = WorkflowService.create_workflow(workflow_data)
+    await CatalogService.refresh()
+    return result
 
 
 @router.put("/workflows/{workflow_id}")
 async def update_workflow(workflow_id: int, workflow_data: WorkflowUpload):
     """Update an existing workflow (admin only)"""
-    return WorkflowService.update_workflow(workflow_id, workflow_data)
+    result = WorkflowService.update_workflow(workflow_id, workflow_data)
+    await CatalogService.refresh()
+    return result
+
+
+@router.post("/workflows/bulk")
+async def bulk_update_workflows(bulk: BulkWorkflowUpdate, _admin: dict = Depends(require_admin)):
+    """Activate, deactivate, delete or re-price many workflows in one statement (admin only)"""
+    result = WorkflowService.bulk_update(bulk.ids, bulk.action, bulk.price)
+    if result["counts"].get("updated") or result["counts"].get("deleted"):
+        await CatalogService.refresh()
+    return result
 
 
 @router.delete("/workflows/{workflow_id}")
 async def delete_workflow(workflow_id: int):
     """Delete a workflow (admin only)"""
-    return WorkflowService.delete_workflow(workflow_id)
+    result = WorkflowService.delete_workflow(workflow_id)
+    await CatalogService.refresh()
+    return result
 
 
 @router.get("/users")
@@ -83,6 +116,31 @@ async def get_custom_requests():
 
 
 @router.patch("/requests/{request_id}")
-async def update_request_status(request_id: int, status: str):
+async def update_request_status(request_id: UUID, status: RequestStatus):
     """Update custom request status (admin only)"""
     return AdminService.update_request_status(request_id, status)
+
+
+@router.post("/requests/bulk")
+async def bulk_update_request_status(bulk: BulkRequestStatusUpdate, _admin: dict = Depends(require_admin)):
+    """Set the status of many custom requests in one statement (admin only)"""
+    return AdminService.bulk_update_request_status(bulk.ids, bulk.status)
+
+
+@router.get("/db/stats")
+async def get_db_stats(_admin: dict = Depends(require_admin)):
+    """Per-query timing statistics for this worker (admin only)"""
+    return {
+        "success": True,
+        "queries": query_stats.snapshot()
+    }
+
+
+@router.delete("/db/stats")
+async def reset_db_stats(_admin: dict = Depends(require_admin)):
+    """Reset per-query timing statistics for this worker (admin only)"""
+    query_stats.reset()
+    return {
+        "success": True,
+        "message": "Query statistics reset"
+    }
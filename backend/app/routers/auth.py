@@ -2,7 +2,8 @@
 Authentication routes
 User registration, login, and profile management
 """
-from fastapi import APIRouter, Depends
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, Depends
 from app.schemas.user import UserRegister, UserLogin, AdminLogin
 from app.services.auth_service import AuthService
 from app.utils.auth import get_current_user
@@ -17,9 +18,9 @@ async def register(user_data: UserRegister):
 
 
 @router.post("/login")
-async def login(credentials: UserLogin):
+async def login(credentials: UserLogin, background_tasks: BackgroundTasks):
     """Login user and return JWT token"""
-    return AuthService.login_user(credentials)
+    return AuthService.login_user(credentials, background_tasks)
 
 
 @router.get("/me")
@@ -30,8 +31,5 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
 
 @router.post("/logout")
 async def logout(current_user: dict = Depends(get_current_user)):
-    """Logout user (client-side token removal)"""
-    return {
-        "success": True,
-        "message": "Logged out successfully"
-    }
+    """Logout user: the token is rejected from now until it expires"""
+    return await asyncio.to_thread(AuthService.logout, current_user)
@@ -0,0 +1,20 @@
+"""
+Analytics event routes
+Batched client-side events (page views, workflow views, checkout starts)
+"""
+from fastapi import APIRouter, Request
+from app.schemas.event import EventBatch
+from app.services.event_service import EventService
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+
+
+@router.post("", status_code=202)
+async def ingest_events(batch: EventBatch, request: Request):
+    """Accept a batch of analytics events; they are stored in the background"""
+    return EventService.ingest(
+        batch,
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+        referrer=request.headers.get("referer")
+    )
@@ -2,135 +2,46 @@
 Payment routes
 Paystack payment initialization and webhook handling
 """
-from fastapi import APIRouter, HTTPException, Request
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Request, Response
 from app.schemas.payment import PaymentRequest, CustomWorkflowRequest
-from app.config import settings
-from app.utils.database import execute_query_dict
-import httpx
-import uuid
+from app.services.custom_request_service import CustomRequestService
+from app.services.payment_service import PaymentService
+from app.utils.idempotency import idempotency_store
 
 router = APIRouter(prefix="/api/payment", tags=["Payment"])
 
 
 @router.post("/initialize")
-async def initialize_payment(payment: PaymentRequest):
-    """Initialize Paystack payment"""
-    try:
-        # Check if Paystack key is configured
-        if not settings.PAYSTACK_SECRET_KEY or settings.PAYSTACK_SECRET_KEY == "":
-            print("ERROR: PAYSTACK_SECRET_KEY is not configured in .env file")
-            raise HTTPException(
-                status_code=500,
-                detail="Payment service not configured. Please contact administrator."
-            )
-
-        # Paystack API endpoint
-        url = "https://api.paystack.co/transaction/initialize"
-
-        # Prepare metadata
-        metadata = {
-            "purchase_type": payment.purchase_type,
-            "workflow_id": payment.workflow_id,
-            "workflow_name": payment.workflow_name
-        }
-
-        # Generate reference
-        reference = f"VEXA-{uuid.uuid4().hex[:12].upper()}"
-
-        # Paystack request payload
-        payload = {
-            "email": payment.email,
-            "amount": int(payment.amount * 100),  # Convert to kobo
-            "currency": "GHS",
-            "reference": reference,
-            "metadata": metadata,
-            "callback_url": f"{settings.FRONTEND_URL}/payment-success"
-        }
-
-        print(f"Initializing payment for {payment.email}, amount: {payment.amount}")
-
-        # Make request to Paystack
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                json=payload,
-                headers={
-                    "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-                    "Content-Type": "application/json"
-                },
-                timeout=30.0
-            )
-
-        print(f"Paystack response status: {response.status_code}")
-
-        if response.status_code != 200:
-            error_detail = response.json() if response.text else "Unknown error"
-            print(f"Paystack error: {error_detail}")
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Payment initialization failed: {error_detail}"
-            )
-
-        data = response.json()
-
-        return {
-            "success": True,
-            "authorization_url": data["data"]["authorization_url"],
-            "access_code": data["data"]["access_code"],
-            "reference": data["data"]["reference"]
-        }
-
-    except httpx.HTTPError as e:
-        print(f"HTTP Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Payment service error: {str(e)}")
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Unexpected error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+async def initialize_payment(
+    payment: PaymentRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """
+    Initialize Paystack payment
+
+    With an ``Idempotency-Key`` header, a retried request gets the original
+    response (and reference) instead of creating a second transaction.
+    """
+    if not idempotency_key:
+        return await PaymentService.initialize_payment(payment)
+
+    result, replayed = await idempotency_store.run(
+        "payment.initialize",
+        idempotency_key,
+        payment.model_dump(),
+        lambda: PaymentService.initialize_payment(payment)
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
 
 
 @router.post("/verify/{reference}")
 async def verify_payment(reference: str):
     """Verify Paystack payment"""
-    try:
-        url = f"https://api.paystack.co/transaction/verify/{reference}"
-
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url,
-                headers={
-                    "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"
-                },
-                timeout=30.0
-            )
-
-        if response.status_code != 200:
-            raise HTTPException(status_code=400, detail="Payment verification failed")
-
-        data = response.json()
-
-        if data["data"]["status"] == "success":
-            return {
-                "success": True,
-                "verified": True,
-                "amount": data["data"]["amount"] / 100,
-                "customer": data["data"]["customer"],
-                "metadata": data["data"]["metadata"]
-            }
-        else:
-            return {
-                "success": False,
-                "verified": False,
-                "message": "Payment not successful"
-            }
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await PaymentService.verify_payment(reference)
 
 
 @router.post("/webhook")
@@ -152,47 +63,7 @@ async def payment_webhook(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/custom-request")
+@router.post("/custom-request", status_code=202)
 async def submit_custom_request(request_data: CustomWorkflowRequest):
-    """Submit a custom workflow request"""
-    try:
-        print(f"Received custom request from {request_data.email}")
-        print(f"Data: {request_data}")
-
-        request_id = execute_query_dict(
-            """
-            INSERT INTO custom_requests (
-                name, email, phone, workflow_title,
-                description, use_case, budget_range, timeline,
-                status, created_at, updated_at
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, 'pending', NOW(), NOW()
-            )
-            RETURNING id
-            """,
-            (
-                request_data.name,
-                request_data.email,
-                request_data.phone,
-                'Custom Workflow Request',  # workflow_title
-                request_data.workflow_description,  # description
-                request_data.use_case,
-                request_data.budget,  # budget_range
-                request_data.timeline
-            ),
-            fetch_one=True
-        )
-
-        print(f"Custom request created with ID: {request_id}")
-
-        return {
-            "success": True,
-            "message": "Custom request submitted successfully",
-            "request_id": request_id["id"] if request_id else None
-        }
-
-    except Exception as e:
-        print(f"Error submitting custom request: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+    """Submit a custom workflow request; it is written to the database in the background"""
+    return CustomRequestService.submit(request_data)
@@ -2,29 +2,65 @@
 Workflow routes
 Public workflow browsing and details
 """
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Response
+from app.config import settings
+from app.services.catalog_service import CatalogService
+from app.services.entitlement_service import EntitlementService
 from app.services.workflow_service import WorkflowService
+from app.utils.auth import get_current_user
+from app.utils.database import DB_UNAVAILABLE
+from app.utils.stale_cache import StaleCache, stale_headers
 
 router = APIRouter(prefix="/api/workflows", tags=["Workflows"])
 
+# Last known-good catalog reads, served while the database is unavailable
+public_reads = StaleCache("workflows", settings.DB_STALE_CACHE_SIZE, settings.DB_STALE_MAX_AGE)
+
 
 @router.get("")
-async def get_workflows():
+async def get_workflows(response: Response):
     """Get all available workflows from database"""
     try:
-        workflows = WorkflowService.get_all_workflows(active_only=True)
-        return {
-            "success": True,
-            "workflows": workflows
-        }
+        workflows, age = await public_reads.fetch("active", WorkflowService.get_all_workflows, True)
+    except DB_UNAVAILABLE:
+        # Nothing cached in this worker yet: fall back to the static export
+        exported = await asyncio.to_thread(CatalogService.load_export)
+        if exported is None:
+            raise
+        workflows, age = exported
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    response.headers.update(stale_headers(age))
+    return {
+        "success": True,
+        "workflows": workflows
+    }
+
+
+@router.get("/library")
+async def get_library(current_user: dict = Depends(get_current_user)):
+    """Get the workflows the current user can download"""
+    return EntitlementService.get_library(current_user["email"])
+
+
+@router.get("/{workflow_id}/download")
+async def download_workflow(workflow_id: int, current_user: dict = Depends(get_current_user)):
+    """Download a purchased workflow's JSON"""
+    workflow = WorkflowService.get_workflow_download(workflow_id, current_user["email"])
+    return Response(
+        content=workflow.get("json_file_url") or "{}",
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="workflow-{workflow_id}.json"'}
+    )
+
 
 @router.get("/{workflow_id}")
-async def get_workflow(workflow_id: int):
+async def get_workflow(workflow_id: int, response: Response):
     """Get a specific workflow by ID"""
-    workflow = WorkflowService.get_workflow_by_id(workflow_id)
+    workflow, age = await public_reads.fetch(workflow_id, WorkflowService.get_workflow_by_id, workflow_id)
+    response.headers.update(stale_headers(age))
     return {
         "success": True,
         "workflow": workflow
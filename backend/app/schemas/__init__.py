@@ -2,6 +2,8 @@
 from app.schemas.user import UserRegister, UserLogin, UserResponse, AdminLogin
 from app.schemas.workflow import WorkflowUpload, WorkflowResponse, WorkflowUpdate
 from app.schemas.payment import PaymentRequest, CustomWorkflowRequest
+from app.schemas.event import AnalyticsEvent, EventBatch
+from app.schemas.admin import BulkRequestStatusUpdate, BulkWorkflowUpdate, RequestStatus
 
 __all__ = [
     "UserRegister",
@@ -13,4 +15,9 @@ __all__ = [
     "WorkflowUpdate",
     "PaymentRequest",
     "CustomWorkflowRequest",
+    "AnalyticsEvent",
+    "EventBatch",
+    "BulkRequestStatusUpdate",
+    "BulkWorkflowUpdate",
+    "RequestStatus",
 ]
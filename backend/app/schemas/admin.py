@@ -0,0 +1,30 @@
+"""
+Admin bulk operation schemas
+"""
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+from uuid import UUID
+from app.config import settings
+
+
+# Allowed custom_requests.status values (CHECK constraint in the schema)
+RequestStatus = Literal["pending", "in_progress", "completed", "rejected", "cancelled"]
+
+
+class BulkRequestStatusUpdate(BaseModel):
+    """Set the status of many custom requests"""
+    ids: List[UUID] = Field(..., min_length=1, max_length=settings.BULK_MAX_IDS)
+    status: RequestStatus
+
+
+class BulkWorkflowUpdate(BaseModel):
+    """Activate, deactivate, delete or re-price many workflows"""
+    ids: List[int] = Field(..., min_length=1, max_length=settings.BULK_MAX_IDS)
+    action: Literal["activate", "deactivate", "delete", "reprice"]
+    price: Optional[float] = Field(None, ge=0)
+
+    @model_validator(mode="after")
+    def price_only_for_reprice(self):
+        if (self.action == "reprice") != (self.price is not None):
+            raise ValueError("price is required for reprice and not allowed otherwise")
+        return self
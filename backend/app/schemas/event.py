@@ -0,0 +1,36 @@
+"""
+Analytics event schemas
+"""
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
+
+
+def _contains_nul(value) -> bool:
+    """Whether any string (or key) in a JSON-like value contains NUL, which
+    Postgres text and jsonb cannot store"""
+    if isinstance(value, str):
+        return "\x00" in value
+    if isinstance(value, dict):
+        return any(_contains_nul(k) or _contains_nul(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return any(_contains_nul(item) for item in value)
+    return False
+
+
+class AnalyticsEvent(BaseModel):
+    """A single client-side event"""
+    event_type: str = Field(..., pattern=r"^[a-z][a-z0-9_]{0,99}$")  # e.g. "page_view", "checkout_start"
+    event_data: Optional[dict] = None
+    session_id: Optional[str] = Field(None, max_length=255)
+
+    @field_validator("event_data", "session_id")
+    @classmethod
+    def no_nul(cls, value):
+        if _contains_nul(value):
+            raise ValueError("must not contain NUL characters")
+        return value
+
+
+class EventBatch(BaseModel):
+    """Batch of events sent by the frontend"""
+    events: List[AnalyticsEvent] = Field(..., max_length=100)
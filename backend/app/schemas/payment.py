@@ -1,7 +1,7 @@
 """
 Payment and sales schemas
 """
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 
 
@@ -15,11 +15,11 @@ class PaymentRequest(BaseModel):
 
 
 class CustomWorkflowRequest(BaseModel):
-    """Custom workflow request submission"""
-    name: str
-    email: EmailStr
-    phone: Optional[str] = None
+    """Custom workflow request submission (lengths match custom_requests columns)"""
+    name: str = Field(..., max_length=255)
+    email: EmailStr = Field(..., max_length=255)
+    phone: Optional[str] = Field(None, max_length=50)
     workflow_description: str
     use_case: str
-    budget: Optional[str] = None
-    timeline: Optional[str] = None
+    budget: Optional[str] = Field(None, max_length=100)  # budget_range
+    timeline: Optional[str] = Field(None, max_length=100)
@@ -2,13 +2,120 @@
 Admin service
 Business logic for admin dashboard operations
 """
-from app.utils.database import execute_query_dict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+from fastapi import HTTPException, status
+from app.config import settings
+from app.utils.database import execute_query_dict, read_only
+
+ANALYTICS_GRAINS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+# Range returned when the caller gives no start
+ANALYTICS_DEFAULT_SPAN = {
+    "hour": timedelta(days=2),
+    "day": timedelta(days=30),
+    "week": timedelta(weeks=52),
+}
+
+# All-time totals from the weekly rollups (one row per week) rather than a
+# scan of every sales partition
+_SALES_STATS = """
+    SELECT
+        COALESCE(SUM(revenue) FILTER (WHERE purchase_type = '*'), 0) AS total_revenue,
+        COALESCE(SUM(sale_count) FILTER (WHERE purchase_type = '*'), 0) AS total_sales,
+        COALESCE(SUM(sale_count) FILTER (WHERE purchase_type = 'all-access'), 0) AS all_access_sales
+    FROM sales_rollups
+    WHERE grain = 'week' AND workflow_id = 0 AND purchase_type IN ('*', 'all-access')
+"""
+
+# Customers with a successful purchase
+_CUSTOMER_COUNT = """
+    SELECT COUNT(DISTINCT customer_email) AS count
+    FROM sales_rollup_customers
+    WHERE grain = 'week' AND purchase_type = '*' AND workflow_id = 0
+"""
+
+# Newest first: the planner reads the partitions newest to oldest and stops
+# after the first 10 rows
+_RECENT_SALES = """
+    SELECT
+        reference, customer_email as email, purchase_type,
+        amount, created_at
+    FROM sales
+    WHERE payment_status = 'success'
+    ORDER BY created_at DESC
+    LIMIT 10
+"""
+
+# Bucket totals, one row per bucket in range (empty buckets included). The
+# series is generated in UTC so day/week steps don't drift across DST.
+_SALES_TOTALS = """
+    SELECT
+        b.bucket,
+        COALESCE(r.revenue, 0) AS revenue,
+        COALESCE(r.sale_count, 0) AS sales,
+        COALESCE(r.unique_customers, 0) AS unique_customers
+    FROM generate_series(
+        date_trunc(%(grain)s, %(start)s::timestamptz AT TIME ZONE 'UTC'),
+        %(end)s::timestamptz AT TIME ZONE 'UTC',
+        ('1 ' || %(grain)s)::interval
+    ) AS s(ts)
+    CROSS JOIN LATERAL (SELECT s.ts AT TIME ZONE 'UTC' AS bucket) AS b
+    LEFT JOIN sales_rollups r
+        ON r.grain = %(grain)s AND r.bucket = b.bucket
+       AND r.purchase_type = '*' AND r.workflow_id = 0
+    ORDER BY b.bucket
+"""
+
+_SALES_BREAKDOWN = """
+    SELECT
+        r.bucket,
+        r.purchase_type,
+        NULLIF(r.workflow_id, 0) AS workflow_id,
+        w.name AS workflow_name,
+        r.revenue,
+        r.sale_count AS sales,
+        r.unique_customers
+    FROM sales_rollups r
+    LEFT JOIN workflows w ON w.id = r.workflow_id
+    WHERE r.grain = %(grain)s
+      AND r.bucket >= date_trunc(%(grain)s, %(start)s::timestamptz AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+      AND r.bucket <= %(end)s
+      AND r.purchase_type <> '*'
+      AND (%(purchase_type)s::text IS NULL OR r.purchase_type = %(purchase_type)s)
+      AND (%(workflow_id)s::int IS NULL OR r.workflow_id = %(workflow_id)s)
+    ORDER BY r.bucket, r.purchase_type, r.workflow_id
+"""
+
+
+# Sets the status of every request in ids and reports, per existing id, the
+# previous status and whether it changed
+_BULK_REQUEST_STATUS = """
+    WITH target AS (
+        SELECT id, status AS previous_status FROM custom_requests
+        WHERE id = ANY(%(ids)s::uuid[])
+        FOR UPDATE
+    ), changed AS (
+        UPDATE custom_requests c SET status = %(status)s, updated_at = NOW()
+        FROM target t
+        WHERE c.id = t.id AND t.previous_status IS DISTINCT FROM %(status)s
+        RETURNING c.id
+    )
+    SELECT t.id, t.previous_status, ch.id IS NOT NULL AS changed
+    FROM target t LEFT JOIN changed ch ON ch.id = t.id
+"""
 
 
 class AdminService:
     """Service for admin operations"""
 
     @staticmethod
+    @read_only
     def get_dashboard_stats() -> dict:
         """
         Get dashboard statistics
@@ -17,17 +124,7 @@ class AdminService:
             dict: Dashboard statistics
         """
         # Sales stats
-        sales_stats = execute_query_dict(
-            """
-            SELECT
-                COALESCE(SUM(amount), 0) as total_revenue,
-                COUNT(*) as total_sales,
-                COUNT(CASE WHEN purchase_type = 'all-access' THEN 1 END) as all_access_sales
-            FROM sales
-            WHERE payment_status = 'success'
-            """,
-            fetch_one=True
-        ) or {}
+        sales_stats = execute_query_dict(_SALES_STATS, fetch_one=True) or {}
 
         # User count
         user_count = execute_query_dict(
@@ -42,24 +139,10 @@ class AdminService:
         ) or {"count": 0}
 
         # Customer count
-        customer_count = execute_query_dict(
-            "SELECT COUNT(DISTINCT customer_email) as count FROM sales",
-            fetch_one=True
-        ) or {"count": 0}
+        customer_count = execute_query_dict(_CUSTOMER_COUNT, fetch_one=True) or {"count": 0}
 
         # Recent sales
-        recent_sales = execute_query_dict(
-            """
-            SELECT
-                reference, customer_email as email, purchase_type,
-                amount, created_at
-            FROM sales
-            WHERE payment_status = 'success'
-            ORDER BY created_at DESC
-            LIMIT 10
-            """,
-            fetch_all=True
-        ) or []
+        recent_sales = execute_query_dict(_RECENT_SALES, fetch_all=True) or []
 
         return {
             "success": True,
@@ -75,6 +158,86 @@ class AdminService:
         }
 
     @staticmethod
+    @read_only
+    def get_sales_analytics(
+        interval: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        purchase_type: Optional[str] = None,
+        workflow_id: Optional[int] = None
+    ) -> dict:
+        """
+        Get revenue, sales and unique customers per time bucket
+
+        Reads the ``sales_rollups`` table, which triggers on ``sales`` keep
+        current, so cost depends on the number of buckets rather than sales.
+
+        Args:
+            interval: Bucket size (hour, day or week)
+            start: Start of the range (defaults to a span ending at ``end``)
+            end: End of the range (defaults to now)
+            purchase_type: Only break down this purchase type
+            workflow_id: Only break down this workflow
+
+        Returns:
+            dict: Per-bucket totals and a purchase_type/workflow breakdown
+
+        Raises:
+            HTTPException: If the range is empty or has too many buckets
+        """
+        end = _as_utc(end) if end else datetime.now(timezone.utc)
+        start = _as_utc(start) if start else end - ANALYTICS_DEFAULT_SPAN[interval]
+        if start >= end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start must be before end"
+            )
+        if (end - start) / ANALYTICS_GRAINS[interval] > settings.ANALYTICS_MAX_BUCKETS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Range spans more than {settings.ANALYTICS_MAX_BUCKETS} {interval} buckets"
+            )
+
+        params = {
+            "grain": interval,
+            "start": start,
+            "end": end,
+            "purchase_type": purchase_type,
+            "workflow_id": workflow_id
+        }
+        totals = execute_query_dict(_SALES_TOTALS, params, fetch_all=True) or []
+        breakdown = execute_query_dict(_SALES_BREAKDOWN, params, fetch_all=True) or []
+
+        return {
+            "success": True,
+            "interval": interval,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "totals": [
+                {
+                    "bucket": row["bucket"].isoformat(),
+                    "revenue": float(row["revenue"]),
+                    "sales": int(row["sales"]),
+                    "unique_customers": int(row["unique_customers"])
+                }
+                for row in totals
+            ],
+            "breakdown": [
+                {
+                    "bucket": row["bucket"].isoformat(),
+                    "purchase_type": row["purchase_type"],
+                    "workflow_id": row["workflow_id"],
+                    "workflow_name": row["workflow_name"],
+                    "revenue": float(row["revenue"]),
+                    "sales": int(row["sales"]),
+                    "unique_customers": int(row["unique_customers"])
+                }
+                for row in breakdown
+            ]
+        }
+
+    @staticmethod
+    @read_only
     def get_all_users() -> dict:
         """
         Get all registered users
@@ -100,6 +263,7 @@ class AdminService:
         }
 
     @staticmethod
+    @read_only
     def get_custom_requests() -> dict:
         """
         Get all custom workflow requests
@@ -124,7 +288,7 @@ class AdminService:
         }
 
     @staticmethod
-    def update_request_status(request_id: int, status: str) -> dict:
+    def update_request_status(request_id: UUID, status: str) -> dict:
         """
         Update custom request status
 
@@ -144,3 +308,46 @@ class AdminService:
             "success": True,
             "message": "Request status updated"
         }
+
+    @staticmethod
+    def bulk_update_request_status(ids: list, new_status: str) -> dict:
+        """
+        Set the status of many custom requests in one statement
+
+        Args:
+            ids: Request IDs
+            new_status: New status
+
+        Returns:
+            dict: Per-id results ("updated", "unchanged" or "not_found", with
+            the previous status) and a count of each
+        """
+        ids = list(dict.fromkeys(ids))
+        rows = execute_query_dict(_BULK_REQUEST_STATUS, {"ids": ids, "status": new_status}, fetch_all=True) or []
+        found = {row["id"]: row for row in rows}
+
+        results = []
+        counts = {}
+        for request_id in ids:
+            row = found.get(request_id)
+            if row is None:
+                result = {"id": str(request_id), "result": "not_found"}
+            else:
+                result = {
+                    "id": str(request_id),
+                    "result": "updated" if row["changed"] else "unchanged",
+                    "previous_status": row["previous_status"]
+                }
+            counts[result["result"]] = counts.get(result["result"], 0) + 1
+            results.append(result)
+        return {
+            "success": True,
+            "status": new_status,
+            "results": results,
+            "counts": counts
+        }
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes from query strings as UTC"""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
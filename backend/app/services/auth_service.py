@@ -2,12 +2,46 @@
 Authentication service
 Business logic for user authentication and authorization
 """
+import logging
 import uuid
-from fastapi import HTTPException
-from app.utils.database import execute_query_dict
-from app.utils.auth import hash_password, verify_password, create_access_token
+from fastapi import BackgroundTasks, HTTPException
+from app.utils.database import execute_query_dict, prepared_statement
+from app.utils.auth import hash_password, verify_password, password_needs_rehash, create_access_token
+from app.utils.metrics import Counter
+from app.utils.revocation import revocation_list
 from app.schemas.user import UserRegister, UserLogin
 
+# Hot statements, prepared once per pooled connection
+USER_BY_EMAIL = prepared_statement(
+    "user_by_email",
+    """
+    SELECT id, email, password_hash, first_name, last_name, phone,
+           is_active, is_admin
+    FROM users
+    WHERE email = %s
+    """,
+    warmup_params=("warmup@invalid",)
+)
+
+USER_INFO_BY_ID = prepared_statement(
+    "user_info_by_id",
+    """
+    SELECT id, email, first_name, last_name, phone,
+           is_verified, is_admin, created_at
+    FROM users
+    WHERE id = %s
+    """,
+    warmup_params=("00000000-0000-0000-0000-000000000000",)
+)
+
+# Only replaces the hash it was computed from, so a concurrent password
+# change wins
+_REHASH_PASSWORD = "UPDATE users SET password_hash = %s WHERE id = %s AND password_hash = %s"
+
+logger = logging.getLogger("app.auth")
+
+PASSWORD_REHASHES = Counter("password_rehashes_total", "Password hashes moved to the current bcrypt cost at login")
+
 
 class AuthService:
     """Service for authentication operations"""
@@ -68,12 +102,14 @@ class AuthService:
         }
 
     @staticmethod
-    def login_user(credentials: UserLogin) -> dict:
+    def login_user(credentials: UserLogin, background_tasks: BackgroundTasks = None) -> dict:
         """
         Login a user
 
         Args:
             credentials: User login credentials
+            background_tasks: Where to schedule a rehash of a hash made at
+                another bcrypt cost (skipped when None)
 
         Returns:
             dict: Token and user data
@@ -82,16 +118,7 @@ class AuthService:
             HTTPException: If credentials are invalid
         """
         # Find user
-        user = execute_query_dict(
-            """
-            SELECT id, email, password_hash, first_name, last_name, phone,
-                   is_active, is_admin
-            FROM users
-            WHERE email = %s
-            """,
-            (credentials.email,),
-            fetch_one=True
-        )
+        user = execute_query_dict(USER_BY_EMAIL, (credentials.email,), fetch_one=True)
 
         if not user:
             raise HTTPException(status_code=401, detail="Invalid email or password")
@@ -104,6 +131,8 @@ class AuthService:
         if not user.get("is_active", True):
             raise HTTPException(status_code=403, detail="Account is inactive")
 
+        AuthService._schedule_rehash(user, credentials.password, background_tasks)
+
         # Update last login
         execute_query_dict(
             """
@@ -150,16 +179,7 @@ class AuthService:
         Raises:
             HTTPException: If user not found
         """
-        user = execute_query_dict(
-            """
-            SELECT id, email, first_name, last_name, phone,
-                   is_verified, is_admin, created_at
-            FROM users
-            WHERE id = %s
-            """,
-            (user_id,),
-            fetch_one=True
-        )
+        user = execute_query_dict(USER_INFO_BY_ID, (user_id,), fetch_one=True)
 
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -179,12 +199,14 @@ class AuthService:
         }
 
     @staticmethod
-    def admin_login(credentials: UserLogin) -> dict:
+    def admin_login(credentials: UserLogin, background_tasks: BackgroundTasks = None) -> dict:
         """
         Admin login with admin privileges check
 
         Args:
             credentials: Admin login credentials
+            background_tasks: Where to schedule a rehash of a hash made at
+                another bcrypt cost (skipped when None)
 
         Returns:
             dict: Token and admin data
@@ -192,17 +214,8 @@ class AuthService:
         Raises:
             HTTPException: If not admin or invalid credentials
         """
-        # Find user
-        user = execute_query_dict(
-            """
-            SELECT id, email, password_hash, first_name, last_name,
-                   is_admin, is_active
-            FROM users
-            WHERE email = %s
-            """,
-            (credentials.email,),
-            fetch_one=True
-        )
+        # Find user (same statement as user login, so it shares the prepared plan)
+        user = execute_query_dict(USER_BY_EMAIL, (credentials.email,), fetch_one=True)
 
         if not user:
             raise HTTPException(status_code=401, detail="Invalid email or password")
@@ -219,6 +232,8 @@ class AuthService:
         if not user.get("is_active", True):
             raise HTTPException(status_code=403, detail="Account is inactive")
 
+        AuthService._schedule_rehash(user, credentials.password, background_tasks)
+
         # Update last login
         execute_query_dict(
             """
@@ -246,3 +261,45 @@ class AuthService:
                 "name": f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() or user["email"]
             }
         }
+
+    @staticmethod
+    def _schedule_rehash(user: dict, password: str, background_tasks: BackgroundTasks):
+        # Hashing at the new cost and the write run after the response is sent
+        if background_tasks is not None and password_needs_rehash(user["password_hash"]):
+            background_tasks.add_task(AuthService.rehash_password, str(user["id"]), password, user["password_hash"])
+
+    @staticmethod
+    def rehash_password(user_id: str, password: str, old_hash: str):
+        """
+        Store a verified password again at the current bcrypt cost
+
+        Args:
+            user_id: User ID
+            password: Plain password that just matched ``old_hash``
+            old_hash: Hash read at login
+        """
+        try:
+            execute_query_dict(_REHASH_PASSWORD, (hash_password(password), user_id, old_hash))
+            PASSWORD_REHASHES.inc()
+        except Exception as e:
+            logger.warning("password rehash failed: %s", e)
+
+    @staticmethod
+    def logout(token_data: dict) -> dict:
+        """
+        Revoke the presented token for its remaining lifetime
+
+        Args:
+            token_data: Decoded token of the current user
+
+        Returns:
+            dict: Success message
+        """
+        # Tokens issued before jti was added cannot be revoked; they expire normally
+        if token_data.get("jti"):
+            revocation_list.revoke(token_data["jti"], token_data.get("user_id"), token_data["exp"])
+
+        return {
+            "success": True,
+            "message": "Logged out successfully"
+        }
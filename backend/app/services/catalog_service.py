@@ -0,0 +1,264 @@
+"""
+Catalog service
+Serves the landing page with a snapshot of the active catalog inlined, so
+the first visit renders without a second request to /api/workflows, and
+publishes the catalog as static, precompressed JSON files.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Optional
+from fastapi.encoders import jsonable_encoder
+from app.config import settings
+from app.services.workflow_service import WorkflowService
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev server, nothing to serialize
+    fcntl = None
+
+logger = logging.getLogger("app.catalog")
+
+
+class CatalogPage:
+    """A rendered landing page and its validator"""
+
+    __slots__ = ("body", "etag", "built_at")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.built_at = monotonic()
+
+
+_page: Optional[CatalogPage] = None
+_generation = 0  # bumped by invalidate() so a render already running isn't kept
+_render_lock = asyncio.Lock()
+
+
+def _script_json(value) -> str:
+    """JSON that is safe inside an inline <script> element"""
+    return (
+        json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        .replace("<", "\\u003c")
+        .replace("\u2028", "\\u2028")
+        .replace("\u2029", "\\u2029")
+    )
+
+
+def embed_catalog(html: str, workflows: list) -> str:
+    """
+    Inline the catalog into a page as ``window.__CATALOG__``
+
+    Args:
+        html: Page markup
+        workflows: Workflows as returned by /api/workflows
+
+    Returns:
+        str: Markup with the snapshot script just before </head>
+    """
+    script = f"<script>window.__CATALOG__ = {_script_json(jsonable_encoder(workflows))};</script>\n"
+    head_end = html.find("</head>")
+    if head_end == -1:
+        return script + html
+    return html[:head_end] + script + html[head_end:]
+
+
+def _slug(category: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", category.lower()).strip("-") or "uncategorized"
+
+
+def _write_atomic(path: str, data: bytes):
+    """Write via a temp file and rename, so readers never see a partial file"""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_versioned(export_dir: str, stem: str, value) -> str:
+    """Write ``<stem>.<hash>.json`` and its .gz twin unless already present"""
+    data = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    name = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}.json"
+    path = os.path.join(export_dir, name)
+    if not os.path.exists(path + ".gz"):
+        _write_atomic(path, data)
+        # mtime=0 keeps the compressed bytes (and so the ETag) reproducible
+        _write_atomic(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+    return name
+
+
+@contextmanager
+def _export_lock(export_dir: str):
+    """Hold an exclusive lock on the export directory across processes"""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(export_dir, ".publish.lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _manifest_files(manifest: dict) -> set:
+    return {manifest.get("catalog"), *manifest.get("categories", {}).values()} - {None}
+
+
+class CatalogService:
+    """Service for the pre-rendered landing page"""
+
+    @staticmethod
+    async def get_index_page(index_path: str) -> Optional[CatalogPage]:
+        """
+        Get the landing page with the catalog inlined
+
+        The page is built once and reused until a workflow write calls
+        ``invalidate``, or ``CATALOG_SNAPSHOT_TTL_SECONDS`` passes (which
+        bounds staleness for writes made on other workers).
+
+        Args:
+            index_path: Path of public/index.html
+
+        Returns:
+            CatalogPage: The rendered page, or None if the catalog could not
+            be loaded (callers then serve the plain file)
+        """
+        page = _page
+        if page is not None and monotonic() - page.built_at < settings.CATALOG_SNAPSHOT_TTL_SECONDS:
+            return page
+
+        async with _render_lock:
+            # Another request may have rendered it while this one waited
+            page = _page
+            if page is not None and monotonic() - page.built_at < settings.CATALOG_SNAPSHOT_TTL_SECONDS:
+                return page
+            try:
+                return await CatalogService._render(index_path)
+            except Exception as e:
+                logger.warning("could not render catalog snapshot", extra={"error": str(e)})
+                return page
+
+    @staticmethod
+    def invalidate():
+        """Drop the rendered page"""
+        global _page, _generation
+        _generation += 1
+        _page = None
+
+    @staticmethod
+    async def refresh():
+        """Call after any workflow write: drop the page and republish the export"""
+        CatalogService.invalidate()
+        if not settings.CATALOG_EXPORT_ENABLED:
+            return
+        try:
+            await asyncio.to_thread(CatalogService.publish)
+        except Exception as e:
+            logger.warning("could not publish catalog export", extra={"error": str(e)})
+
+    @staticmethod
+    def publish(export_dir: Optional[str] = None) -> dict:
+        """
+        Write the active catalog as static JSON files
+
+        Writes ``catalog.<hash>.json`` and one ``category-<slug>.<hash>.json``
+        per category, each with a gzip twin, then points ``manifest.json``
+        at them. Files from the previous manifest are kept so clients that
+        just read it can still fetch them; older ones are removed. Workers
+        publish one at a time (a lock file in the export directory), so one
+        worker's cleanup never deletes files another has just pointed its
+        manifest at.
+
+        Args:
+            export_dir: Target directory (defaults to CATALOG_EXPORT_DIR)
+
+        Returns:
+            dict: The new manifest
+        """
+        export_dir = export_dir or settings.CATALOG_EXPORT_DIR
+        os.makedirs(export_dir, exist_ok=True)
+        with _export_lock(export_dir):
+            workflows = jsonable_encoder(WorkflowService.get_all_workflows(True))
+
+            by_category = {}
+            for workflow in workflows:
+                by_category.setdefault(workflow.get("category") or "", []).append(workflow)
+
+            catalog = _write_versioned(export_dir, "catalog", workflows)
+            manifest = {
+                "version": catalog.split(".")[1],
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "count": len(workflows),
+                "catalog": catalog,
+                "categories": {
+                    category: _write_versioned(export_dir, f"category-{_slug(category)}", items)
+                    for category, items in sorted(by_category.items())
+                }
+            }
+
+            manifest_path = os.path.join(export_dir, "manifest.json")
+            keep = _manifest_files(manifest)
+            try:
+                with open(manifest_path, "rb") as f:
+                    keep |= _manifest_files(json.load(f))
+            except (OSError, ValueError):
+                pass
+            manifest_data = json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+            _write_atomic(manifest_path, manifest_data)
+            _write_atomic(manifest_path + ".gz", gzip.compress(manifest_data, compresslevel=9, mtime=0))
+
+            for name in os.listdir(export_dir):
+                base = name[:-3] if name.endswith(".gz") else name
+                if base != "manifest.json" and base.endswith(".json") and base not in keep:
+                    try:
+                        os.remove(os.path.join(export_dir, name))
+                    except FileNotFoundError:
+                        pass
+
+        logger.info("published catalog export", extra={"version": manifest["version"], "workflows": len(workflows)})
+        return manifest
+
+    @staticmethod
+    def load_export(export_dir: Optional[str] = None) -> Optional[tuple]:
+        """
+        Read the last published catalog back from disk
+
+        Args:
+            export_dir: Export directory (defaults to CATALOG_EXPORT_DIR)
+
+        Returns:
+            tuple: (workflows, age in seconds), or None if nothing was published
+        """
+        export_dir = export_dir or settings.CATALOG_EXPORT_DIR
+        try:
+            with open(os.path.join(export_dir, "manifest.json"), "rb") as f:
+                manifest = json.load(f)
+            with open(os.path.join(export_dir, manifest["catalog"]), "rb") as f:
+                workflows = json.load(f)
+        except (OSError, ValueError, KeyError):
+            return None
+        generated_at = datetime.fromisoformat(manifest["generated_at"])
+        return workflows, (datetime.now(timezone.utc) - generated_at).total_seconds()
+
+    @staticmethod
+    async def _render(index_path: str) -> CatalogPage:
+        global _page
+        generation = _generation
+        workflows = await asyncio.to_thread(WorkflowService.get_all_workflows, True)
+        with open(index_path, encoding="utf-8") as f:
+            html = f.read()
+        page = CatalogPage(embed_catalog(html, workflows).encode("utf-8"))
+        # Only cache it if no write happened while it was being built
+        if generation == _generation:
+            _page = page
+        logger.info("rendered catalog snapshot", extra={"workflows": len(workflows), "bytes": len(page.body)})
+        return page
@@ -0,0 +1,88 @@
+"""
+Custom request service
+Accepts custom workflow requests into the intake queue and queues the
+confirmation email once the request is stored
+"""
+import uuid
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from app.config import settings
+from app.schemas.payment import CustomWorkflowRequest
+from app.services.email_service import EmailService
+from app.utils.batch_writer import BatchWriter, QueueFull
+
+# Ids are generated here so the request can be acknowledged before the row
+# exists; ON CONFLICT makes spool replays idempotent
+INSERT_CUSTOM_REQUEST = """
+    INSERT INTO custom_requests (
+        id, name, email, phone, workflow_title,
+        description, use_case, budget_range, timeline,
+        status, created_at, updated_at
+    ) VALUES (
+        %s, %s, %s, %s, %s, %s, %s, %s, %s, 'pending', %s, %s
+    )
+    ON CONFLICT (id) DO NOTHING
+"""
+
+
+def _send_confirmations(rows: list):
+    """Confirm requests the writer has stored (rows in INSERT_CUSTOM_REQUEST order)"""
+    for row in rows:
+        EmailService.send_custom_request_confirmation(row[0], row[1], row[2], row[5])
+
+
+custom_request_writer = BatchWriter(
+    "custom_requests",
+    INSERT_CUSTOM_REQUEST,
+    maxsize=settings.CUSTOM_REQUEST_QUEUE_SIZE,
+    batch_size=settings.CUSTOM_REQUEST_BATCH_SIZE,
+    flush_interval=settings.CUSTOM_REQUEST_FLUSH_INTERVAL,
+    on_written=_send_confirmations
+)
+
+
+class CustomRequestService:
+    """Service for custom workflow requests"""
+
+    @staticmethod
+    def submit(request_data: CustomWorkflowRequest) -> dict:
+        """
+        Queue a custom workflow request for insertion
+
+        Args:
+            request_data: Submitted request
+
+        Returns:
+            dict: Success status and the new request ID
+
+        Raises:
+            HTTPException: 503 if the intake queue is saturated
+        """
+        request_id = str(uuid.uuid4())
+        submitted_at = datetime.now(timezone.utc).isoformat()
+        try:
+            custom_request_writer.submit((
+                request_id,
+                request_data.name,
+                request_data.email,
+                request_data.phone,
+                'Custom Workflow Request',  # workflow_title
+                request_data.workflow_description,  # description
+                request_data.use_case,
+                request_data.budget,  # budget_range
+                request_data.timeline,
+                submitted_at,
+                submitted_at
+            ))
+        except QueueFull:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many requests are being processed. Please try again shortly.",
+                headers={"Retry-After": "5"}
+            )
+
+        return {
+            "success": True,
+            "message": "Custom request submitted successfully",
+            "request_id": request_id
+        }
@@ -0,0 +1,82 @@
+"""
+Email service
+Composes receipts, custom request confirmations and admin alerts and hands
+them to the outbound email queue
+"""
+from app.config import settings
+from app.utils.mailer import EmailQueue, SMTPPool
+
+email_queue = EmailQueue(
+    SMTPPool(
+        settings.SMTP_HOST,
+        settings.SMTP_PORT,
+        settings.SMTP_USER,
+        settings.SMTP_PASSWORD,
+        settings.SMTP_SECURITY,
+        timeout=settings.SMTP_TIMEOUT,
+        max_idle=settings.SMTP_MAX_IDLE_SECONDS
+    ),
+    sender=settings.EMAIL_FROM,
+    workers=settings.EMAIL_WORKERS,
+    maxsize=settings.EMAIL_QUEUE_SIZE,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    base_delay=settings.EMAIL_RETRY_BASE_DELAY,
+    max_delay=settings.EMAIL_RETRY_MAX_DELAY,
+    admin_email=settings.ADMIN_EMAIL,
+    digest_interval=settings.EMAIL_DIGEST_INTERVAL,
+    digest_max_items=settings.EMAIL_DIGEST_MAX_ITEMS
+)
+
+
+class EmailService:
+    """Service for outbound email (queued; nothing is sent inline)"""
+
+    @staticmethod
+    def send_receipt(sale: dict):
+        """
+        Queue a receipt for a successful sale and an admin alert
+
+        Args:
+            sale: Row built by ``verification_row``
+        """
+        if sale["purchase_type"] == "all-access":
+            item = "All Access Pass"
+        else:
+            item = sale.get("workflow_name") or f"Workflow #{sale.get('workflow_id')}"
+        greeting = f"Hi {sale['customer_name']}," if sale.get("customer_name") else "Hi,"
+        body = (
+            f"{greeting}\n\n"
+            f"Thank you for your purchase from {settings.APP_NAME}.\n\n"
+            f"Item: {item}\n"
+            f"Amount: GHS {sale['amount']:.2f}\n"
+            f"Reference: {sale['reference']}\n\n"
+            f"Your workflows are in your library: {settings.FRONTEND_URL}\n"
+        )
+        if sale.get("customer_email"):
+            email_queue.submit(sale["customer_email"], f"Your {settings.APP_NAME} receipt", body, "receipt")
+        email_queue.notify_admin(f"Sale {sale['reference']}: {item}, GHS {sale['amount']:.2f} ({sale['customer_email']})")
+
+    @staticmethod
+    def send_custom_request_confirmation(request_id: str, name: str, email: str, description: str):
+        """
+        Queue a confirmation for a custom workflow request and an admin alert
+
+        Args:
+            request_id: ID of the queued request
+            name: Requester name
+            email: Requester email
+            description: What they asked for
+        """
+        body = (
+            f"Hi {name},\n\n"
+            f"We received your custom workflow request and will get back to you shortly.\n\n"
+            f"Request ID: {request_id}\n"
+            f"Your description:\n{description}\n"
+        )
+        email_queue.submit(email, f"We received your {settings.APP_NAME} request", body, "custom_request")
+        email_queue.notify_admin(f"Custom request {request_id} from {name} <{email}>")
+
+    @staticmethod
+    def alert_admin(line: str):
+        """Add a line to the next admin digest"""
+        email_queue.notify_admin(line)
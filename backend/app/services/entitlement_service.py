@@ -0,0 +1,220 @@
+"""
+Entitlement service
+Answers "can this customer get this workflow" from a per-worker LRU of
+compact per-customer entitlements, loaded lazily from sales and
+all_access_members.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Optional
+from app.config import settings
+from app.utils.database import execute_query_dict, prepared_statement, read_only
+from app.utils.metrics import Counter, Gauge
+
+ENTITLEMENT_LOOKUPS = Counter(
+    "entitlement_lookups_total",
+    "Entitlement lookups, by where the answer came from (cache, database)",
+    ("source",),
+)
+ENTITLEMENT_CACHE_ENTRIES = Gauge("entitlement_cache_entries", "Customers held in the entitlement cache")
+
+ENTITLEMENTS_BY_EMAIL = prepared_statement(
+    "entitlements_by_email",
+    """
+    WITH purchases AS (
+        SELECT purchase_type, workflow_id FROM sales
+        WHERE customer_email = %s AND payment_status = 'success'
+        UNION
+        -- Purchases from partitions that have been archived
+        SELECT purchase_type, NULLIF(workflow_id, 0) FROM sales_archived_purchases
+        WHERE customer_email = %s
+    )
+    SELECT
+        EXISTS (SELECT 1 FROM purchases WHERE purchase_type = 'all-access') AS all_access_purchased,
+        m.lifetime AS member_lifetime,
+        m.until AS member_until,
+        ARRAY(
+            SELECT DISTINCT workflow_id FROM purchases WHERE workflow_id IS NOT NULL
+        ) AS workflow_ids
+    FROM (
+        SELECT BOOL_OR(expires_at IS NULL) AS lifetime, MAX(expires_at) AS until
+        FROM all_access_members
+        WHERE email = %s AND is_active = TRUE
+    ) AS m
+    """,
+    warmup_params=("", "", "")
+)
+
+
+class Entitlement:
+    """
+    What one customer owns
+
+    Args:
+        all_access: Whether the customer has the All Access Pass
+        access_expires_at: Epoch seconds the pass ends, None for lifetime
+        workflow_ids: Individually purchased workflow IDs
+    """
+
+    __slots__ = ("all_access", "access_expires_at", "workflow_ids", "loaded_at")
+
+    def __init__(self, all_access: bool, access_expires_at: Optional[float], workflow_ids: frozenset):
+        self.all_access = all_access
+        self.access_expires_at = access_expires_at
+        self.workflow_ids = workflow_ids
+        self.loaded_at = monotonic()
+
+    def has_all_access(self) -> bool:
+        if not self.all_access:
+            return False
+        return self.access_expires_at is None or self.access_expires_at > datetime.now(timezone.utc).timestamp()
+
+    def allows(self, workflow_id: int) -> bool:
+        return workflow_id in self.workflow_ids or self.has_all_access()
+
+
+# Email -> Entitlement, most recently used last. Sales are recorded from
+# worker threads, so every access goes through the lock.
+_entitlements = OrderedDict()
+_lock = threading.Lock()
+ENTITLEMENT_CACHE_ENTRIES.set_function(lambda: len(_entitlements))
+
+
+def _cached(email: str) -> Optional[Entitlement]:
+    with _lock:
+        entitlement = _entitlements.get(email)
+        if entitlement is None:
+            return None
+        if monotonic() - entitlement.loaded_at > settings.ENTITLEMENT_TTL_SECONDS:
+            del _entitlements[email]
+            return None
+        _entitlements.move_to_end(email)
+        return entitlement
+
+
+def _store(email: str, entitlement: Entitlement):
+    with _lock:
+        _entitlements[email] = entitlement
+        _entitlements.move_to_end(email)
+        while len(_entitlements) > settings.ENTITLEMENT_CACHE_SIZE:
+            _entitlements.popitem(last=False)
+
+
+class EntitlementService:
+    """Service for workflow ownership checks"""
+
+    @staticmethod
+    def get(email: str) -> Entitlement:
+        """
+        Get a customer's entitlement, loading it on a cache miss
+
+        Args:
+            email: Customer email
+
+        Returns:
+            Entitlement: What the customer owns
+        """
+        entitlement = _cached(email)
+        if entitlement is not None:
+            ENTITLEMENT_LOOKUPS.labels("cache").inc()
+            return entitlement
+        return EntitlementService._load(email)
+
+    @staticmethod
+    def can_access(email: str, workflow_id: int) -> bool:
+        """
+        Check whether a customer may download a workflow
+
+        A cached "no" is re-checked against the database once it is older
+        than ``ENTITLEMENT_RECHECK_SECONDS``, so a purchase recorded by
+        another worker is picked up without waiting for the TTL.
+
+        Args:
+            email: Customer email
+            workflow_id: Workflow ID
+
+        Returns:
+            bool: True if the customer owns the workflow or has All Access
+        """
+        entitlement = EntitlementService.get(email)
+        if entitlement.allows(workflow_id):
+            return True
+        if monotonic() - entitlement.loaded_at < settings.ENTITLEMENT_RECHECK_SECONDS:
+            return False
+        return EntitlementService._load(email).allows(workflow_id)
+
+    @staticmethod
+    def get_library(email: str) -> dict:
+        """
+        Get the workflows a customer can download
+
+        Args:
+            email: Customer email
+
+        Returns:
+            dict: All Access status and individually owned workflow IDs
+        """
+        entitlement = EntitlementService.get(email)
+        expires_at = entitlement.access_expires_at
+        return {
+            "success": True,
+            "all_access": entitlement.has_all_access(),
+            "access_expires_at": (
+                datetime.fromtimestamp(expires_at, timezone.utc).isoformat() if expires_at else None
+            ),
+            "workflow_ids": sorted(entitlement.workflow_ids)
+        }
+
+    @staticmethod
+    def grant(email: str, purchase_type: str, workflow_id: Optional[int] = None):
+        """
+        Apply a newly recorded sale to a cached entitlement
+
+        Customers that are not cached are left alone; their next lookup
+        loads the sale from the database.
+
+        Args:
+            email: Customer email
+            purchase_type: 'single' or 'all-access'
+            workflow_id: Purchased workflow ID for single purchases
+        """
+        with _lock:
+            current = _entitlements.get(email)
+            if current is None:
+                return
+            workflow_ids = current.workflow_ids
+            if workflow_id is not None:
+                workflow_ids = workflow_ids | {workflow_id}
+            if purchase_type == "all-access":
+                updated = Entitlement(True, None, workflow_ids)
+            else:
+                updated = Entitlement(current.all_access, current.access_expires_at, workflow_ids)
+            # Keep the original load time so the TTL still bounds staleness
+            updated.loaded_at = current.loaded_at
+            _entitlements[email] = updated
+
+    @staticmethod
+    def invalidate(email: str):
+        """Drop a customer's cached entitlement"""
+        with _lock:
+            _entitlements.pop(email, None)
+
+    @staticmethod
+    @read_only
+    def _load(email: str) -> Entitlement:
+        row = execute_query_dict(ENTITLEMENTS_BY_EMAIL, (email, email, email), fetch_one=True) or {}
+        ENTITLEMENT_LOOKUPS.labels("database").inc()
+
+        member_until = row.get("member_until")
+        if row.get("all_access_purchased") or row.get("member_lifetime"):
+            entitlement = Entitlement(True, None, frozenset(row.get("workflow_ids") or ()))
+        else:
+            entitlement = Entitlement(
+                member_until is not None,
+                member_until.timestamp() if member_until else None,
+                frozenset(row.get("workflow_ids") or ())
+            )
+        _store(email, entitlement)
+        return entitlement
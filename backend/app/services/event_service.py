@@ -0,0 +1,50 @@
+"""
+Event service
+Accepts analytics events from the frontend into the per-worker event buffer
+"""
+from app.config import settings
+from app.schemas.event import EventBatch
+from app.utils.event_buffer import EventBuffer
+from app.utils.log import parse_sample_rates
+
+event_buffer = EventBuffer(
+    max_bytes=settings.EVENTS_BUFFER_MAX_BYTES,
+    flush_size=settings.EVENTS_FLUSH_SIZE,
+    flush_interval=settings.EVENTS_FLUSH_INTERVAL,
+    max_event_bytes=settings.EVENTS_MAX_EVENT_BYTES,
+    sample_rates=parse_sample_rates(settings.EVENTS_SAMPLE_RATES)
+)
+
+
+class EventService:
+    """Service for analytics events"""
+
+    @staticmethod
+    def ingest(batch: EventBatch, ip_address: str = None, user_agent: str = None, referrer: str = None) -> dict:
+        """
+        Buffer a batch of client events
+
+        Args:
+            batch: Events sent by the client
+            ip_address: Client address
+            user_agent: Client User-Agent header
+            referrer: Client Referer header
+
+        Returns:
+            dict: Number of events accepted (after sampling and load shedding)
+        """
+        accepted = 0
+        for event in batch.events:
+            accepted += event_buffer.add(
+                event.event_type,
+                event.event_data,
+                event.session_id,
+                ip_address=ip_address,
+                user_agent=user_agent,
+                referrer=referrer
+            )
+
+        return {
+            "success": True,
+            "accepted": accepted
+        }
@@ -0,0 +1,64 @@
+"""
+Sales partition maintenance
+Keeps the monthly ``sales`` partitions created ahead of time and, when a
+retention period is set, archives the months that fall out of it
+"""
+import asyncio
+import logging
+from app.config import settings
+from app.utils.database import execute_query_dict
+
+logger = logging.getLogger("app.partitions")
+
+
+class SalesPartitionService:
+    """Service for sales partition maintenance (functions from 0007_partition_sales.sql)"""
+
+    @staticmethod
+    def ensure_partitions(months_ahead: int) -> int:
+        """
+        Create any missing partitions up to ``months_ahead`` months from now
+
+        Returns:
+            int: Partitions created (0 if another worker is already at it)
+        """
+        row = execute_query_dict(
+            "SELECT sales_ensure_partitions(%s) AS created", (months_ahead,), fetch_one=True
+        )
+        return row["created"] if row else 0
+
+    @staticmethod
+    def archive_partitions(retention_months: int) -> list:
+        """
+        Detach partitions older than ``retention_months`` into the sales_archive schema
+
+        Purchases in them stay visible to entitlement checks through
+        ``sales_archived_purchases``; revenue history stays in the rollups.
+
+        Returns:
+            list: Names of the archived partitions
+        """
+        rows = execute_query_dict(
+            "SELECT sales_archive_partitions(%s) AS name", (retention_months,), fetch_all=True
+        ) or []
+        return [row["name"] for row in rows]
+
+    @staticmethod
+    async def run_forever(interval: float):
+        """Maintain partitions every ``interval`` seconds until cancelled"""
+        while True:
+            try:
+                created = await asyncio.to_thread(
+                    SalesPartitionService.ensure_partitions, settings.SALES_PARTITION_MONTHS_AHEAD
+                )
+                if created:
+                    logger.info("created sales partitions", extra={"created": created})
+                if settings.SALES_RETENTION_MONTHS > 0:
+                    archived = await asyncio.to_thread(
+                        SalesPartitionService.archive_partitions, settings.SALES_RETENTION_MONTHS
+                    )
+                    if archived:
+                        logger.info("archived sales partitions", extra={"partitions": archived})
+            except Exception as e:
+                logger.warning("sales partition maintenance failed: %s", e)
+            await asyncio.sleep(interval)
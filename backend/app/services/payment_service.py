@@ -0,0 +1,467 @@
+"""
+Payment service
+Paystack transaction initialization and verification, recorded in ``sales``
+"""
+import asyncio
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from fastapi import HTTPException
+from app.config import settings
+from app.schemas.payment import PaymentRequest
+from app.services.email_service import EmailService
+from app.services.entitlement_service import EntitlementService
+from app.utils.database import execute_query, execute_query_dict, prepared_statement
+from app.utils.http_client import get_http_client
+from app.utils.metrics import Counter
+
+logger = logging.getLogger("app.payment")
+
+PAYMENT_VERIFICATIONS = Counter(
+    "payment_verifications_total",
+    "Verify requests by where the answer came from (cache, database, upstream, coalesced)",
+    ("source",),
+)
+
+# Paystack statuses that never change again; everything else is re-checked upstream
+TERMINAL_STATUSES = ("success", "failed")
+
+NOT_SUCCESSFUL = {
+    "success": False,
+    "verified": False,
+    "message": "Payment not successful"
+}
+
+# sales is partitioned by created_at; sales_references maps each reference
+# to its created_at, so every statement below reads or writes one partition
+SALE_BY_REFERENCE = prepared_statement(
+    "sale_by_reference",
+    """
+    SELECT s.payment_status, s.verification
+    FROM sales_references r
+    JOIN sales s ON s.reference = r.reference AND s.created_at = r.created_at
+    WHERE r.reference = %s
+    """,
+    warmup_params=("",)
+)
+
+WORKFLOW_PRICE = prepared_statement(
+    "workflow_price",
+    "SELECT price FROM workflows WHERE id = %s",
+    warmup_params=(0,)
+)
+
+# Claiming the reference first keeps references unique across partitions
+_RECORD_PENDING = """
+    WITH claimed AS (
+        INSERT INTO sales_references (reference) VALUES (%s)
+        ON CONFLICT DO NOTHING
+        RETURNING reference, created_at
+    )
+    INSERT INTO sales (
+        reference, created_at, customer_email, purchase_type, workflow_id,
+        workflow_name, amount, currency, payment_status, metadata
+    )
+    SELECT claimed.reference, claimed.created_at, %s, %s, %s, %s, %s, 'GHS', 'pending', %s::jsonb
+    FROM claimed
+"""
+
+# One statement for any number of results; only pending (or missing) sales change
+_RECORD_VERIFICATIONS = """
+    WITH v AS (
+        SELECT DISTINCT ON (reference) *
+        FROM jsonb_to_recordset(%s::jsonb) AS v(
+            reference VARCHAR, customer_email VARCHAR, customer_name VARCHAR,
+            purchase_type VARCHAR, workflow_id INT, workflow_name VARCHAR,
+            amount DECIMAL, payment_channel VARCHAR, payment_status VARCHAR,
+            metadata JSONB, verification JSONB, paid_at TIMESTAMPTZ
+        )
+    ), known AS (
+        SELECT r.reference, r.created_at
+        FROM sales_references r JOIN v ON v.reference = r.reference
+    ), updated AS (
+        UPDATE sales s SET
+            payment_status = v.payment_status,
+            payment_channel = v.payment_channel,
+            customer_name = COALESCE(s.customer_name, v.customer_name),
+            verification = v.verification,
+            paid_at = v.paid_at,
+            updated_at = NOW()
+        FROM v JOIN known k ON k.reference = v.reference
+        WHERE s.reference = k.reference AND s.created_at = k.created_at
+          AND s.payment_status = 'pending'
+        RETURNING s.reference
+    ), claimed AS (
+        INSERT INTO sales_references (reference)
+        SELECT v.reference FROM v
+        WHERE NOT EXISTS (SELECT 1 FROM known k WHERE k.reference = v.reference)
+        ON CONFLICT DO NOTHING
+        RETURNING reference, created_at
+    ), inserted AS (
+        INSERT INTO sales (
+            reference, created_at, customer_email, customer_name, purchase_type, workflow_id,
+            workflow_name, amount, currency, payment_channel, payment_status,
+            metadata, verification, paid_at
+        )
+        SELECT
+            v.reference, c.created_at, v.customer_email, v.customer_name, v.purchase_type, v.workflow_id,
+            v.workflow_name, v.amount, 'GHS', v.payment_channel, v.payment_status,
+            v.metadata, v.verification, v.paid_at
+        FROM v JOIN claimed c ON c.reference = v.reference
+        RETURNING reference
+    )
+    SELECT reference FROM updated
+    UNION ALL
+    SELECT reference FROM inserted
+"""
+
+# Terminal verification responses, most recently used last
+_verified = OrderedDict()
+# Reference -> task verifying it upstream, shared by concurrent callers
+_in_flight = {}
+
+
+def _paystack_headers() -> dict:
+    return {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
+
+
+def _forget(reference: str, task: asyncio.Task):
+    _in_flight.pop(reference, None)
+    if not task.cancelled():
+        task.exception()  # retrieved here in case every caller went away
+
+
+def _is_not_found(response) -> bool:
+    """Whether a failed verify response means Paystack has no such reference"""
+    if response.status_code == 404:
+        return True
+    if response.status_code != 400:
+        return False
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    if not isinstance(body, dict):
+        return False
+    return body.get("code") == "transaction_not_found" or "reference not found" in str(body.get("message", "")).lower()
+
+
+def remember_verification(reference: str, result: dict):
+    _verified[reference] = result
+    _verified.move_to_end(reference)
+    while len(_verified) > settings.PAYMENT_VERIFY_CACHE_SIZE:
+        _verified.popitem(last=False)
+
+
+def expected_amount(purchase_type: str, workflow_id) -> Decimal:
+    """
+    Price of what a transaction's metadata says was bought
+
+    Returns:
+        Decimal: Price in GHS, or None if the item is unknown
+    """
+    if purchase_type == "all-access":
+        return Decimal(str(settings.ALL_ACCESS_PRICE))
+    if purchase_type == "single" and workflow_id:
+        row = execute_query_dict(WORKFLOW_PRICE, (workflow_id,), fetch_one=True)
+        return Decimal(str(row["price"])) if row else None
+    return None
+
+
+def check_amount(data: dict) -> dict:
+    """
+    Treat a successful transaction that paid less than the price as failed
+
+    The amount and purchase type are chosen by the client at initialization,
+    so a success only counts once the amount Paystack collected covers the
+    price of what the metadata claims.
+
+    Args:
+        data: Paystack's ``data`` object
+
+    Returns:
+        dict: ``data``, or a failed copy flagged with ``amount_mismatch``
+    """
+    if data.get("status") != "success":
+        return data
+    metadata = data.get("metadata") if isinstance(data.get("metadata"), dict) else {}
+    price = expected_amount(metadata.get("purchase_type") or "single", metadata.get("workflow_id"))
+    paid = Decimal(data.get("amount") or 0) / 100
+    if price is not None and paid >= price and (data.get("currency") or "GHS") == "GHS":
+        return data
+    logger.warning("payment amount does not cover the price", extra={
+        "reference": data.get("reference"), "paid": str(paid), "price": str(price),
+        "currency": data.get("currency")
+    })
+    return {**data, "status": "failed", "amount_mismatch": True}
+
+
+def verification_response(data: dict) -> dict:
+    """Shape a Paystack transaction into the verify endpoint's response"""
+    if data.get("amount_mismatch"):
+        return {
+            "success": False,
+            "verified": False,
+            "message": "Payment amount does not match the price"
+        }
+    if data.get("status") != "success":
+        return NOT_SUCCESSFUL
+    return {
+        "success": True,
+        "verified": True,
+        "amount": data["amount"] / 100,
+        "customer": data.get("customer"),
+        "metadata": data.get("metadata")
+    }
+
+
+def verification_row(reference: str, data: dict) -> dict:
+    """A ``_RECORD_VERIFICATIONS`` row for a terminal Paystack transaction"""
+    metadata = data.get("metadata") or {}
+    if not isinstance(metadata, dict):
+        metadata = {}
+    if data.get("amount_mismatch"):
+        metadata = {**metadata, "amount_mismatch": True}
+    customer = data.get("customer") or {}
+    name = " ".join(part for part in (customer.get("first_name"), customer.get("last_name")) if part)
+    return {
+        "reference": reference,
+        "customer_email": customer.get("email") or "",
+        "customer_name": name or None,
+        "purchase_type": metadata.get("purchase_type") or "single",
+        "workflow_id": metadata.get("workflow_id"),
+        "workflow_name": metadata.get("workflow_name"),
+        "amount": (data.get("amount") or 0) / 100,
+        "payment_channel": data.get("channel"),
+        "payment_status": data["status"],
+        "metadata": metadata,
+        "verification": verification_response(data),
+        "paid_at": data.get("paid_at") if data["status"] == "success" else None
+    }
+
+
+class PaymentService:
+    """Service for payment operations"""
+
+    @staticmethod
+    async def initialize_payment(payment: PaymentRequest) -> dict:
+        """
+        Initialize a Paystack transaction and record it as a pending sale
+
+        Args:
+            payment: Payment request
+
+        Returns:
+            dict: Authorization URL, access code and reference
+
+        Raises:
+            HTTPException: If Paystack is not configured or rejects the request
+        """
+        import httpx
+
+        try:
+            # Check if Paystack key is configured
+            if not settings.PAYSTACK_SECRET_KEY or settings.PAYSTACK_SECRET_KEY == "":
+                logger.error("PAYSTACK_SECRET_KEY is not configured")
+                raise HTTPException(
+                    status_code=500,
+                    detail="Payment service not configured. Please contact administrator."
+                )
+
+            # Paystack API endpoint
+            url = f"{settings.PAYSTACK_BASE_URL}/transaction/initialize"
+
+            # Prepare metadata
+            metadata = {
+                "purchase_type": payment.purchase_type,
+                "workflow_id": payment.workflow_id,
+                "workflow_name": payment.workflow_name
+            }
+
+            # Generate reference
+            reference = f"VEXA-{uuid.uuid4().hex[:12].upper()}"
+
+            # Paystack request payload
+            payload = {
+                "email": payment.email,
+                "amount": int(payment.amount * 100),  # Convert to kobo
+                "currency": "GHS",
+                "reference": reference,
+                "metadata": metadata,
+                "callback_url": f"{settings.FRONTEND_URL}/payment-success"
+            }
+
+            logger.info("initializing payment", extra={
+                "reference": reference, "purchase_type": payment.purchase_type, "amount": payment.amount
+            })
+
+            # Make request to Paystack
+            response = await get_http_client().post(
+                url,
+                json=payload,
+                headers={**_paystack_headers(), "Content-Type": "application/json"}
+            )
+
+            logger.info("paystack initialize responded", extra={
+                "reference": reference, "status_code": response.status_code
+            })
+
+            if response.status_code != 200:
+                error_detail = response.json() if response.text else "Unknown error"
+                logger.warning("paystack initialize failed", extra={
+                    "reference": reference, "status_code": response.status_code, "error": error_detail
+                })
+                raise HTTPException(
+                    status_code=response.status_code,
+                    detail=f"Payment initialization failed: {error_detail}"
+                )
+
+            data = response.json()
+            await PaymentService._record_pending(reference, payment, metadata)
+
+            return {
+                "success": True,
+                "authorization_url": data["data"]["authorization_url"],
+                "access_code": data["data"]["access_code"],
+                "reference": data["data"]["reference"]
+            }
+
+        except httpx.HTTPError as e:
+            logger.exception("paystack request failed")
+            raise HTTPException(status_code=500, detail=f"Payment service error: {str(e)}")
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.exception("payment initialization failed")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @staticmethod
+    async def _record_pending(reference: str, payment: PaymentRequest, metadata: dict):
+        """Insert the pending sale; a failure here must not fail the checkout"""
+        try:
+            await asyncio.to_thread(
+                execute_query,
+                _RECORD_PENDING,
+                (
+                    reference,
+                    payment.email,
+                    payment.purchase_type,
+                    payment.workflow_id,
+                    payment.workflow_name,
+                    payment.amount,
+                    json.dumps(metadata)
+                )
+            )
+        except Exception as e:
+            logger.warning("could not record pending sale", extra={"reference": reference, "error": str(e)})
+
+    @staticmethod
+    async def verify_payment(reference: str) -> dict:
+        """
+        Verify a transaction, answering locally once its outcome is final
+
+        Terminal results (success/failed) are served from an in-memory LRU,
+        then from ``sales``; only pending references go to Paystack, and
+        concurrent verifies of one reference share a single upstream call.
+
+        Args:
+            reference: Transaction reference
+
+        Returns:
+            dict: Verification result
+
+        Raises:
+            HTTPException: If Paystack cannot verify the reference
+        """
+        cached = _verified.get(reference)
+        if cached is not None:
+            _verified.move_to_end(reference)
+            PAYMENT_VERIFICATIONS.labels("cache").inc()
+            return cached
+
+        try:
+            sale = await asyncio.to_thread(execute_query_dict, SALE_BY_REFERENCE, (reference,), True)
+        except Exception as e:
+            logger.warning("sale lookup failed, verifying upstream", extra={"reference": reference, "error": str(e)})
+            sale = None
+        if sale and sale["payment_status"] in TERMINAL_STATUSES and sale["verification"]:
+            remember_verification(reference, sale["verification"])
+            PAYMENT_VERIFICATIONS.labels("database").inc()
+            return sale["verification"]
+
+        task = _in_flight.get(reference)
+        if task is None:
+            task = _in_flight[reference] = asyncio.create_task(PaymentService._verify_upstream(reference))
+            task.add_done_callback(lambda done: _forget(reference, done))
+            PAYMENT_VERIFICATIONS.labels("upstream").inc()
+        else:
+            PAYMENT_VERIFICATIONS.labels("coalesced").inc()
+        # Shielded so one caller disconnecting doesn't cancel the others' call
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def fetch_transaction(reference: str) -> dict:
+        """
+        Fetch a transaction from Paystack
+
+        Args:
+            reference: Transaction reference
+
+        Returns:
+            dict: Paystack's ``data`` object
+
+        Raises:
+            HTTPException: 404 if Paystack has no such transaction, 400 for
+                any other failure (bad key, rate limit, outage)
+        """
+        response = await get_http_client().get(
+            f"{settings.PAYSTACK_BASE_URL}/transaction/verify/{reference}",
+            headers=_paystack_headers()
+        )
+        if response.status_code != 200:
+            if _is_not_found(response):
+                raise HTTPException(status_code=404, detail="Transaction not found")
+            raise HTTPException(status_code=400, detail="Payment verification failed")
+        return response.json()["data"]
+
+    @staticmethod
+    async def _verify_upstream(reference: str) -> dict:
+        try:
+            data = await PaymentService.fetch_transaction(reference)
+            data = await asyncio.to_thread(check_amount, data)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+        result = verification_response(data)
+        if data.get("status") in TERMINAL_STATUSES:
+            try:
+                await asyncio.to_thread(PaymentService.record_verifications, [verification_row(reference, data)])
+            except Exception as e:
+                logger.warning("could not record verification", extra={"reference": reference, "error": str(e)})
+            remember_verification(reference, result)
+        return result
+
+    @staticmethod
+    def record_verifications(rows: list) -> int:
+        """
+        Record terminal verification results in a single statement
+
+        Args:
+            rows: Rows built by ``verification_row``
+
+        Returns:
+            int: Number of sales inserted or moved out of pending
+        """
+        if not rows:
+            return 0
+        recorded = execute_query(_RECORD_VERIFICATIONS, (json.dumps(rows, default=str),), fetch_all=True) or []
+        references = {row[0] for row in recorded}
+        for row in rows:
+            if row["reference"] in references and row["payment_status"] == "success":
+                EntitlementService.grant(row["customer_email"], row["purchase_type"], row["workflow_id"])
+                EmailService.send_receipt(row)
+        return len(recorded)
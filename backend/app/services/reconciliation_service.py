@@ -0,0 +1,177 @@
+"""
+Reconciliation service
+Background worker that settles sales left pending (e.g. after a lost webhook)
+by verifying them against Paystack.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from time import perf_counter
+from fastapi import HTTPException
+from app.config import settings
+from app.services.payment_service import (
+    PaymentService, TERMINAL_STATUSES, check_amount, remember_verification, verification_row
+)
+from app.utils.database import execute_query_dict
+from app.utils.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger("app.reconciliation")
+
+RECONCILE_CHECKED = Counter(
+    "reconcile_checked_total",
+    "Pending sales checked against Paystack, by outcome",
+    ("outcome",),
+)
+RECONCILE_RECORDED = Counter("reconcile_recorded_total", "Pending sales settled by reconciliation")
+RECONCILE_LAG = Gauge("reconcile_lag_seconds", "Age of the oldest sale still pending")
+RECONCILE_BATCH_SECONDS = Histogram(
+    "reconcile_batch_seconds",
+    "Time to claim, verify and record one batch",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+# Lease a batch of stale pending sales: bumping updated_at hides them from other
+# workers (and the next tick) for ``stale_after`` seconds; SKIP LOCKED keeps
+# concurrent claimers from blocking on each other
+_CLAIM_STALE_PENDING = """
+    UPDATE sales SET updated_at = NOW()
+    WHERE (id, created_at) IN (
+        SELECT id, created_at FROM sales
+        WHERE payment_status = 'pending'
+          AND updated_at < NOW() - make_interval(secs => %s)
+        ORDER BY updated_at
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING reference, created_at
+"""
+
+_OLDEST_PENDING = """
+    SELECT EXTRACT(EPOCH FROM NOW() - MIN(created_at)) AS lag
+    FROM sales
+    WHERE payment_status = 'pending'
+"""
+
+
+class Reconciler:
+    """
+    Verifies stale pending sales in batches
+
+    Args:
+        batch_size: Sales claimed per batch
+        concurrency: Paystack calls in flight at once
+        stale_after: Seconds a sale must have been pending (or untouched
+            since its last check) before it is reconciled
+        abandon_after: Seconds after which a sale Paystack reports as
+            abandoned, or does not know, is marked failed
+    """
+
+    def __init__(self, batch_size: int, concurrency: int, stale_after: float, abandon_after: float):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.stale_after = stale_after
+        self.abandon_after = abandon_after
+
+    def claim_batch(self) -> list:
+        """Lease the next batch of stale pending sales"""
+        return execute_query_dict(
+            _CLAIM_STALE_PENDING, (self.stale_after, self.batch_size), fetch_all=True
+        ) or []
+
+    def record(self, rows: list) -> int:
+        """Record terminal results in one statement"""
+        return PaymentService.record_verifications(rows)
+
+    def pending_lag(self) -> float:
+        row = execute_query_dict(_OLDEST_PENDING, fetch_one=True)
+        return float(row["lag"] or 0) if row else 0.0
+
+    async def run_forever(self, interval: float):
+        """Reconcile until cancelled; a full batch is followed immediately by the next"""
+        while True:
+            try:
+                summary = await self.run_once()
+            except Exception as e:
+                logger.warning("reconciliation batch failed: %s", e)
+                summary = {"claimed": 0}
+            if summary["claimed"] < self.batch_size:
+                await asyncio.sleep(interval)
+
+    async def run_once(self) -> dict:
+        """
+        Claim, verify and record one batch
+
+        Returns:
+            dict: Counts of claimed, recorded, still-pending and failed checks
+        """
+        start = perf_counter()
+        sales = await asyncio.to_thread(self.claim_batch)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._check(semaphore, sale) for sale in sales))
+
+        rows = [row for row in results if isinstance(row, dict)]
+        recorded = await asyncio.to_thread(self.record, rows) if rows else 0
+        for row in rows:
+            remember_verification(row["reference"], row["verification"])
+        RECONCILE_RECORDED.inc(recorded)
+
+        RECONCILE_LAG.set(await asyncio.to_thread(self.pending_lag))
+        RECONCILE_BATCH_SECONDS.observe(perf_counter() - start)
+        summary = {
+            "claimed": len(sales),
+            "recorded": recorded,
+            "pending": sum(1 for row in results if row == "pending"),
+            "errors": sum(1 for row in results if row == "error"),
+        }
+        if sales:
+            logger.info("reconciled batch", extra=summary)
+        return summary
+
+    async def _check(self, semaphore: asyncio.Semaphore, sale: dict):
+        """Return a verification row for a terminal sale, else "pending" or "error" """
+        reference = sale["reference"]
+        abandoned = self._age(sale) > self.abandon_after
+        async with semaphore:
+            try:
+                data = await PaymentService.fetch_transaction(reference)
+                data = await asyncio.to_thread(check_amount, data)
+            except HTTPException as e:
+                # Paystack doesn't know the reference: checkout was never opened.
+                # Any other failure (bad key, rate limit, outage) says nothing
+                # about the payment, so the sale stays pending.
+                if e.status_code == 404 and abandoned:
+                    RECONCILE_CHECKED.labels("failed").inc()
+                    return verification_row(reference, {"status": "failed"})
+                if e.status_code != 404:
+                    logger.warning("reconciliation check failed", extra={"reference": reference, "error": e.detail})
+                RECONCILE_CHECKED.labels("error").inc()
+                return "error"
+            except Exception as e:
+                logger.warning("reconciliation check failed", extra={"reference": reference, "error": str(e)})
+                RECONCILE_CHECKED.labels("error").inc()
+                return "error"
+
+        status = data.get("status")
+        if status == "abandoned" and abandoned:
+            data = {**data, "status": "failed"}
+            status = "failed"
+        if status in TERMINAL_STATUSES:
+            RECONCILE_CHECKED.labels(status).inc()
+            return verification_row(reference, data)
+        RECONCILE_CHECKED.labels("pending").inc()
+        return "pending"
+
+    @staticmethod
+    def _age(sale: dict) -> float:
+        created_at = sale.get("created_at")
+        if created_at is None:
+            return 0.0
+        return (datetime.now(timezone.utc) - created_at).total_seconds()
+
+
+reconciler = Reconciler(
+    batch_size=settings.RECONCILE_BATCH_SIZE,
+    concurrency=settings.RECONCILE_CONCURRENCY,
+    stale_after=settings.RECONCILE_STALE_AFTER,
+    abandon_after=settings.RECONCILE_ABANDON_AFTER
+)
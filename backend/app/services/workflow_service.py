@@ -3,15 +3,87 @@ Workflow service
 Business logic for workflow management
 """
 import json
+from decimal import Decimal
+from typing import Optional
 from fastapi import HTTPException
-from app.utils.database import execute_query_dict
+from app.services.entitlement_service import EntitlementService
+from app.utils.database import execute_query_dict, prepared_statement, read_only
 from app.schemas.workflow import WorkflowUpload, WorkflowUpdate
 
+_CATALOG_SELECT = """
+    SELECT
+        id, name, category, icon, description,
+        price, tags, downloads, revenue, is_active, created_at
+    FROM workflows
+"""
+
+# Hot statements, prepared once per pooled connection
+ACTIVE_WORKFLOWS = prepared_statement(
+    "active_workflows",
+    _CATALOG_SELECT + " WHERE is_active = TRUE ORDER BY created_at DESC"
+)
+
+ALL_WORKFLOWS = prepared_statement(
+    "all_workflows",
+    _CATALOG_SELECT + " ORDER BY created_at DESC"
+)
+
+WORKFLOW_BY_ID = prepared_statement(
+    "workflow_by_id",
+    """
+    SELECT
+        id, name, category, icon, description, price,
+        tags, downloads, revenue, is_active
+    FROM workflows
+    WHERE id = %s
+    """,
+    warmup_params=(0,)
+)
+
+# The workflow JSON itself: only for customers who own it (get_workflow_download)
+WORKFLOW_JSON_BY_ID = prepared_statement(
+    "workflow_json_by_id",
+    "SELECT id, name, json_file_url FROM workflows WHERE id = %s",
+    warmup_params=(0,)
+)
+
+
+def _bulk_set_workflows(column: str) -> str:
+    """
+    One statement that sets ``column`` on every workflow in ``ids`` and
+    reports, per existing id, whether the value actually changed
+    """
+    return f"""
+    WITH target AS (
+        SELECT id, {column} AS previous FROM workflows
+        WHERE id = ANY(%(ids)s::int[])
+        FOR UPDATE
+    ), changed AS (
+        UPDATE workflows w SET {column} = %(value)s, updated_at = NOW()
+        FROM target t
+        WHERE w.id = t.id AND t.previous IS DISTINCT FROM %(value)s
+        RETURNING w.id
+    )
+    SELECT t.id, c.id IS NOT NULL AS changed
+    FROM target t LEFT JOIN changed c ON c.id = t.id
+    """
+
+
+# Bulk action -> (statement, column value or None to take the request's price)
+_BULK_WORKFLOW_UPDATES = {
+    "activate": (_bulk_set_workflows("is_active"), True),
+    "deactivate": (_bulk_set_workflows("is_active"), False),
+    "reprice": (_bulk_set_workflows("price"), None),
+}
+
+_BULK_DELETE_WORKFLOWS = "DELETE FROM workflows WHERE id = ANY(%(ids)s::int[]) RETURNING id"
+
 
 class WorkflowService:
     """Service for workflow operations"""
 
     @staticmethod
+    @read_only
     def get_all_workflows(active_only: bool = True) -> list:
         """
         Get all workflows
@@ -22,22 +94,12 @@ class WorkflowService:
         Returns:
             list: List of workflows
         """
-        query = """
-            SELECT
-                id, name, category, icon, description,
-                price, tags, downloads, revenue, is_active, created_at
-            FROM workflows
-        """
-
-        if active_only:
-            query += " WHERE is_active = TRUE"
-
-        query += " ORDER BY created_at DESC"
-
+        query = ACTIVE_WORKFLOWS if active_only else ALL_WORKFLOWS
         workflows = execute_query_dict(query, fetch_all=True) or []
         return workflows
 
     @staticmethod
+    @read_only
     def get_workflow_by_id(workflow_id: int) -> dict:
         """
         Get a single workflow by ID
@@ -51,17 +113,32 @@ class WorkflowService:
         Raises:
             HTTPException: If workflow not found
         """
-        workflow = execute_query_dict(
-            """
-            SELECT
-                id, name, category, icon, description, price,
-                tags, json_file_url, downloads, revenue, is_active
-            FROM workflows
-            WHERE id = %s
-            """,
-            (workflow_id,),
-            fetch_one=True
-        )
+        workflow = execute_query_dict(WORKFLOW_BY_ID, (workflow_id,), fetch_one=True)
+
+        if not workflow:
+            raise HTTPException(status_code=404, detail="Workflow not found")
+
+        return workflow
+
+    @staticmethod
+    def get_workflow_download(workflow_id: int, email: str) -> dict:
+        """
+        Get a workflow's JSON for a customer who owns it
+
+        Args:
+            workflow_id: Workflow ID
+            email: Customer email from the access token
+
+        Returns:
+            dict: Workflow id, name and ``json_file_url`` (the workflow JSON)
+
+        Raises:
+            HTTPException: If the customer doesn't own it or it doesn't exist
+        """
+        if not EntitlementService.can_access(email, workflow_id):
+            raise HTTPException(status_code=403, detail="You have not purchased this workflow")
+
+        workflow = execute_query_dict(WORKFLOW_JSON_BY_ID, (workflow_id,), fetch_one=True)
 
         if not workflow:
             raise HTTPException(status_code=404, detail="Workflow not found")
@@ -195,3 +272,41 @@ class WorkflowService:
 
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
+
+    @staticmethod
+    def bulk_update(ids: list, action: str, price: Optional[float] = None) -> dict:
+        """
+        Activate, deactivate, delete or re-price many workflows at once
+
+        Runs as a single statement, so either every workflow changes or none.
+
+        Args:
+            ids: Workflow IDs
+            action: "activate", "deactivate", "delete" or "reprice"
+            price: New price (reprice only)
+
+        Returns:
+            dict: Per-id results ("updated", "unchanged", "deleted" or
+            "not_found") and a count of each
+        """
+        ids = list(dict.fromkeys(ids))
+        if action == "delete":
+            rows = execute_query_dict(_BULK_DELETE_WORKFLOWS, {"ids": ids}, fetch_all=True) or []
+            outcomes = {row["id"]: "deleted" for row in rows}
+        else:
+            query, value = _BULK_WORKFLOW_UPDATES[action]
+            if value is None:
+                value = Decimal(str(price))
+            rows = execute_query_dict(query, {"ids": ids, "value": value}, fetch_all=True) or []
+            outcomes = {row["id"]: "updated" if row["changed"] else "unchanged" for row in rows}
+
+        results = [{"id": i, "result": outcomes.get(i, "not_found")} for i in ids]
+        counts = {}
+        for result in results:
+            counts[result["result"]] = counts.get(result["result"], 0) + 1
+        return {
+            "success": True,
+            "action": action,
+            "results": results,
+            "counts": counts
+        }
@@ -2,16 +2,30 @@
 Authentication utilities
 Password hashing and JWT token management
 """
+import logging
+import math
+import statistics
+import uuid
 from datetime import datetime, timedelta
+from time import perf_counter
 from passlib.context import CryptContext
 import jwt
-from fastapi import HTTPException, Security
+from fastapi import Depends, HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.config import settings
+from app.utils.metrics import Gauge
+from app.utils.revocation import revocation_list
 
-# Password hashing
+logger = logging.getLogger("app.auth")
+
+PASSWORD_HASH_ROUNDS = Gauge("password_hash_rounds", "bcrypt cost (log2 rounds) used for new password hashes")
+
+# Password hashing (cost set at startup by configure_password_hashing)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Cheap cost timed during calibration; each extra round doubles the time
+_CALIBRATION_PROBE_ROUNDS = 8
+
 # HTTP Bearer for JWT
 security = HTTPBearer()
 
@@ -26,6 +40,54 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a hash was made below the minimum cost"""
+    return pwd_context.needs_update(hashed_password)
+
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int, max_rounds: int) -> int:
+    """
+    Pick the bcrypt cost whose hash (and so verify) time is closest to a target
+
+    Args:
+        target_ms: Wanted time per verify on this machine
+        min_rounds: Lowest cost allowed, whatever the hardware
+        max_rounds: Highest cost allowed
+
+    Returns:
+        int: bcrypt cost (log2 rounds)
+    """
+    probe = pwd_context.handler("bcrypt").using(rounds=_CALIBRATION_PROBE_ROUNDS)
+    timings = []
+    for _ in range(3):
+        start = perf_counter()
+        probe.hash("calibration")
+        timings.append(perf_counter() - start)
+    probe_ms = statistics.median(timings) * 1000
+    rounds = _CALIBRATION_PROBE_ROUNDS + round(math.log2(target_ms / probe_ms))
+    return min(max(rounds, min_rounds), max_rounds)
+
+
+def configure_password_hashing() -> int:
+    """
+    Set the bcrypt cost for new hashes (BCRYPT_ROUNDS, or calibrated to
+    BCRYPT_TARGET_MS) and mark hashes below BCRYPT_MIN_ROUNDS for rehashing
+
+    Only the floor triggers a rehash: hashes at a higher cost, or made by a
+    worker that calibrated differently, are left alone.
+
+    Returns:
+        int: bcrypt cost in use
+    """
+    rounds = settings.BCRYPT_ROUNDS or calibrate_bcrypt_rounds(
+        settings.BCRYPT_TARGET_MS, settings.BCRYPT_MIN_ROUNDS, settings.BCRYPT_MAX_ROUNDS
+    )
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=min(settings.BCRYPT_MIN_ROUNDS, rounds))
+    PASSWORD_HASH_ROUNDS.set(rounds)
+    logger.info("bcrypt cost %d (%s)", rounds, "configured" if settings.BCRYPT_ROUNDS else "calibrated")
+    return rounds
+
+
 def create_access_token(data: dict) -> str:
     """
     Create a JWT access token
@@ -38,7 +100,7 @@ def create_access_token(data: dict) -> str:
     """
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(
         to_encode,
         settings.SECRET_KEY,
@@ -58,7 +120,7 @@ def decode_access_token(token: str) -> dict:
         Decoded token data
 
     Raises:
-        HTTPException: If token is invalid or expired
+        HTTPException: If token is invalid, expired or revoked
     """
     try:
         payload = jwt.decode(
@@ -66,12 +128,17 @@ def decode_access_token(token: str) -> dict:
             settings.SECRET_KEY,
             algorithms=[settings.JWT_ALGORITHM]
         )
-        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    # Tokens issued before jti was added cannot be revoked; they expire normally
+    jti = payload.get("jti")
+    if jti and revocation_list.is_revoked(jti):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    return payload
+
 
 def get_current_user(credentials: HTTPAuthorizationCredentials = Security(security)) -> dict:
     """
@@ -88,3 +155,21 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Security(securi
     """
     token = credentials.credentials
     return decode_access_token(token)
+
+
+def require_admin(current_user: dict = Depends(get_current_user)) -> dict:
+    """
+    Get current user from JWT token, requiring an admin token
+
+    Args:
+        current_user: Decoded token of the caller
+
+    Returns:
+        User data from token
+
+    Raises:
+        HTTPException: 401 if the token is invalid, 403 if it is not an admin token
+    """
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
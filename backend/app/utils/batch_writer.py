@@ -0,0 +1,259 @@
+"""
+Batched background writer
+Accepts rows into a bounded in-process queue and inserts them in batches off the
+event loop, with backpressure, retries and a disk spool for rows that could not
+be written.
+"""
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Optional
+
+import psycopg
+
+from app.config import settings
+from app.utils.database import execute_many
+from app.utils.metrics import Counter, Gauge
+
+logger = logging.getLogger("app.batch_writer")
+
+QUEUE_DEPTH = Gauge("intake_queue_depth", "Rows waiting in an intake queue", ("queue",))
+QUEUE_ROWS = Counter(
+    "intake_queue_rows_total",
+    "Intake queue rows by outcome (accepted, rejected, written, spooled, dropped)",
+    ("queue", "outcome"),
+)
+
+
+class QueueFull(Exception):
+    """The intake queue is saturated; the caller should shed load"""
+
+
+class BatchWriter:
+    """
+    Bounded queue drained by a single background task that writes in batches
+
+    ``submit`` never blocks and never touches the database. The writer task
+    collects up to ``batch_size`` rows (or whatever arrived within
+    ``flush_interval``), then runs one ``execute_many`` in a worker thread.
+    A batch that still fails after ``retries`` attempts is appended to a
+    per-process JSON-lines spool file, and spool files left by any worker are
+    replayed on the next start, so ``query`` should be idempotent (e.g.
+    ``ON CONFLICT DO NOTHING`` on a client-generated key). Before spooling, a
+    failed batch is retried one row at a time so that a row the database
+    rejects (bad data, constraint violation) is dropped on its own instead of
+    taking the whole batch with it.
+
+    ``on_written``, if given, is called with each list of rows once they are
+    committed (never for dropped rows, and only after a replay for spooled
+    ones). It may run in a worker thread.
+    """
+
+    def __init__(self, name: str, query: str, maxsize: int = 1000, batch_size: int = 100,
+                 flush_interval: float = 0.5, retries: int = 3,
+                 on_written: Optional[Callable[[list], None]] = None):
+        self.name = name
+        self.query = query
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.on_written = on_written
+        self._queue = None
+        self._task = None
+        self._accepting = False
+        QUEUE_DEPTH.labels(name).set_function(self.depth)
+
+    @property
+    def spool_dir(self) -> Path:
+        return Path(settings.INTAKE_SPOOL_DIR)
+
+    def depth(self) -> int:
+        """Rows currently waiting to be written"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, row: tuple):
+        """
+        Enqueue a row for writing
+
+        Args:
+            row: Parameters for the writer's INSERT
+
+        Raises:
+            QueueFull: If the queue is at capacity or the writer is not running
+        """
+        if not self._accepting:
+            raise QueueFull(self.name)
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            QUEUE_ROWS.labels(self.name, "rejected").inc()
+            raise QueueFull(self.name)
+        QUEUE_ROWS.labels(self.name, "accepted").inc()
+
+    async def start(self):
+        """Create the queue, replay spooled rows and start the writer task"""
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._accepting = True
+        self._task = asyncio.create_task(self._run())
+        await asyncio.to_thread(self._replay_spool)
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Stop accepting rows and drain the queue
+
+        Whatever cannot be written within ``timeout`` is spooled to disk so it
+        survives the restart.
+        """
+        if self._task is None:
+            return
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("%s: drain timed out with %d row(s) queued", self.name, self.depth())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        leftover = []
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        if leftover:
+            self._spool(leftover)
+
+    async def _run(self):
+        while True:
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = asyncio.get_running_loop().time() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                await self._write(batch)
+            except asyncio.CancelledError:
+                # Shutdown mid-batch: keep the rows rather than lose them
+                if batch:
+                    self._spool(batch)
+                raise
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: list):
+        for attempt in range(1, self.retries + 1):
+            try:
+                await asyncio.to_thread(execute_many, self.query, batch)
+            except Exception as e:
+                logger.warning("%s: writing %d row(s) failed (attempt %d/%d): %s",
+                               self.name, len(batch), attempt, self.retries, e)
+                if attempt < self.retries:
+                    await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+                continue
+            self._written(batch)
+            return
+        kept = await asyncio.to_thread(self._isolate, batch)
+        if kept:
+            self._spool(kept)
+
+    def _isolate(self, rows: list) -> list:
+        """
+        Insert rows one at a time after their batch failed
+
+        Rows the database rejects outright are logged and dropped.
+
+        Returns:
+            list: Rows that failed for any other reason (e.g. the database is down)
+        """
+        kept = []
+        for row in rows:
+            try:
+                execute_many(self.query, [row])
+            except (psycopg.DataError, psycopg.IntegrityError) as e:
+                QUEUE_ROWS.labels(self.name, "dropped").inc()
+                logger.error("%s: dropped a row the database rejects: %s; row=%s",
+                             self.name, e, json.dumps(list(row), default=str))
+                continue
+            except Exception:
+                kept.append(row)
+                continue
+            self._written([row])
+        return kept
+
+    def _written(self, rows: list):
+        """Count committed rows and hand them to ``on_written``"""
+        QUEUE_ROWS.labels(self.name, "written").inc(len(rows))
+        if self.on_written is None:
+            return
+        try:
+            self.on_written(rows)
+        except Exception as e:
+            logger.error("%s: on_written failed for %d row(s): %s", self.name, len(rows), e)
+
+    def _spool(self, rows: list):
+        """Append rows to this process's spool file"""
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spool_dir / f"{self.name}.{os.getpid()}.jsonl"
+        with open(path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(list(row), default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        QUEUE_ROWS.labels(self.name, "spooled").inc(len(rows))
+        logger.error("%s: spooled %d row(s) to %s", self.name, len(rows), path)
+
+    def _replay_spool(self):
+        """Write rows spooled by earlier processes; each file is claimed by renaming it"""
+        if not self.spool_dir.is_dir():
+            return
+        pending = list(self.spool_dir.glob(f"{self.name}.*.jsonl"))
+        # Files claimed by a worker that died mid-replay
+        pending += [path for path in self.spool_dir.glob(f"{self.name}.*.replay-*")
+                    if not _alive(int(path.suffix.rpartition("-")[2]))]
+        for path in sorted(pending):
+            claimed = path.with_suffix(f".replay-{os.getpid()}")
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue  # another worker claimed it
+            rows = [tuple(json.loads(line)) for line in claimed.read_text(encoding="utf-8").splitlines() if line]
+            try:
+                execute_many(self.query, rows)
+            except Exception as e:
+                logger.warning("%s: replaying %s failed, retrying row by row: %s", self.name, path.name, e)
+                kept = self._isolate(rows)
+                if kept:
+                    with open(claimed, "w", encoding="utf-8") as f:
+                        for row in kept:
+                            f.write(json.dumps(list(row), default=str) + "\n")
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.rename(claimed, claimed.with_suffix(".jsonl"))
+                    logger.warning("%s: %d row(s) from %s kept for the next start",
+                                   self.name, len(kept), path.name)
+                    continue
+            else:
+                self._written(rows)
+                logger.info("%s: replayed %d spooled row(s) from %s", self.name, len(rows), path.name)
+            claimed.unlink()
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,96 @@
+"""
+Circuit breaker
+Stops callers from queueing up behind a dependency that is down: after
+``failure_threshold`` consecutive failures every call fails fast for
+``reset_timeout`` seconds, then a single trial call decides whether to close.
+"""
+import threading
+from time import monotonic
+from app.utils.metrics import Counter, Gauge
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+BREAKER_STATE = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state (0 = closed, 1 = open, 2 = half-open)",
+    ("breaker",),
+)
+BREAKER_TRIPS = Counter("circuit_breaker_trips_total", "Times a circuit breaker opened", ("breaker",))
+BREAKER_REJECTIONS = Counter(
+    "circuit_breaker_rejections_total",
+    "Calls failed fast because the circuit was open",
+    ("breaker",),
+)
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable (circuit open)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker, safe to share between threads
+
+    Args:
+        name: Label used in errors and metrics
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds to stay open before allowing a trial call
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        BREAKER_STATE.labels(name).set_function(lambda: _STATE_VALUES[self._state])
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until the next trial call is allowed (0 when closed)"""
+        if self._state == CLOSED:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - monotonic())
+
+    def before_call(self):
+        """
+        Admit a call or fail fast
+
+        Raises:
+            CircuitOpen: If the circuit is open, or half-open with the trial
+                call already in flight
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._state == OPEN and monotonic() - self._opened_at >= self.reset_timeout:
+                # This caller is the trial; everyone else keeps failing fast
+                self._state = HALF_OPEN
+                return
+            retry_after = self.retry_after()
+        BREAKER_REJECTIONS.labels(self.name).inc()
+        raise CircuitOpen(self.name, retry_after or self.reset_timeout)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._state = CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = monotonic()
+                BREAKER_TRIPS.labels(self.name).inc()
@@ -1,15 +1,345 @@
 """
 Database connection and utilities for Neon PostgreSQL
 """
+import logging
+import random
+import re
+import threading
+import weakref
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter, time
 import psycopg
 from contextlib import contextmanager
 from app.config import settings
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpen
+from app.utils.metrics import Counter, Gauge
+from app.utils.query_stats import query_stats, fingerprint
+
+logger = logging.getLogger("app.db")
+
+PREPARED_EXECUTIONS = Counter(
+    "db_prepared_statement_executions_total",
+    "Executions of registered hot statements; hit = already prepared on that connection",
+    ("statement", "result"),
+)
+DB_QUERIES = Counter(
+    "db_queries_total",
+    "Queries executed, by the pool that served them",
+    ("pool",),
+)
+PREPARED_HIT_RATIO = Gauge(
+    "db_prepared_statement_hit_ratio",
+    "Share of hot-statement executions that reused an existing server-side plan",
+)
+
+
+class Statement(str):
+    """
+    A named hot query, executed as a server-side prepared statement
+
+    Behaves exactly like the SQL string it wraps, so it can be passed anywhere
+    a query is accepted; ``execute_query``/``execute_query_dict`` recognise it
+    and ask psycopg to prepare it on the connection.
+    """
+
+    def __new__(cls, name: str, sql: str, warmup_params: tuple = ()):
+        statement = super().__new__(cls, sql)
+        statement.name = name
+        statement.warmup_params = warmup_params
+        return statement
+
+
+_statements = {}
+_prepared_lock = threading.Lock()
+# Statement names prepared on each live connection; entries vanish with the connection
+_prepared_on = weakref.WeakKeyDictionary()
+
+
+def prepared_statement(name: str, sql: str, warmup_params: tuple = ()) -> Statement:
+    """
+    Register a hot query under a name
+
+    Args:
+        name: Stable statement name (used in metrics)
+        sql: Query text with %s placeholders
+        warmup_params: Harmless parameters used to prepare it at startup
+
+    Returns:
+        Statement: The query, to be passed to execute_query/execute_query_dict
+    """
+    statement = Statement(name, sql, warmup_params)
+    _statements[name] = statement
+    return statement
+
+
+def registered_statements() -> list:
+    """Return every registered hot statement"""
+    return list(_statements.values())
+
+
+def _prepared_hit_ratio() -> float:
+    hits = misses = 0.0
+    for (_, result), child in list(PREPARED_EXECUTIONS._children.items()):
+        if result == "hit":
+            hits += child.value
+        else:
+            misses += child.value
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+PREPARED_HIT_RATIO.set_function(_prepared_hit_ratio)
+
+
+class _StatementLost(Exception):
+    """The server no longer has a statement psycopg believes is prepared"""
+
+
+_pool = None
+_read_pool = None
+
+# Set for the duration of a @read_only service method
+_read_only = ContextVar("db_read_only", default=False)
+# Per-request routing state installed by ReadYourWritesMiddleware
+_session = ContextVar("db_session", default=None)
+
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+
+
+def _connect_kwargs() -> dict:
+    """Connection options shared by pooled and direct connections"""
+    if settings.DB_PREPARE_STATEMENTS:
+        return {}
+    # e.g. behind a transaction-mode pooler without prepared statement support
+    return {"prepare_threshold": None}
+
+
+def _open(conninfo: str, name: str, min_size: int, max_size: int):
+    from psycopg_pool import ConnectionPool, PoolTimeout
+
+    pool = ConnectionPool(
+        conninfo,
+        min_size=min_size,
+        max_size=max_size,
+        timeout=settings.DB_POOL_TIMEOUT,
+        max_idle=settings.DB_POOL_MAX_IDLE,
+        max_lifetime=settings.DB_POOL_MAX_LIFETIME,
+        name=name,
+        kwargs=_connect_kwargs(),
+        open=False
+    )
+    pool.open()
+    # Not pool.wait(): that closes the pool on timeout instead of retrying
+    try:
+        with pool.connection(timeout=settings.DB_POOL_OPEN_TIMEOUT):
+            pass
+    except PoolTimeout:
+        logger.warning("database pool %s not ready after %ss; continuing to connect in background",
+                       name, settings.DB_POOL_OPEN_TIMEOUT)
+    return pool
+
+
+def open_pool():
+    """
+    Open the worker's connection pools and wait for ``DB_POOL_MIN_SIZE`` connections
+
+    Called from the app lifespan. If the database is slow to come up (e.g. a
+    Neon compute waking from suspend) the pool keeps connecting in the
+    background and requests wait on it instead of failing at startup. A
+    replica pool is opened as well when ``DATABASE_READ_URL`` is set.
+    """
+    global _pool, _read_pool
+    if _pool is not None or not settings.DATABASE_URL:
+        return
+    _pool = _open(settings.DATABASE_URL, "primary", settings.DB_POOL_MIN_SIZE, settings.DB_POOL_MAX_SIZE)
+    if settings.DATABASE_READ_URL:
+        _read_pool = _open(settings.DATABASE_READ_URL, "replica",
+                           settings.DB_READ_POOL_MIN_SIZE, settings.DB_READ_POOL_MAX_SIZE)
+
+
+def close_pool():
+    """Close the worker's connection pools"""
+    global _pool, _read_pool
+    for pool in (_read_pool, _pool):
+        if pool is not None:
+            pool.close()
+    _pool = _read_pool = None
+
+
+def get_pool():
+    """Return the open connection pool, or None when running without one (scripts)"""
+    return _pool
+
+
+def get_pools() -> list:
+    """Return every open pool (primary first)"""
+    return [pool for pool in (_pool, _read_pool) if pool is not None]
+
+
+def read_only(func):
+    """
+    Mark a service method as read-only so its queries may run on the replica
+
+    Queries still go to the primary when no replica is configured or when the
+    current session has written recently (read-your-writes).
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return wrapper
+
+
+def _use_replica() -> bool:
+    if _read_pool is None or not _read_only.get():
+        return False
+    session = _session.get()
+    return session is None or not (session["pinned"] or session["wrote"])
+
+
+_WRITE_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+
+def _mark_write(query):
+    """Remember that this request wrote, so the session is pinned to the primary"""
+    session = _session.get()
+    if session is None or session["wrote"]:
+        return
+    head = query.lstrip()[:6].upper()
+    if head == "SELECT" or (head.startswith("WITH") and not _WRITE_KEYWORDS.search(query)):
+        return
+    session["wrote"] = True
+
+
+class ReadYourWritesMiddleware:
+    """
+    Keep a session on the primary for a short window after it writes
+
+    A request that wrote gets a short-lived cookie; while it is present, that
+    client's reads skip the replica so it never sees data older than its own
+    last write (e.g. an admin reloading the list after editing a workflow).
+    Pure ASGI so the routing state shares the endpoint's context.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _read_pool is None:
+            await self.app(scope, receive, send)
+            return
+
+        session = {"pinned": self._pinned(scope), "wrote": False}
+        token = _session.set(session)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and session["wrote"]:
+                window = settings.DB_READ_YOUR_WRITES_SECONDS
+                cookie = (f"{READ_YOUR_WRITES_COOKIE}={time() + window:.0f}; Max-Age={window:.0f}; "
+                          "Path=/; HttpOnly; SameSite=Lax")
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _session.reset(token)
+
+    @staticmethod
+    def _pinned(scope) -> bool:
+        for name, value in scope["headers"]:
+            if name != b"cookie":
+                continue
+            for part in value.decode("latin-1").split(";"):
+                key, _, until = part.strip().partition("=")
+                if key == READ_YOUR_WRITES_COOKIE:
+                    try:
+                        return float(until) > time()
+                    except ValueError:
+                        return False
+        return False
+
+
+# One breaker per pool: connection-level failures (unreachable server, pool
+# timeouts, dropped connections) trip it; query errors such as constraint
+# violations, statement timeouts or deadlocks show the server is up and
+# count as successes
+_breakers = {
+    name: CircuitBreaker(f"db_{name}", settings.DB_BREAKER_FAILURE_THRESHOLD, settings.DB_BREAKER_RESET_SECONDS)
+    for name in ("primary", "replica")
+}
+
+# Errors meaning "the database is unavailable" rather than "this query failed"
+DB_UNAVAILABLE = (CircuitOpen, psycopg.OperationalError)
+
+
+# SQLSTATEs outside class 08 that still mean the server went away
+_SERVER_SHUTDOWN_STATES = ("57P01", "57P02", "57P03")
+
+
+def is_connection_error(error: Exception, conn=None) -> bool:
+    """
+    Whether an error means the database could not be reached or the
+    connection was lost, as opposed to this query failing
+
+    Args:
+        error: Exception raised while using a connection
+        conn: The connection, if one was obtained
+    """
+    # PoolTimeout is an OperationalError without a SQLSTATE
+    if not isinstance(error, psycopg.OperationalError):
+        return False
+    if conn is not None and conn.broken:
+        return True
+    sqlstate = error.sqlstate
+    return sqlstate is None or sqlstate.startswith("08") or sqlstate in _SERVER_SHUTDOWN_STATES
+
+
+def get_breaker(replica: bool = False) -> CircuitBreaker:
+    """Return the circuit breaker guarding the primary or replica pool"""
+    return _breakers["replica" if replica and _read_pool is not None else "primary"]
 
 
 @contextmanager
-def get_db_connection():
-    """Get a database connection context manager"""
-    conn = psycopg.connect(settings.DATABASE_URL)
+def get_db_connection(replica: bool = False):
+    """
+    Get a database connection context manager
+
+    Args:
+        replica: Serve from the read replica pool when one is open
+
+    Raises:
+        CircuitOpen: If recent connection failures opened the pool's circuit
+    """
+    breaker = get_breaker(replica)
+    breaker.before_call()
+    conn = None
+    try:
+        with _connection(replica) as conn:
+            yield conn
+    except Exception as e:
+        if is_connection_error(e, conn):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    breaker.record_success()
+
+
+@contextmanager
+def _connection(replica: bool):
+    pool = _read_pool if replica and _read_pool is not None else _pool
+    if pool is not None:
+        # Commits on success, rolls back on error, then returns the connection
+        with pool.connection() as conn:
+            yield conn
+        return
+
+    conn = psycopg.connect(settings.DATABASE_URL, **_connect_kwargs())
     try:
         yield conn
         conn.commit()
@@ -20,6 +350,103 @@ def get_db_connection():
         conn.close()
 
 
+def _explain(cur, query, params):
+    """Log EXPLAIN (ANALYZE, BUFFERS) for a slow read-only query"""
+    # ANALYZE executes the query again: never for writes, including
+    # data-modifying CTEs
+    if not query.lstrip().upper().startswith(("SELECT", "WITH")) or _WRITE_KEYWORDS.search(query):
+        return
+    try:
+        # In a savepoint, so a failing EXPLAIN doesn't abort the caller's transaction
+        with cur.connection.transaction():
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params or ())
+            plan = "\n".join(row[0] if isinstance(row, tuple) else row["QUERY PLAN"] for row in cur.fetchall())
+        logger.warning("plan for slow query %s:\n%s", fingerprint(query), plan)
+    except psycopg.Error as e:
+        logger.warning("could not explain slow query %s: %s", fingerprint(query), e)
+
+
+def _execute(cur, query, params):
+    """Execute on a cursor, preparing registered hot statements server-side"""
+    if not isinstance(query, Statement) or not settings.DB_PREPARE_STATEMENTS:
+        cur.execute(query, params or ())
+        return
+
+    conn = cur.connection
+    with _prepared_lock:
+        prepared = _prepared_on.get(conn)
+        if prepared is None:
+            prepared = _prepared_on[conn] = set()
+    hit = query.name in prepared
+    try:
+        cur.execute(query, params or (), prepare=True)
+    except psycopg.errors.InvalidSqlStatementName:
+        # Server state was reset under us (pooler failover, DISCARD ALL);
+        # drop the connection so the pool replaces it, then retry once
+        prepared.clear()
+        conn.close()
+        raise _StatementLost()
+    prepared.add(query.name)
+    PREPARED_EXECUTIONS.labels(query.name, "hit" if hit else "miss").inc()
+
+
+def prepare_statements(conn):
+    """Prepare every registered hot statement on a connection (startup warm-up)"""
+    with conn.cursor() as cur:
+        for statement in registered_statements():
+            _execute(cur, statement, statement.warmup_params or None)
+            cur.fetchall()
+
+
+def _run_query(query, params, fetch_one, fetch_all, row_factory=None):
+    """Execute a query, recording connect/execute/fetch timings for its fingerprint"""
+    try:
+        return _run_query_once(query, params, fetch_one, fetch_all, row_factory)
+    except _StatementLost:
+        logger.warning("prepared statement %s lost on server; re-preparing", query.name)
+        return _run_query_once(query, params, fetch_one, fetch_all, row_factory)
+
+
+def _run_query_once(query, params, fetch_one, fetch_all, row_factory):
+    connect_time = execute_time = fetch_time = 0.0
+    rows = 0
+    failed = True
+    replica = _use_replica()
+    if not replica:
+        _mark_write(query)
+    start = perf_counter()
+    try:
+        with get_db_connection(replica=replica) as conn:
+            connected = perf_counter()
+            connect_time = connected - start
+            with conn.cursor(row_factory=row_factory) as cur:
+                _execute(cur, query, params)
+                executed = perf_counter()
+                execute_time = executed - connected
+
+                if fetch_one:
+                    result = cur.fetchone()
+                    rows = 1 if result is not None else 0
+                elif fetch_all:
+                    result = cur.fetchall()
+                    rows = len(result)
+                else:
+                    result = None
+                    rows = cur.rowcount
+                fetch_time = perf_counter() - executed
+                failed = False
+
+                DB_QUERIES.labels("replica" if replica else "primary").inc()
+                slow = query_stats.record(query, connect_time, execute_time, fetch_time, rows)
+                if slow and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+                    _explain(cur, query, params)
+
+                return result
+    finally:
+        if failed:
+            query_stats.record(query, connect_time, execute_time, fetch_time, rows, error=True)
+
+
 def execute_query(query, params=None, fetch_one=False, fetch_all=False):
     """
     Execute a database query
@@ -33,16 +460,7 @@ def execute_query(query, params=None, fetch_one=False, fetch_all=False):
     Returns:
         Query result or None
     """
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(query, params or ())
-
-            if fetch_one:
-                return cur.fetchone()
-            elif fetch_all:
-                return cur.fetchall()
-            else:
-                return None
+    return _run_query(query, params, fetch_one, fetch_all)
 
 
 def execute_query_dict(query, params=None, fetch_one=False, fetch_all=False):
@@ -58,13 +476,74 @@ def execute_query_dict(query, params=None, fetch_one=False, fetch_all=False):
     Returns:
         Dictionary or list of dictionaries
     """
-    with get_db_connection() as conn:
-        with conn.cursor(row_factory=psycopg.rows.dict_row) as cur:
-            cur.execute(query, params or ())
+    return _run_query(query, params, fetch_one, fetch_all, row_factory=psycopg.rows.dict_row)
+
+
+def execute_many(query, params_seq):
+    """
+    Execute a write once per parameter set in a single transaction
 
-            if fetch_one:
-                return cur.fetchone()
-            elif fetch_all:
-                return cur.fetchall()
-            else:
-                return None
+    Args:
+        query: SQL statement with %s placeholders
+        params_seq: Sequence of parameter tuples
+
+    Returns:
+        int: Number of parameter sets executed
+    """
+    params_seq = list(params_seq)
+    if not params_seq:
+        return 0
+    _mark_write(query)
+    connect_time = execute_time = 0.0
+    failed = True
+    start = perf_counter()
+    try:
+        with get_db_connection() as conn:
+            connected = perf_counter()
+            connect_time = connected - start
+            with conn.cursor() as cur:
+                # psycopg pipelines the batch: one round trip instead of one per row
+                cur.executemany(query, params_seq)
+            execute_time = perf_counter() - connected
+        failed = False
+    finally:
+        query_stats.record(query, connect_time, execute_time, 0.0, len(params_seq), error=failed)
+        if not failed:
+            DB_QUERIES.labels("primary").inc()
+    return len(params_seq)
+
+
+def copy_rows(table: str, columns: tuple, rows: list) -> int:
+    """
+    Bulk-load rows with COPY ... FROM STDIN
+
+    Args:
+        table: Target table
+        columns: Column names, in row order
+        rows: Row tuples (text-format values; JSON as a serialized string)
+
+    Returns:
+        int: Number of rows copied
+    """
+    if not rows:
+        return 0
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    _mark_write(statement)
+    connect_time = execute_time = 0.0
+    failed = True
+    start = perf_counter()
+    try:
+        with get_db_connection() as conn:
+            connected = perf_counter()
+            connect_time = connected - start
+            with conn.cursor() as cur:
+                with cur.copy(statement) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+            execute_time = perf_counter() - connected
+        failed = False
+    finally:
+        query_stats.record(statement, connect_time, execute_time, 0.0, len(rows), error=failed)
+        if not failed:
+            DB_QUERIES.labels("primary").inc()
+    return len(rows)
@@ -0,0 +1,179 @@
+"""
+Analytics event buffer
+Collects events in memory and bulk-loads them into ``analytics_events`` with
+COPY from a background task, so ingestion never waits on the database.
+"""
+import asyncio
+import json
+import logging
+import random
+from datetime import datetime, timezone
+from time import perf_counter
+
+import psycopg
+
+from app.utils.database import copy_rows
+from app.utils.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger("app.events")
+
+EVENT_COLUMNS = ("event_type", "event_data", "user_id", "session_id", "ip_address", "user_agent", "referrer", "created_at")
+
+# Event types given their own metric label; anything else is counted as "other"
+# so clients can't blow up label cardinality
+TRACKED_EVENT_TYPES = {"page_view", "workflow_view", "checkout_start", "purchase_attempt", "search"}
+
+# Rough per-row overhead of the tuple, datetime and short strings, on top of the payload
+_ROW_OVERHEAD_BYTES = 400
+
+EVENTS_RECEIVED = Counter("events_received_total", "Analytics events received", ("event_type",))
+EVENTS_DROPPED = Counter(
+    "events_dropped_total",
+    "Analytics events not stored, by reason (sampled, oversized, memory_cap, invalid, flush_failed)",
+    ("reason",),
+)
+EVENTS_WRITTEN = Counter("events_written_total", "Analytics events copied into the database")
+EVENTS_BUFFERED_BYTES = Gauge("events_buffer_bytes", "Approximate memory held by buffered events")
+EVENTS_FLUSH_SECONDS = Histogram(
+    "events_flush_seconds",
+    "Time to COPY one batch of analytics events",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+def _copy_isolating(rows: list) -> int:
+    """
+    COPY rows; if the database rejects the data, split the batch in halves
+    and retry so one bad event is dropped on its own
+
+    Returns:
+        int: Rows copied
+
+    Raises:
+        Exception: Any error other than bad data (e.g. the database is down)
+    """
+    try:
+        copy_rows("analytics_events", EVENT_COLUMNS, rows)
+        return len(rows)
+    except psycopg.DataError as e:
+        if len(rows) == 1:
+            logger.warning("dropped an analytics event the database rejects: %s", e)
+            EVENTS_DROPPED.labels("invalid").inc()
+            return 0
+    middle = len(rows) // 2
+    return _copy_isolating(rows[:middle]) + _copy_isolating(rows[middle:])
+
+
+class EventBuffer:
+    """
+    In-memory event buffer flushed with COPY
+
+    ``add`` is O(1) and never blocks: events over the memory cap are dropped
+    and counted. A background task swaps the buffer out every
+    ``flush_interval`` seconds, or as soon as ``flush_size`` events are
+    waiting, and copies the batch in a worker thread.
+
+    Args:
+        max_bytes: Hard cap on buffered payload memory
+        flush_size: Events that trigger an early flush
+        flush_interval: Seconds between flushes
+        max_event_bytes: Largest serialized event_data accepted
+        sample_rates: Event type -> fraction kept, e.g. {"page_view": 0.1}
+    """
+
+    def __init__(self, max_bytes: int, flush_size: int, flush_interval: float,
+                 max_event_bytes: int, sample_rates: dict):
+        self.max_bytes = max_bytes
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_event_bytes = max_event_bytes
+        self.sample_rates = sample_rates
+        self._rows = []
+        self._bytes = 0
+        self._flushing_bytes = 0  # batch being copied still counts against the cap
+        self._wakeup = None
+        self._task = None
+        EVENTS_BUFFERED_BYTES.set_function(lambda: self._bytes + self._flushing_bytes)
+
+    def add(self, event_type: str, event_data, session_id, user_id=None,
+            ip_address=None, user_agent=None, referrer=None) -> bool:
+        """
+        Buffer one event
+
+        Returns:
+            bool: True if the event was kept (not sampled out or dropped)
+        """
+        tracked = event_type in TRACKED_EVENT_TYPES or event_type in self.sample_rates
+        EVENTS_RECEIVED.labels(event_type if tracked else "other").inc()
+        rate = self.sample_rates.get(event_type, 1.0)
+        if rate < 1.0:
+            if random.random() >= rate:
+                EVENTS_DROPPED.labels("sampled").inc()
+                return False
+            # Lets queries re-weight sampled counts
+            event_data = {**(event_data or {}), "_sample_rate": rate}
+
+        payload = json.dumps(event_data) if event_data is not None else None
+        if payload is not None and len(payload) > self.max_event_bytes:
+            EVENTS_DROPPED.labels("oversized").inc()
+            return False
+
+        size = _ROW_OVERHEAD_BYTES + len(payload or "") + len(user_agent or "") + len(referrer or "")
+        if self._bytes + self._flushing_bytes + size > self.max_bytes:
+            EVENTS_DROPPED.labels("memory_cap").inc()
+            return False
+
+        self._rows.append((
+            event_type, payload, user_id, session_id, ip_address,
+            user_agent, referrer, datetime.now(timezone.utc)
+        ))
+        self._bytes += size
+        if len(self._rows) >= self.flush_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    async def start(self):
+        """Start the background flusher"""
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still buffered"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Copy the current buffer into the database"""
+        rows = self._rows
+        if not rows:
+            return 0
+        self._rows, self._flushing_bytes, self._bytes = [], self._bytes, 0
+        start = perf_counter()
+        try:
+            written = await asyncio.to_thread(_copy_isolating, rows)
+        except Exception as e:
+            # Analytics are best-effort: drop the batch rather than hold memory
+            logger.warning("analytics flush of %d event(s) failed: %s", len(rows), e)
+            EVENTS_DROPPED.labels("flush_failed").inc(len(rows))
+            return 0
+        finally:
+            self._flushing_bytes = 0
+        EVENTS_FLUSH_SECONDS.observe(perf_counter() - start)
+        EVENTS_WRITTEN.inc(written)
+        return written
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
@@ -0,0 +1,37 @@
+"""
+Shared outbound HTTP client
+One pooled httpx.AsyncClient per worker, so Paystack calls reuse connections
+instead of paying a TCP + TLS handshake per request.
+"""
+from app.config import settings
+
+_client = None
+
+
+def get_http_client():
+    """
+    Return the worker's shared AsyncClient, creating it on first use
+
+    httpx is imported here rather than at module import: it is one of the
+    heaviest imports in the app and only the payment paths need it.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        import httpx
+
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.HTTP_CLIENT_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS
+            )
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client; called from the app lifespan on shutdown"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
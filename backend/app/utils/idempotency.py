@@ -0,0 +1,225 @@
+"""
+Idempotency keys
+Replays the stored response for a repeated ``Idempotency-Key`` and makes
+concurrent duplicates wait for the first call instead of repeating it.
+
+Completed responses live in a bounded in-memory TTL cache per worker and in the
+``idempotency_keys`` table, which also acts as the cross-worker claim: the
+first worker to insert a key runs the call, the others poll the row.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import random
+from collections import OrderedDict
+from time import monotonic
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.utils.database import execute_query, execute_query_dict
+
+logger = logging.getLogger("app.idempotency")
+
+MAX_KEY_LENGTH = 255
+
+# Claim the key if it is new or its previous use (or claim) has expired. A
+# claim only holds for a short lease, so a worker that dies mid-call does not
+# block the key; storing the response extends it to the full TTL. The claim's
+# created_at is its token: completing or releasing only touches the row while
+# it still belongs to that claim, never one a retry took over after the lease.
+_CLAIM = """
+    INSERT INTO idempotency_keys (key, request_hash, expires_at)
+    VALUES (%s, %s, NOW() + make_interval(secs => %s))
+    ON CONFLICT (key) DO UPDATE
+        SET request_hash = EXCLUDED.request_hash, response = NULL,
+            created_at = NOW(), expires_at = EXCLUDED.expires_at
+        WHERE idempotency_keys.expires_at < NOW()
+    RETURNING created_at
+"""
+_LOOKUP = "SELECT request_hash, response FROM idempotency_keys WHERE key = %s AND expires_at >= NOW()"
+_COMPLETE = """
+    UPDATE idempotency_keys
+    SET response = %s::jsonb, expires_at = NOW() + make_interval(secs => %s)
+    WHERE key = %s AND created_at = %s AND response IS NULL
+    RETURNING key
+"""
+_RELEASE = "DELETE FROM idempotency_keys WHERE key = %s AND created_at = %s AND response IS NULL"
+_PURGE = "DELETE FROM idempotency_keys WHERE expires_at < NOW()"
+
+
+def request_fingerprint(payload) -> str:
+    """Stable hash of a request body, to detect a key reused for a different request"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Bounded TTL cache of completed responses plus in-flight calls
+
+    Args:
+        ttl: Seconds a key (and its response) is remembered
+        max_entries: Completed responses kept in memory per worker
+        wait_timeout: Seconds a duplicate waits for the first call to finish
+        lease: Seconds a database claim holds while the call runs; longer than
+            the call can take, so a slow call is not claimed twice
+    """
+
+    def __init__(self, ttl: float, max_entries: int, wait_timeout: float, lease: float):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self.lease = lease
+        self._completed = OrderedDict()  # key -> (expires_at, request_hash, response)
+        self._in_flight = {}  # key -> (request_hash, future)
+
+    def _get_completed(self, key: str):
+        entry = self._completed.get(key)
+        if entry is None:
+            return None
+        if entry[0] < monotonic():
+            del self._completed[key]
+            return None
+        self._completed.move_to_end(key)
+        return entry
+
+    def _remember(self, key: str, request_hash: str, response: dict):
+        self._completed[key] = (monotonic() + self.ttl, request_hash, response)
+        self._completed.move_to_end(key)
+        while len(self._completed) > self.max_entries:
+            self._completed.popitem(last=False)
+
+    @staticmethod
+    def _check_hash(stored: str, request_hash: str):
+        if stored != request_hash:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request"
+            )
+
+    async def run(self, scope: str, key: str, payload, call) -> tuple:
+        """
+        Run ``call`` at most once per key
+
+        Args:
+            scope: Endpoint namespace, so keys from different endpoints never collide
+            key: Client-supplied Idempotency-Key
+            payload: Request body, fingerprinted to reject key reuse
+            call: Coroutine function returning a JSON-serialisable dict
+
+        Returns:
+            tuple: (response, replayed)
+
+        Raises:
+            HTTPException: 400 for a malformed key, 409 if the first call is
+                still running after ``wait_timeout``, 422 for key reuse with a
+                different body, or whatever ``call`` raised
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail="Invalid Idempotency-Key")
+        key = f"{scope}:{key}"
+        request_hash = request_fingerprint(payload)
+
+        completed = self._get_completed(key)
+        if completed is not None:
+            self._check_hash(completed[1], request_hash)
+            return completed[2], True
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self._check_hash(in_flight[0], request_hash)
+            return await self._wait(in_flight[1]), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (request_hash, future)
+        try:
+            response, replayed = await self._run_claimed(key, request_hash, call)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody is waiting
+            raise
+        finally:
+            del self._in_flight[key]
+        future.set_result(response)
+        self._remember(key, request_hash, response)
+        return response, replayed
+
+    async def _wait(self, future):
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.wait_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+
+    async def _run_claimed(self, key: str, request_hash: str, call) -> tuple:
+        claimed, token = await self._claim(key, request_hash)
+        if not claimed:
+            return await self._wait_for_other_worker(key, request_hash), True
+        try:
+            response = await call()
+        except BaseException:
+            await self._release(key, token)
+            raise
+        await self._persist(key, token, response)
+        return response, False
+
+    async def _claim(self, key: str, request_hash: str) -> tuple:
+        """Returns (claimed, token); the token is None when no row was written"""
+        if not settings.DATABASE_URL:
+            return True, None
+        try:
+            if random.random() < 0.01:
+                await asyncio.to_thread(execute_query, _PURGE)
+            row = await asyncio.to_thread(execute_query, _CLAIM, (key, request_hash, self.lease), True)
+            return row is not None, row[0] if row else None
+        except Exception as e:
+            # Without the table this worker still deduplicates its own requests
+            logger.warning("idempotency claim failed, continuing in-memory only: %s", e)
+            return True, None
+
+    async def _wait_for_other_worker(self, key: str, request_hash: str) -> dict:
+        deadline = monotonic() + self.wait_timeout
+        delay = 0.05
+        while monotonic() < deadline:
+            row = await asyncio.to_thread(execute_query_dict, _LOOKUP, (key,), True)
+            if row is None:
+                # The other worker failed and released the key (or died and its
+                # claim lapsed); let the client retry
+                raise HTTPException(status_code=409, detail="The original request with this Idempotency-Key failed; retry")
+            self._check_hash(row["request_hash"], request_hash)
+            if row["response"] is not None:
+                return row["response"]
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+
+    async def _persist(self, key: str, token, response: dict):
+        if token is None:
+            return
+        try:
+            stored = await asyncio.to_thread(
+                execute_query, _COMPLETE, (json.dumps(response, default=str), self.ttl, key, token), True
+            )
+            if not stored:
+                logger.warning("idempotency claim lapsed before the response was stored", extra={"key": key})
+        except Exception as e:
+            logger.warning("could not persist idempotent response: %s", e)
+
+    async def _release(self, key: str, token):
+        if token is None:
+            return
+        try:
+            await asyncio.to_thread(execute_query, _RELEASE, (key, token))
+        except Exception as e:
+            logger.warning("could not release idempotency key: %s", e)
+
+
+idempotency_store = IdempotencyStore(
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+    wait_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT,
+    lease=settings.IDEMPOTENCY_CLAIM_LEASE
+)
@@ -0,0 +1,361 @@
+"""
+Outbound email
+A bounded queue drained by background workers, each sending over a pooled,
+persistent SMTP connection. Callers only enqueue, so mail is never sent on
+the request path; transient failures are retried with backoff, and admin
+alerts are batched into periodic digests.
+"""
+import asyncio
+import logging
+import queue
+import random
+import smtplib
+import ssl
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from time import monotonic, perf_counter
+
+from app.utils.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger("app.email")
+
+EMAIL_QUEUE_DEPTH = Gauge("email_queue_depth", "Emails waiting to be sent")
+EMAILS = Counter(
+    "emails_total",
+    "Outbound emails by kind and outcome (sent, retried, failed, dropped)",
+    ("kind", "outcome"),
+)
+EMAIL_SEND_SECONDS = Histogram(
+    "email_send_seconds",
+    "Time to hand one email to the SMTP server",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+SMTP_CONNECTIONS = Counter("smtp_connections_opened_total", "SMTP connections opened (reuse keeps this low)")
+
+
+class OutboundEmail:
+    """One queued email"""
+
+    __slots__ = ("to", "subject", "body", "kind", "attempts")
+
+    def __init__(self, to: str, subject: str, body: str, kind: str):
+        self.to = to
+        self.subject = subject
+        self.body = body
+        self.kind = kind
+        self.attempts = 0
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed send is worth retrying"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    # Disconnects, refused connections and timeouts
+    return isinstance(error, (smtplib.SMTPServerDisconnected, OSError))
+
+
+class SMTPPool:
+    """
+    Persistent SMTP connections, safe to share between threads
+
+    Connections are opened on demand and returned after each send, so the
+    number open never exceeds the number of concurrent senders. One idle for
+    longer than ``max_idle`` is reopened, since servers drop idle clients.
+
+    Args:
+        host: SMTP server
+        port: SMTP port
+        user: Login (empty for no AUTH)
+        password: Password
+        security: "starttls", "ssl" or "none"
+        timeout: Socket timeout in seconds
+        max_idle: Seconds a connection may sit unused and still be reused
+    """
+
+    def __init__(self, host: str, port: int, user: str, password: str, security: str,
+                 timeout: float, max_idle: float):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.security = security
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle = queue.LifoQueue()  # (connection, returned_at)
+
+    def send(self, message: EmailMessage):
+        """
+        Send one message, reusing an idle connection when possible
+
+        Raises:
+            smtplib.SMTPException, OSError: If the send failed
+        """
+        conn, reused = self._checkout()
+        try:
+            conn.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            _quit(conn)
+            if not reused:
+                raise
+            # The server dropped a pooled connection; one retry on a fresh one
+            conn = self._open()
+            try:
+                conn.send_message(message)
+            except Exception as e:
+                self._release(conn, e)
+                raise
+        except Exception as e:
+            self._release(conn, e)
+            raise
+        self._checkin(conn)
+
+    def close(self):
+        """Close every idle connection; later sends open new ones"""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _quit(conn)
+
+    def _checkout(self):
+        while True:
+            try:
+                conn, returned_at = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open(), False
+            if monotonic() - returned_at <= self.max_idle:
+                return conn, True
+            _quit(conn)
+
+    def _checkin(self, conn):
+        self._idle.put((conn, monotonic()))
+
+    def _release(self, conn, error: Exception):
+        """Keep a connection after a refused message, drop it after anything else"""
+        if isinstance(error, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+            try:
+                conn.rset()
+            except Exception:
+                _quit(conn)
+                return
+            self._checkin(conn)
+        else:
+            _quit(conn)
+
+    def _open(self):
+        if self.security == "ssl":
+            conn = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.security == "starttls":
+                conn.starttls(context=ssl.create_default_context())
+        try:
+            if self.user:
+                conn.login(self.user, self.password)
+        except Exception:
+            _quit(conn)
+            raise
+        SMTP_CONNECTIONS.inc()
+        return conn
+
+
+def _quit(conn):
+    try:
+        conn.quit()
+    except Exception:
+        conn.close()
+
+
+class EmailQueue:
+    """
+    Bounded send queue drained by ``workers`` background tasks
+
+    ``submit`` and ``notify_admin`` never block, never raise and may be called
+    from worker threads (e.g. a service method run with ``asyncio.to_thread``).
+    A message that fails transiently is re-queued after an exponential,
+    jittered backoff without holding up its worker; permanent failures and
+    exhausted retries are logged and counted, never raised.
+
+    Args:
+        pool: SMTP connections to send over
+        sender: From address
+        workers: Concurrent senders (and so the most connections open)
+        maxsize: Queued messages before new ones are dropped
+        max_attempts: Sends tried per message
+        base_delay: Backoff before the first retry, in seconds
+        max_delay: Longest backoff, in seconds
+        admin_email: Recipient of admin digests (empty to skip them)
+        digest_interval: Seconds between admin digests
+        digest_max_items: Alerts that trigger a digest before the interval ends
+    """
+
+    def __init__(self, pool: SMTPPool, sender: str, workers: int, maxsize: int, max_attempts: int,
+                 base_delay: float, max_delay: float, admin_email: str, digest_interval: float,
+                 digest_max_items: int):
+        self.pool = pool
+        self.sender = sender
+        self.workers = workers
+        self.maxsize = maxsize
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.admin_email = admin_email
+        self.digest_interval = digest_interval
+        self.digest_max_items = digest_max_items
+        self._queue = None
+        self._loop = None
+        self._tasks = []
+        self._retries = set()  # call_later handles of scheduled retries
+        self._digest = []
+        self._digest_due = None
+        self._accepting = False
+        EMAIL_QUEUE_DEPTH.set_function(self.depth)
+
+    def depth(self) -> int:
+        """Emails waiting to be sent, including scheduled retries"""
+        return (self._queue.qsize() if self._queue is not None else 0) + len(self._retries)
+
+    def submit(self, to: str, subject: str, body: str, kind: str):
+        """
+        Queue an email (dropped, and counted, if the queue is full or stopped)
+
+        Args:
+            to: Recipient address
+            subject: Subject line
+            body: Plain-text body
+            kind: Label for metrics and logs (e.g. "receipt")
+        """
+        self._on_loop(self._enqueue, OutboundEmail(to, subject, body, kind))
+
+    def notify_admin(self, line: str):
+        """Add one line to the next admin digest"""
+        self._on_loop(self._add_to_digest, line)
+
+    async def start(self):
+        """Create the queue and start the workers and the digest timer"""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._accepting = True
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._digest_due = asyncio.Event()
+        self._tasks.append(asyncio.create_task(self._digest_timer()))
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Stop accepting mail, send the pending digest and drain the queue
+
+        Retries still waiting for their backoff, and whatever is queued when
+        ``timeout`` expires, are dropped with a warning.
+        """
+        if not self._tasks:
+            return
+        self._accepting = False
+        self._flush_digest()
+        for handle in self._retries:
+            handle.cancel()
+        if self._retries:
+            logger.warning("dropping %d email(s) waiting to be retried", len(self._retries))
+        self._retries.clear()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("email drain timed out with %d message(s) queued", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.to_thread(self.pool.close)
+
+    def _on_loop(self, callback, *args):
+        """Run ``callback`` on the queue's event loop, from any thread"""
+        loop = self._loop
+        if loop is None or not self._accepting:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            callback(*args)
+        else:
+            loop.call_soon_threadsafe(callback, *args)
+
+    def _enqueue(self, email: OutboundEmail):
+        try:
+            self._queue.put_nowait(email)
+        except asyncio.QueueFull:
+            EMAILS.labels(email.kind, "dropped").inc()
+            logger.warning("email queue full, dropping message", extra={"kind": email.kind})
+
+    def _add_to_digest(self, line: str):
+        if not self.admin_email:
+            return
+        self._digest.append(line)
+        if len(self._digest) >= self.digest_max_items:
+            self._digest_due.set()
+
+    def _flush_digest(self):
+        if not self._digest:
+            return
+        lines, self._digest = self._digest, []
+        subject = f"[VexaAI] {len(lines)} new admin notification{'s' if len(lines) != 1 else ''}"
+        self._enqueue(OutboundEmail(self.admin_email, subject, "\n".join(f"- {line}" for line in lines), "admin_digest"))
+
+    async def _digest_timer(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._digest_due.wait(), self.digest_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._digest_due.clear()
+            self._flush_digest()
+
+    async def _worker(self):
+        while True:
+            email = await self._queue.get()
+            try:
+                await self._send(email)
+            finally:
+                self._queue.task_done()
+
+    async def _send(self, email: OutboundEmail):
+        email.attempts += 1
+        start = perf_counter()
+        try:
+            await asyncio.to_thread(self.pool.send, self._build(email))
+        except Exception as e:
+            if is_transient(e) and email.attempts < self.max_attempts and self._accepting:
+                delay = min(self.max_delay, self.base_delay * 2 ** (email.attempts - 1)) * random.uniform(0.5, 1.0)
+                EMAILS.labels(email.kind, "retried").inc()
+                logger.warning("email send failed, retrying in %.0fs", delay,
+                               extra={"kind": email.kind, "attempt": email.attempts, "error": str(e)})
+                self._schedule_retry(email, delay)
+            else:
+                EMAILS.labels(email.kind, "failed").inc()
+                logger.error("email send failed", extra={"kind": email.kind, "attempt": email.attempts, "error": str(e)})
+            return
+        EMAIL_SEND_SECONDS.observe(perf_counter() - start)
+        EMAILS.labels(email.kind, "sent").inc()
+
+    def _schedule_retry(self, email: OutboundEmail, delay: float):
+        def retry():
+            self._retries.discard(handle)
+            self._enqueue(email)
+
+        handle = self._loop.call_later(delay, retry)
+        self._retries.add(handle)
+
+    def _build(self, email: OutboundEmail) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = email.to
+        message["Subject"] = email.subject
+        message["Date"] = formatdate(localtime=False)
+        message["Message-ID"] = make_msgid(domain=self.sender.rpartition("@")[2].strip("> ") or None)
+        message.set_content(email.body)
+        return message
@@ -0,0 +1,142 @@
+"""
+Schema migrations
+Applies the numbered SQL files in database/migrations/ in order and records
+each one in ``schema_migrations``, so every environment can tell exactly
+which schema it has.
+
+Files are named ``NNNN_description.sql``. Each runs in its own transaction,
+unless its first line is ``-- migrate: no-transaction`` (needed for
+CREATE INDEX CONCURRENTLY); such files run one statement at a time and must
+end every statement with ``;`` at the end of a line.
+"""
+import hashlib
+import logging
+import re
+from pathlib import Path
+from time import perf_counter
+from typing import Optional
+
+logger = logging.getLogger("app.migrations")
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[3] / "database" / "migrations"
+NO_TRANSACTION = "-- migrate: no-transaction"
+_FILE_NAME = re.compile(r"^(\d{4})_([a-z0-9_]+)\.sql$")
+# Any fixed number works; it only has to be the same for every runner
+_LOCK_ID = 745_201_337
+
+_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(10) PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        execution_ms INT NOT NULL,
+        applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    )
+"""
+
+
+class Migration:
+    """One migration file"""
+
+    def __init__(self, path: Path):
+        match = _FILE_NAME.match(path.name)
+        if not match:
+            raise ValueError(f"{path.name} is not named NNNN_description.sql")
+        self.version, self.name = match.groups()
+        self.path = path
+        self.sql = path.read_text(encoding="utf-8")
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+        self.transactional = not self.sql.startswith(NO_TRANSACTION)
+
+    def statements(self) -> list:
+        """Split a no-transaction file into its statements"""
+        body = "\n".join(line for line in self.sql.splitlines() if not line.lstrip().startswith("--"))
+        return [statement.strip() for statement in re.split(r";\s*$", body, flags=re.MULTILINE) if statement.strip()]
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> list:
+    """
+    Load every migration file, in version order
+
+    Raises:
+        ValueError: If a file is misnamed or two files share a version
+    """
+    migrations = sorted((Migration(path) for path in directory.glob("*.sql")), key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    duplicates = {v for v in versions if versions.count(v) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate migration versions: {', '.join(sorted(duplicates))}")
+    return migrations
+
+
+def applied_versions(conn) -> dict:
+    """Return version -> checksum for every recorded migration"""
+    conn.execute(_CREATE_TABLE)
+    return dict(conn.execute("SELECT version, checksum FROM schema_migrations").fetchall())
+
+
+def status(conn, directory: Path = MIGRATIONS_DIR) -> list:
+    """
+    Compare the migration files with what the database has recorded
+
+    Returns:
+        list: (migration, state) with state "applied", "pending" or
+        "changed" (applied, but the file was edited afterwards)
+    """
+    applied = applied_versions(conn)
+    result = []
+    for migration in discover(directory):
+        if migration.version not in applied:
+            state = "pending"
+        elif applied[migration.version] != migration.checksum:
+            state = "changed"
+        else:
+            state = "applied"
+        result.append((migration, state))
+    return result
+
+
+def migrate(conn, target: Optional[str] = None, directory: Path = MIGRATIONS_DIR) -> list:
+    """
+    Apply pending migrations up to and including ``target``
+
+    Args:
+        conn: psycopg connection in autocommit mode
+        target: Last version to apply (default: all)
+        directory: Migration directory
+
+    Returns:
+        list: Migrations applied by this call
+    """
+    conn.execute("SELECT pg_advisory_lock(%s)", (_LOCK_ID,))
+    try:
+        done = []
+        for migration, state in status(conn, directory):
+            if target is not None and migration.version > target:
+                break
+            if state == "changed":
+                logger.warning("migration %s_%s was edited after it was applied", migration.version, migration.name)
+            if state != "pending":
+                continue
+            start = perf_counter()
+            if migration.transactional:
+                with conn.transaction():
+                    conn.execute(migration.sql)
+                    _record(conn, migration, start)
+            else:
+                for statement in migration.statements():
+                    conn.execute(statement)
+                _record(conn, migration, start)
+            logger.info("applied migration %s_%s in %.0fms", migration.version, migration.name,
+                        (perf_counter() - start) * 1000)
+            done.append(migration)
+        return done
+    finally:
+        conn.execute("SELECT pg_advisory_unlock(%s)", (_LOCK_ID,))
+
+
+def _record(conn, migration: Migration, start: float):
+    conn.execute(
+        "INSERT INTO schema_migrations (version, name, checksum, execution_ms) VALUES (%s, %s, %s, %s)",
+        (migration.version, migration.name, migration.checksum, int((perf_counter() - start) * 1000))
+    )
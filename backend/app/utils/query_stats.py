@@ -0,0 +1,165 @@
+"""
+Database query statistics
+Per-fingerprint timing (connect/execute/fetch), row counts and the slow-query log
+"""
+import logging
+import re
+import sys
+import threading
+from functools import lru_cache
+from app.config import settings
+
+logger = logging.getLogger("app.db.slow_query")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+# Frames from these modules are skipped when attributing a query to its caller
+_INTERNAL_MODULES = ("app.utils.database", "app.utils.query_stats", "contextlib")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(query: str) -> str:
+    """
+    Normalize a query so calls differing only in literals or whitespace group together
+
+    Args:
+        query: SQL query string
+
+    Returns:
+        Normalized SQL with literals replaced by ``?``
+    """
+    normalized = _STRING_LITERAL.sub("?", query)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def calling_method() -> str:
+    """Return ``module:Qualified.name`` of the first caller outside the DB layer"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_INTERNAL_MODULES):
+            return f"{module}:{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class _Timing:
+    __slots__ = ("total", "max")
+
+    def __init__(self):
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def to_dict(self, calls: int) -> dict:
+        return {
+            "total_ms": round(self.total * 1000, 3),
+            "avg_ms": round(self.total * 1000 / calls, 3) if calls else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class _QueryRecord:
+    __slots__ = ("calls", "errors", "slow", "rows", "connect", "execute", "fetch", "callers")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.slow = 0
+        self.rows = 0
+        self.connect = _Timing()
+        self.execute = _Timing()
+        self.fetch = _Timing()
+        self.callers = set()
+
+
+class QueryStats:
+    """Thread-safe in-process aggregation of query timings"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = {}
+
+    def record(self, query: str, connect: float, execute: float, fetch: float,
+               rows: int, error: bool = False) -> bool:
+        """
+        Record one query execution
+
+        Args:
+            query: SQL query string as passed to the driver
+            connect: Seconds spent acquiring the connection
+            execute: Seconds spent in ``cursor.execute``
+            fetch: Seconds spent fetching rows
+            rows: Number of rows fetched or affected
+            error: Whether the query raised
+
+        Returns:
+            bool: True if the query crossed the slow-query threshold
+        """
+        key = fingerprint(query)
+        total = connect + execute + fetch
+        is_slow = total * 1000 >= settings.SLOW_QUERY_MS
+        caller = calling_method() if is_slow else None
+
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                record = self._records[key] = _QueryRecord()
+            record.calls += 1
+            record.rows += max(rows, 0)
+            record.connect.add(connect)
+            record.execute.add(execute)
+            record.fetch.add(fetch)
+            if error:
+                record.errors += 1
+            if is_slow:
+                record.slow += 1
+                # Bounded: only a handful of service methods share a query
+                if len(record.callers) < 16:
+                    record.callers.add(caller)
+
+        if is_slow:
+            logger.warning(
+                "slow query %.1fms (connect=%.1fms execute=%.1fms fetch=%.1fms rows=%d) in %s: %s",
+                total * 1000, connect * 1000, execute * 1000, fetch * 1000, rows, caller, key
+            )
+        return is_slow
+
+    def snapshot(self) -> list:
+        """Return per-fingerprint statistics, most expensive first"""
+        with self._lock:
+            items = list(self._records.items())
+
+        stats = []
+        for key, record in items:
+            total = record.connect.total + record.execute.total + record.fetch.total
+            stats.append({
+                "query": key,
+                "calls": record.calls,
+                "errors": record.errors,
+                "slow": record.slow,
+                "rows": record.rows,
+                "avg_rows": round(record.rows / record.calls, 2) if record.calls else 0.0,
+                "total_ms": round(total * 1000, 3),
+                "connect": record.connect.to_dict(record.calls),
+                "execute": record.execute.to_dict(record.calls),
+                "fetch": record.fetch.to_dict(record.calls),
+                "slow_callers": sorted(record.callers),
+            })
+        stats.sort(key=lambda item: item["total_ms"], reverse=True)
+        return stats
+
+    def reset(self):
+        """Clear all collected statistics"""
+        with self._lock:
+            self._records.clear()
+
+
+query_stats = QueryStats()
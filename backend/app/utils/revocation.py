@@ -0,0 +1,198 @@
+"""
+Access token revocation
+Tokens carry a ``jti`` claim; logging out records it in ``revoked_tokens``.
+
+Each worker holds the unexpired revoked jtis in memory, fronted by a Bloom
+filter, so checking a token is a few bit probes (plus one dict lookup on a
+hit) and never a database query. A background task pulls rows revoked by
+other workers every ``TOKEN_REVOCATION_SYNC_INTERVAL`` seconds and drops
+entries whose tokens have expired, which keeps memory bounded by the tokens
+revoked within one token lifetime.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import random
+import threading
+from datetime import datetime, timezone
+from time import time
+
+from app.config import settings
+from app.utils.database import execute_query, execute_query_dict
+from app.utils.metrics import Counter, Gauge
+
+logger = logging.getLogger("app.revocation")
+
+REVOKED_TOKENS = Gauge("revoked_tokens", "Unexpired revoked tokens held in memory")
+REVOCATION_CHECKS = Counter(
+    "token_revocation_checks_total",
+    "Token revocation checks, by result (clear, bloom_false_positive, revoked)",
+    ("result",),
+)
+
+_INSERT = """
+    INSERT INTO revoked_tokens (jti, user_id, expires_at)
+    VALUES (%s, %s, %s)
+    ON CONFLICT (jti) DO NOTHING
+"""
+# Re-read a margin before the watermark: revoked_at is the inserting
+# transaction's start time, so a slow commit can land behind rows already seen
+_SYNC = """
+    SELECT jti, expires_at, revoked_at FROM revoked_tokens
+    WHERE expires_at > NOW() AND revoked_at > %s - make_interval(secs => %s)
+    ORDER BY revoked_at
+"""
+_SYNC_OVERLAP_SECONDS = 60
+_PURGE = "DELETE FROM revoked_tokens WHERE expires_at < NOW()"
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings
+
+    Answers "definitely not present" or "maybe present"; items cannot be
+    removed, so shrinking means building a new filter.
+
+    Args:
+        capacity: Items the filter is sized for
+        error_rate: False positive rate at that capacity
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.size = max(64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """
+    Revoked jtis with their expiry, fronted by a Bloom filter
+
+    Args:
+        capacity: Initial Bloom filter capacity; the filter is rebuilt at
+            twice the size whenever the list outgrows it
+        error_rate: Bloom filter false positive rate
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # (bloom, jti -> exp) swapped as one reference so readers never see a mix
+        self._state = (BloomFilter(capacity, error_rate), {})
+        self._lock = threading.Lock()
+        self._watermark = _EPOCH
+        REVOKED_TOKENS.set_function(lambda: len(self._state[1]))
+
+    def __len__(self) -> int:
+        return len(self._state[1])
+
+    def is_revoked(self, jti: str) -> bool:
+        """Check a jti without touching the database"""
+        bloom, expires = self._state
+        if jti not in bloom:
+            REVOCATION_CHECKS.labels("clear").inc()
+            return False
+        if jti in expires:
+            REVOCATION_CHECKS.labels("revoked").inc()
+            return True
+        REVOCATION_CHECKS.labels("bloom_false_positive").inc()
+        return False
+
+    def add(self, jti: str, expires_at: float):
+        """Remember a revoked jti until ``expires_at`` (epoch seconds)"""
+        with self._lock:
+            bloom, expires = self._state
+            if jti in expires:
+                return
+            if len(expires) >= bloom.capacity:
+                bloom, expires = self._rebuild(expires, max(bloom.capacity * 2, len(expires) * 2))
+            expires[jti] = expires_at
+            bloom.add(jti)
+            self._state = (bloom, expires)
+
+    def prune(self, now: float = None) -> int:
+        """
+        Drop jtis whose tokens have expired
+
+        Returns:
+            int: Entries removed
+        """
+        now = time() if now is None else now
+        with self._lock:
+            bloom, expires = self._state
+            live = {jti: exp for jti, exp in expires.items() if exp > now}
+            removed = len(expires) - len(live)
+            if removed:
+                self._state = self._rebuild(live, max(self.capacity, len(live) * 2))
+            return removed
+
+    def _rebuild(self, expires: dict, capacity: int) -> tuple:
+        bloom = BloomFilter(capacity, self.error_rate)
+        for jti in expires:
+            bloom.add(jti)
+        return bloom, dict(expires)
+
+    def revoke(self, jti: str, user_id: str, expires_at: float):
+        """
+        Revoke a token in this worker and record it for the others
+
+        Args:
+            jti: Token ID claim
+            user_id: Owner of the token
+            expires_at: Token expiry (epoch seconds)
+        """
+        self.add(jti, expires_at)
+        if settings.DATABASE_URL:
+            execute_query(_INSERT, (jti, user_id, datetime.fromtimestamp(expires_at, tz=timezone.utc)))
+
+    def sync(self) -> int:
+        """
+        Pull tokens revoked since the last sync (all unexpired ones on the first)
+
+        Returns:
+            int: Rows read
+        """
+        rows = execute_query_dict(_SYNC, (self._watermark, _SYNC_OVERLAP_SECONDS), fetch_all=True) or []
+        for row in rows:
+            self.add(row["jti"], row["expires_at"].timestamp())
+            if row["revoked_at"] > self._watermark:
+                self._watermark = row["revoked_at"]
+        return len(rows)
+
+    async def run_forever(self, interval: float):
+        """Sync and prune every ``interval`` seconds until cancelled"""
+        while True:
+            try:
+                await asyncio.to_thread(self.sync)
+                if random.random() < 0.01:
+                    await asyncio.to_thread(execute_query, _PURGE)
+            except Exception as e:
+                logger.warning("revocation sync failed: %s", e)
+            removed = self.prune()
+            if removed:
+                logger.info("pruned expired revocations", extra={"removed": removed, "remaining": len(self)})
+            await asyncio.sleep(interval)
+
+
+revocation_list = RevocationList(
+    capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE
+)
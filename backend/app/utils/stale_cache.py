@@ -0,0 +1,106 @@
+"""
+Last-known-good cache for public read endpoints
+Every successful read is remembered; while the database is unavailable the
+remembered value is served instead, and a background task refreshes it as
+soon as the database answers again.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from time import monotonic
+from app.utils.database import DB_UNAVAILABLE, get_breaker
+from app.utils.metrics import Counter
+
+logger = logging.getLogger("app.stale_cache")
+
+STALE_RESPONSES = Counter(
+    "stale_responses_total",
+    "Responses served from last-known-good data while the database was unavailable",
+    ("cache",),
+)
+
+
+class StaleCache:
+    """
+    Read-through cache that only answers when the source is down
+
+    Args:
+        name: Label used in metrics and logs
+        max_entries: Keys kept (least recently used are evicted)
+        max_age: Oldest data that may still be served, in seconds
+    """
+
+    def __init__(self, name: str, max_entries: int, max_age: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._refreshing = {}  # key -> background refresh task
+
+    async def fetch(self, key, loader, *args):
+        """
+        Load a value, falling back to the last good one if the DB is down
+
+        Args:
+            key: Cache key
+            loader: Blocking function that reads the value (run in a thread)
+            *args: Arguments for ``loader``
+
+        Returns:
+            tuple: (value, age) where age is None for fresh data, else the
+            seconds since the stale value was loaded
+
+        Raises:
+            Exception: Whatever ``loader`` raised, if there is no usable
+                stale value or the error is not an outage
+        """
+        try:
+            value = await asyncio.to_thread(loader, *args)
+        except DB_UNAVAILABLE as e:
+            entry = self._entries.get(key)
+            if entry is None or monotonic() - entry[1] > self.max_age:
+                raise
+            self._entries.move_to_end(key)
+            STALE_RESPONSES.labels(self.name).inc()
+            self._schedule_refresh(key, loader, args, e)
+            return entry[0], monotonic() - entry[1]
+        self.store(key, value)
+        return value, None
+
+    def store(self, key, value):
+        """Remember a known-good value"""
+        self._entries[key] = (value, monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _schedule_refresh(self, key, loader, args, error: Exception):
+        if key in self._refreshing:
+            return
+        logger.warning("serving stale data", extra={"cache": self.name, "key": str(key), "error": str(error)})
+        task = self._refreshing[key] = asyncio.create_task(self._refresh(key, loader, args))
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key, loader, args):
+        """Retry the load until the database answers or the value expires"""
+        breaker = get_breaker(replica=True)
+        while key in self._entries and monotonic() - self._entries[key][1] <= self.max_age:
+            # Wake up when the breaker will allow its trial call
+            await asyncio.sleep(max(breaker.retry_after(), 1.0))
+            try:
+                value = await asyncio.to_thread(loader, *args)
+            except DB_UNAVAILABLE:
+                continue
+            except Exception as e:
+                logger.warning("stale cache refresh failed", extra={"cache": self.name, "error": str(e)})
+                return
+            self.store(key, value)
+            logger.info("stale cache refreshed", extra={"cache": self.name, "key": str(key)})
+            return
+
+
+def stale_headers(age) -> dict:
+    """Headers marking a response as served from last-known-good data"""
+    if age is None:
+        return {}
+    return {"Age": str(int(age)), "X-Cache-Status": "stale"}
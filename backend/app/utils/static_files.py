@@ -0,0 +1,45 @@
+"""
+Static file serving with precompressed variants
+"""
+import re
+from mimetypes import guess_type
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+# Content-addressed names such as catalog.3f2a9c01b7de.json never change
+_VERSIONED_NAME = re.compile(r"\.[0-9a-f]{12}\.[a-z]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves ``<file>.gz`` when it exists and the client
+    accepts gzip, so compressed files cost no CPU per request
+
+    Versioned (content-hashed) file names are marked immutable; everything
+    else keeps the default ETag/Last-Modified revalidation.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = None
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if "gzip" in accept_encoding and not path.endswith(".gz"):
+            try:
+                response = await super().get_response(path + ".gz", scope)
+            except HTTPException:
+                response = None
+            else:
+                response.headers["content-encoding"] = "gzip"
+                media_type = guess_type(path)[0]
+                if media_type and response.status_code == 200:
+                    response.headers["content-type"] = media_type
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        response.headers["vary"] = "Accept-Encoding"
+        if _VERSIONED_NAME.search(path):
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        return response
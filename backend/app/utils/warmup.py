@@ -0,0 +1,106 @@
+"""
+Startup warm-up
+Pays one-off first-use costs during the lifespan instead of on the first requests:
+DB connections and prepared hot statements, the bcrypt backend, the outbound HTTP client,
+FastAPI route/schema setup and the landing page / static catalog export.
+"""
+import asyncio
+import logging
+from contextlib import ExitStack
+from time import perf_counter
+
+from app.config import settings
+from app.utils.database import get_pools, prepare_statements
+
+logger = logging.getLogger("app.warmup")
+
+
+def warm_database():
+    """Prepare the registered hot statements on every pre-opened pooled connection"""
+    for pool in get_pools():
+        # Hold min_size connections at once so each physical connection is warmed
+        with ExitStack() as stack:
+            connections = [stack.enter_context(pool.connection()) for _ in range(pool.min_size)]
+            for conn in connections:
+                prepare_statements(conn)
+
+
+def warm_password_hashing():
+    """Load the passlib bcrypt backend and run one hash at the configured cost"""
+    from app.utils.auth import hash_password
+
+    hash_password("warm-up")
+
+
+async def _get(app, path: str):
+    """Push one GET through the full middleware stack, discarding the response"""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 0),
+        "app": app,
+    }
+    await app(scope, receive, send)
+
+
+async def warm_routes(app):
+    """Build the OpenAPI schema and push one request through the middleware stack"""
+    await asyncio.to_thread(app.openapi)
+    await _get(app, "/health")
+
+
+async def warm_catalog(app):
+    """Render the landing page so the first visitor gets the cached snapshot"""
+    await _get(app, "/")
+
+
+async def _timed(name: str, step):
+    start = perf_counter()
+    try:
+        result = step()
+        if asyncio.iscoroutine(result):
+            await result
+    except Exception as e:
+        logger.warning("warm-up step %s failed: %s", name, e)
+        return
+    logger.info("warm-up step %s took %.1fms", name, (perf_counter() - start) * 1000)
+
+
+async def _database_step(name: str, step):
+    if not get_pools():
+        logger.info("warm-up step %s skipped: no connection pool", name)
+        return
+    await _timed(name, step)
+
+
+async def warm_up_before_serving(app):
+    """
+    Warm the worker; awaited in the lifespan so the first requests don't pay it
+
+    Every step is best-effort: a failure is logged and never prevents the
+    worker from serving.
+    """
+    from app.utils.http_client import get_http_client
+
+    await _database_step("database", lambda: asyncio.to_thread(warm_database))
+    await _timed("bcrypt", lambda: asyncio.to_thread(warm_password_hashing))
+    await _timed("http_client", get_http_client)
+    await _timed("routes", lambda: warm_routes(app))
+
+
+async def warm_up(app):
+    """
+    Slower steps (catalog snapshot and export); run as a background task from
+    the lifespan once the worker is serving
+    """
+    from app.services.catalog_service import CatalogService
+
+    await _database_step("catalog", lambda: warm_catalog(app))
+    if settings.CATALOG_EXPORT_ENABLED:
+        await _database_step("catalog_export", lambda: asyncio.to_thread(CatalogService.publish))
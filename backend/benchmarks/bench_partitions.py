@@ -0,0 +1,263 @@
+"""
+Sales partitioning benchmark
+Loads the same synthetic sales into an unpartitioned and a monthly-partitioned
+layout in a disposable Postgres and times the hot sales queries against both:
+the pre-partitioning query text on the plain table, the services' current
+text on the partitioned one. Also times dropping the oldest month (DELETE vs
+DETACH PARTITION).
+
+Usage:
+    python -m benchmarks.bench_partitions --database-url postgresql://localhost/vexa_bench
+    python -m benchmarks.bench_partitions --rows 10000000 --months 36 --json partitions.json
+    python -m benchmarks.bench_partitions --skip-load --iterations 500
+
+Creates (and with --skip-load reuses) the schemas bench_plain and
+bench_partitioned. Loading 10M rows takes several minutes and ~6 GB.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+
+import psycopg
+
+from app.services.admin_service import _RECENT_SALES
+from app.services.entitlement_service import ENTITLEMENTS_BY_EMAIL
+from app.services.payment_service import SALE_BY_REFERENCE
+from app.services.reconciliation_service import _CLAIM_STALE_PENDING, _OLDEST_PENDING
+
+PLAIN, PARTITIONED = "bench_plain", "bench_partitioned"
+CUSTOMERS = 200_000
+
+_COLUMNS = """
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    reference VARCHAR(100) NOT NULL,
+    customer_email VARCHAR(255) NOT NULL,
+    customer_name VARCHAR(255),
+    purchase_type VARCHAR(50) NOT NULL,
+    workflow_id INT,
+    workflow_name VARCHAR(255),
+    amount DECIMAL(10, 2) NOT NULL,
+    currency VARCHAR(10) DEFAULT 'GHS',
+    payment_channel VARCHAR(50),
+    payment_status VARCHAR(50) DEFAULT 'pending',
+    metadata JSONB,
+    verification JSONB,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    paid_at TIMESTAMP WITH TIME ZONE
+"""
+
+_SIDE_TABLES = """
+    CREATE TABLE all_access_members (
+        email VARCHAR(255) PRIMARY KEY, is_active BOOLEAN DEFAULT TRUE, expires_at TIMESTAMP WITH TIME ZONE
+    );
+    CREATE TABLE sales_archived_purchases (
+        customer_email VARCHAR(255) NOT NULL, purchase_type VARCHAR(50) NOT NULL, workflow_id INT NOT NULL,
+        PRIMARY KEY (customer_email, purchase_type, workflow_id)
+    );
+"""
+
+_INDEXES = """
+    CREATE INDEX ON sales(customer_email);
+    CREATE INDEX ON sales(created_at DESC);
+    CREATE INDEX ON sales(payment_status, created_at DESC);
+    CREATE INDEX ON sales(updated_at) WHERE payment_status = 'pending';
+"""
+
+# Spread evenly over the span, newest last; only recent sales are still pending
+_LOAD = """
+    INSERT INTO sales (reference, customer_email, purchase_type, workflow_id, amount,
+                       payment_channel, payment_status, verification, created_at, updated_at, paid_at)
+    SELECT
+        'BENCH' || lpad(n::text, 10, '0'),
+        'user' || (n %% %(customers)s) || '@bench.local',
+        CASE WHEN n %% 20 = 0 THEN 'all-access' ELSE 'single' END,
+        CASE WHEN n %% 20 = 0 THEN NULL ELSE 1 + n %% 1000 END,
+        CASE WHEN n %% 20 = 0 THEN 799.00 ELSE 149.00 END,
+        'card',
+        CASE WHEN n %% 50 = 0 THEN 'failed'
+             WHEN n %% 25 = 0 AND n > %(rows)s - 50000 THEN 'pending'
+             ELSE 'success' END,
+        '{"success": true, "verified": true}'::jsonb,
+        ts, ts, ts
+    FROM generate_series(1, %(rows)s) AS n,
+         LATERAL (SELECT NOW() - make_interval(secs => (%(rows)s - n) * %(span)s / %(rows)s)) AS t(ts)
+"""
+
+# Query text before partitioning (the plain layout)
+_BEFORE = {
+    "sale_by_reference": "SELECT payment_status, verification FROM sales WHERE reference = %s",
+    "entitlements_by_email": """
+        SELECT
+            EXISTS (
+                SELECT 1 FROM sales
+                WHERE customer_email = %s AND payment_status = 'success' AND purchase_type = 'all-access'
+            ) AS all_access_purchased,
+            m.lifetime AS member_lifetime,
+            m.until AS member_until,
+            ARRAY(
+                SELECT DISTINCT workflow_id FROM sales
+                WHERE customer_email = %s AND payment_status = 'success' AND workflow_id IS NOT NULL
+            ) AS workflow_ids
+        FROM (
+            SELECT BOOL_OR(expires_at IS NULL) AS lifetime, MAX(expires_at) AS until
+            FROM all_access_members
+            WHERE email = %s AND is_active = TRUE
+        ) AS m
+    """,
+    "claim_stale_pending": _CLAIM_STALE_PENDING.replace(
+        "WHERE (id, created_at) IN (\n        SELECT id, created_at FROM sales", "WHERE id IN (\n        SELECT id FROM sales"
+    ),
+}
+
+_MONTH_REVENUE = """
+    SELECT SUM(amount) FROM sales
+    WHERE payment_status = 'success' AND created_at >= %s AND created_at < %s
+"""
+
+
+def load(conn, rows: int, months: int):
+    """Recreate both schemas and fill them with the same rows"""
+    span = months * 30 * 86400
+    for schema in (PLAIN, PARTITIONED):
+        conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.execute(f"CREATE SCHEMA {schema}")
+
+    conn.execute(f"SET search_path TO {PLAIN}, public")
+    conn.execute(f"CREATE TABLE sales ({_COLUMNS}, PRIMARY KEY (id), UNIQUE (reference))")
+    conn.execute(_SIDE_TABLES)
+    start = perf_counter()
+    conn.execute(_LOAD, {"rows": rows, "span": span, "customers": CUSTOMERS})
+    conn.execute(_INDEXES)
+    print(f"  {PLAIN:<18} {rows:>10} rows  {perf_counter() - start:7.1f}s")
+
+    conn.execute(f"SET search_path TO {PARTITIONED}, public")
+    conn.execute(f"CREATE TABLE sales ({_COLUMNS}, PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)")
+    conn.execute("CREATE TABLE sales_references (reference VARCHAR(100) PRIMARY KEY, "
+                 "created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW())")
+    conn.execute(_SIDE_TABLES)
+    month = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    first = month - timedelta(days=months * 30 + 31)
+    first = first.replace(day=1)
+    while first <= month + timedelta(days=62):
+        following = (first + timedelta(days=32)).replace(day=1)
+        conn.execute(f"CREATE TABLE sales_{first:%Y_%m} PARTITION OF sales FOR VALUES FROM (%s) TO (%s)",
+                     (first, following))
+        first = following
+    start = perf_counter()
+    conn.execute(f"INSERT INTO sales SELECT * FROM {PLAIN}.sales")
+    conn.execute("INSERT INTO sales_references (reference, created_at) SELECT reference, created_at FROM sales")
+    conn.execute(_INDEXES + "CREATE INDEX ON sales(reference);")
+    print(f"  {PARTITIONED:<18} {rows:>10} rows  {perf_counter() - start:7.1f}s")
+    conn.execute("SET search_path TO DEFAULT")
+    conn.execute("ANALYZE")
+
+
+def _timed(conn, schema: str, sql: str, params_fn, iterations: int, rollback: bool = False) -> list:
+    conn.execute(f"SET search_path TO {schema}, public")
+    timings = []
+    for _ in range(iterations):
+        params = params_fn()
+        start = perf_counter()
+        if rollback:
+            with conn.transaction(force_rollback=True):
+                conn.execute(sql, params).fetchall()
+        else:
+            conn.execute(sql, params).fetchall()
+        timings.append((perf_counter() - start) * 1000)
+    return timings
+
+
+def _summary(timings: list) -> dict:
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+    }
+
+
+def run(conn, rows: int, months: int, iterations: int) -> dict:
+    """Time every query against both layouts"""
+    def reference():
+        return (f"BENCH{random.randint(1, rows):010d}",)
+
+    def email():
+        value = f"user{random.randrange(CUSTOMERS)}@bench.local"
+        return (value, value, value)
+
+    def month_range():
+        start = datetime.now(timezone.utc) - timedelta(days=30 * random.randrange(months))
+        return (start, start + timedelta(days=30))
+
+    cases = [
+        ("sale_by_reference", _BEFORE["sale_by_reference"], SALE_BY_REFERENCE, reference, False),
+        ("entitlements_by_email", _BEFORE["entitlements_by_email"], ENTITLEMENTS_BY_EMAIL, email, False),
+        ("recent_sales", _RECENT_SALES, _RECENT_SALES, lambda: None, False),
+        ("oldest_pending", _OLDEST_PENDING, _OLDEST_PENDING, lambda: None, False),
+        ("claim_stale_pending", _BEFORE["claim_stale_pending"], _CLAIM_STALE_PENDING, lambda: (300, 100), True),
+        ("month_revenue", _MONTH_REVENUE, _MONTH_REVENUE, month_range, False),
+    ]
+    results = {}
+    for name, before, after, params_fn, rollback in cases:
+        plain = _summary(_timed(conn, PLAIN, str(before), params_fn, iterations, rollback))
+        partitioned = _summary(_timed(conn, PARTITIONED, str(after), params_fn, iterations, rollback))
+        results[name] = {"plain": plain, "partitioned": partitioned}
+        print(f"  {name:<24} plain p50 {plain['p50_ms']:>9.3f} ms  p95 {plain['p95_ms']:>9.3f}   "
+              f"partitioned p50 {partitioned['p50_ms']:>9.3f} ms  p95 {partitioned['p95_ms']:>9.3f}")
+
+    # Dropping the oldest month: DELETE vs DETACH (rolled back so reruns see the same data)
+    oldest = conn.execute(
+        f"SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        f"WHERE i.inhparent = '{PARTITIONED}.sales'::regclass ORDER BY c.relname LIMIT 1"
+    ).fetchone()[0]
+    bound = datetime.strptime(oldest[len("sales_"):], "%Y_%m").replace(tzinfo=timezone.utc)
+    bound = (bound + timedelta(days=32)).replace(day=1)
+    maintenance = {}
+    for label, schema, sql, params in (
+        ("delete_oldest_month", PLAIN, "DELETE FROM sales WHERE created_at < %s", (bound,)),
+        ("detach_oldest_month", PARTITIONED, f"ALTER TABLE sales DETACH PARTITION {oldest}", None),
+    ):
+        conn.execute(f"SET search_path TO {schema}, public")
+        start = perf_counter()
+        with conn.transaction(force_rollback=True):
+            conn.execute(sql, params)
+        maintenance[label] = round((perf_counter() - start) * 1000, 1)
+        print(f"  {label:<24} {maintenance[label]:>10.1f} ms")
+    conn.execute("SET search_path TO DEFAULT")
+
+    return {"rows": rows, "months": months, "iterations": iterations, "queries": results, "maintenance": maintenance}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Plain vs partitioned sales benchmark")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"))
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--months", type=int, default=36, help="Span of created_at")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--skip-load", action="store_true", help="Reuse the schemas from an earlier run")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or BENCH_DATABASE_URL is required")
+
+    with psycopg.connect(args.database_url, autocommit=True) as conn:
+        if not args.skip_load:
+            print("Loading")
+            load(conn, args.rows, args.months)
+        print("Timing")
+        results = run(conn, args.rows, args.months, args.iterations)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
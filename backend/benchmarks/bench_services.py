@@ -0,0 +1,181 @@
+"""
+Service-level microbenchmarks
+Times the Python-side cost of service methods, schema validation, token handling
+and admin response shaping against the in-memory database stand-in.
+
+Usage:
+    python -m benchmarks.bench_services [--filter auth] [--json out.json]
+    python -m benchmarks.bench_services --baseline base.json --fail-over 20
+
+Runs in a few seconds; exits non-zero when ``--baseline`` is given and any
+benchmark is slower than the baseline by more than ``--fail-over`` percent.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from time import perf_counter
+
+from app.routers import admin as admin_router
+from app.schemas.user import UserLogin, UserRegister
+from app.schemas.event import EventBatch
+from app.schemas.workflow import WorkflowUpload
+from app.services.admin_service import AdminService
+from app.services.auth_service import AuthService
+from app.services.event_service import EventService, event_buffer
+from app.services.workflow_service import WorkflowService
+from app.utils.auth import create_access_token, decode_access_token, pwd_context
+from benchmarks.fake_db import FakeDatabase, FakeTable, user_row, workflow_rows
+
+CATALOG_SIZE = 200
+PASSWORD = "correct horse battery staple"
+
+WORKFLOW_PAYLOAD = {
+    "name": "Lead Generation & Nurturing",
+    "category": "Sales",
+    "icon": "🎯",
+    "description": "Capture and nurture leads automatically",
+    "price": 149.0,
+    "tags": ["leads", "nurturing", "automation"],
+    "workflow_json": {
+        "nodes": [
+            {"id": str(n), "name": f"Node {n}", "type": "n8n-nodes-base.httpRequest",
+             "position": [n * 200, 300], "parameters": {"url": "https://example.com", "method": "POST"}}
+            for n in range(40)
+        ],
+        "connections": {f"Node {n}": {"main": [[{"node": f"Node {n + 1}", "type": "main", "index": 0}]]}
+                        for n in range(39)},
+    },
+}
+
+EVENT_BATCH = {
+    "events": [
+        {"event_type": "workflow_view", "session_id": "s-1234", "event_data": {"workflow_id": n, "path": "/workflows.html"}}
+        for n in range(50)
+    ]
+}
+
+REGISTER_PAYLOAD = {
+    "email": "new.user@example.com",
+    "password": PASSWORD,
+    "first_name": "Kofi",
+    "last_name": "Boateng",
+    "phone": "+233240000000",
+}
+
+
+def build_database() -> FakeDatabase:
+    # Minimum-cost bcrypt so login measures the service code, not the hash
+    fast_hash = pwd_context.handler("bcrypt").using(rounds=4).hash(PASSWORD)
+    catalog = workflow_rows(CATALOG_SIZE)
+    sales = FakeTable(
+        ("reference", "email", "purchase_type", "amount", "created_at"),
+        [(f"VEXA-{n:012d}", f"user{n}@example.com", "single", row[5], row[11])
+         for n, row in enumerate(catalog.rows[:10])]
+    )
+    return (
+        FakeDatabase()
+        .on("FROM users WHERE email", user_row(fast_hash))
+        .on("FROM users WHERE id", user_row(fast_hash))
+        .on("UPDATE users", None)
+        .on("FROM workflows WHERE id", catalog)
+        .on("FROM workflows", catalog)
+        .on("FROM sales_rollups", {"total_revenue": 123456, "total_sales": 812, "all_access_sales": 40})
+        .on("COUNT(DISTINCT customer_email)", {"count": 640})
+        .on("COUNT(*) as count", {"count": 1000})
+        .on("FROM sales", sales)
+    )
+
+
+def build_benchmarks() -> dict:
+    token = create_access_token({"user_id": "8d5e4c1a-0000-4000-8000-000000000000", "email": "user@example.com"})
+    login = UserLogin(email="user@example.com", password=PASSWORD)
+    loop = asyncio.new_event_loop()
+
+    return {
+        "schema.workflow_upload": lambda: WorkflowUpload.model_validate(WORKFLOW_PAYLOAD),
+        "schema.user_register": lambda: UserRegister.model_validate(REGISTER_PAYLOAD),
+        "auth.create_token": lambda: create_access_token({"user_id": "1", "email": "user@example.com"}),
+        "auth.decode_token": lambda: decode_access_token(token),
+        "auth.login_user": lambda: AuthService.login_user(login),
+        "auth.get_user_info": lambda: AuthService.get_user_info("1"),
+        "workflow.get_all_workflows": lambda: WorkflowService.get_all_workflows(active_only=True),
+        "workflow.get_workflow_by_id": lambda: WorkflowService.get_workflow_by_id(1),
+        "admin.get_dashboard_stats": lambda: AdminService.get_dashboard_stats(),
+        "router.admin_workflows_shaping": lambda: loop.run_until_complete(admin_router.get_all_workflows_admin()),
+        "events.ingest_batch_50": lambda: ingest_events(EventBatch.model_validate(EVENT_BATCH)),
+    }
+
+
+def ingest_events(batch: EventBatch):
+    EventService.ingest(batch, ip_address="127.0.0.1", user_agent="bench")
+    # Nothing flushes here; keep the buffer from hitting its memory cap
+    event_buffer._rows.clear()
+    event_buffer._bytes = 0
+
+
+def measure(function, min_time: float, rounds: int) -> float:
+    """Best-of-rounds microseconds per call, auto-scaling the loop count"""
+    number = 1
+    while True:
+        start = perf_counter()
+        for _ in range(number):
+            function()
+        if perf_counter() - start >= min_time / 10:
+            break
+        number *= 2
+
+    best = float("inf")
+    for _ in range(rounds):
+        start = perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (perf_counter() - start) / number)
+    return best * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Service-level microbenchmarks")
+    parser.add_argument("--filter", default="", help="only run benchmarks containing this substring")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results file from a previous run to compare against")
+    parser.add_argument("--fail-over", type=float, default=20.0, help="allowed slowdown in percent")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    with build_database().installed():
+        for name, function in build_benchmarks().items():
+            if args.filter not in name:
+                continue
+            us = measure(function, args.min_time, args.rounds)
+            results[name] = round(us, 3)
+
+            line = f"{name:<34} {us:10.2f} us/op"
+            if name in baseline:
+                change = (us - baseline[name]) / baseline[name] * 100
+                line += f"  ({change:+.1f}% vs baseline)"
+                if change > args.fail_over:
+                    regressions.append(name)
+            print(line)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if regressions:
+        print(f"slower than baseline by more than {args.fail_over}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+In-memory stand-in for the database layer
+Answers ``execute_query_dict`` calls from canned tables so service code can be
+benchmarked without Postgres. Rows are stored as tuples and turned into dicts on
+every call, the same work psycopg's ``dict_row`` does.
+"""
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from app.utils import database
+from app.utils.query_stats import fingerprint
+
+
+class FakeTable:
+    """Column names plus tuple rows, materialized as dicts per query"""
+
+    def __init__(self, columns: tuple, rows: list):
+        self.columns = columns
+        self.rows = rows
+
+    def dicts(self, limit: int = None) -> list:
+        columns = self.columns
+        rows = self.rows if limit is None else self.rows[:limit]
+        return [dict(zip(columns, row)) for row in rows]
+
+
+class FakeDatabase:
+    """
+    Route queries to canned results by a substring of their fingerprint
+
+    Example:
+        db = FakeDatabase()
+        db.on("FROM users WHERE email", users_table)
+        with db.installed():
+            AuthService.login_user(credentials)
+    """
+
+    def __init__(self):
+        self._routes = []
+        self._resolved = {}
+        self.calls = 0
+
+    def on(self, needle: str, result):
+        """Answer queries whose fingerprint contains ``needle`` with a table, dict or callable"""
+        self._routes.append((needle, result))
+        self._resolved.clear()
+        return self
+
+    def _resolve(self, query: str):
+        route = self._resolved.get(query)
+        if route is None:
+            key = fingerprint(query)
+            route = next((result for needle, result in self._routes if needle in key), False)
+            self._resolved[query] = route
+        return route
+
+    def execute_query_dict(self, query, params=None, fetch_one=False, fetch_all=False, **kwargs):
+        self.calls += 1
+        result = self._resolve(query)
+        if callable(result):
+            result = result(params)
+        if isinstance(result, FakeTable):
+            rows = result.dicts(1 if fetch_one else None)
+            if fetch_one:
+                return rows[0] if rows else None
+            return rows if fetch_all else None
+        if fetch_one:
+            return dict(result) if result else None
+        if fetch_all:
+            return [dict(row) for row in result] if result else []
+        return None
+
+    @contextmanager
+    def installed(self):
+        """Patch every loaded ``app`` module that imported the real query helper"""
+        real = database.execute_query_dict
+        patched = []
+        for name, module in list(sys.modules.items()):
+            if name.startswith("app.") and getattr(module, "execute_query_dict", None) is real:
+                module.execute_query_dict = self.execute_query_dict
+                patched.append(module)
+        try:
+            yield self
+        finally:
+            for module in patched:
+                module.execute_query_dict = real
+
+
+def workflow_rows(count: int) -> FakeTable:
+    """Catalog rows shaped like the workflows SELECTs return"""
+    now = datetime.now(timezone.utc)
+    columns = ("id", "name", "category", "icon", "description", "price", "tags", "json_file_url",
+               "downloads", "revenue", "is_active", "created_at", "updated_at")
+    rows = [
+        (
+            n, f"Workflow {n}", "Marketing", "📧",
+            "Automated email sequences with personalization and analytics",
+            Decimal("149.00"), ["email", "marketing", "automation"], '{"nodes": [], "connections": {}}',
+            n * 3, Decimal("149.00") * n * 3, True, now - timedelta(minutes=n), now
+        )
+        for n in range(1, count + 1)
+    ]
+    return FakeTable(columns, rows)
+
+
+def user_row(password_hash: str) -> FakeTable:
+    """A single users row with every column the auth queries select"""
+    columns = ("id", "email", "password_hash", "first_name", "last_name", "phone",
+               "is_active", "is_admin", "is_verified", "created_at")
+    row = (uuid.uuid4(), "user@example.com", password_hash, "Ama", "Mensah", "+233200000000",
+           True, True, True, datetime.now(timezone.utc))
+    return FakeTable(columns, [row])
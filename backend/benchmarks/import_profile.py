@@ -0,0 +1,104 @@
+"""
+Import-time profile
+Imports the app in a fresh interpreter under ``-X importtime`` and reports the
+total, the slowest top-level packages and the app modules that pull them in.
+
+Usage:
+    python -m benchmarks.import_profile [--module app.main] [--top 15]
+    python -m benchmarks.import_profile --budget-ms 1500 --json import-profile.json
+
+Exits non-zero when the cumulative import time exceeds ``--budget-ms``.
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def profile(module: str, runs: int) -> list:
+    """Return ``(self_us, cumulative_us, depth, name)`` rows from the fastest of ``runs`` imports"""
+    best = None
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        )
+        rows = []
+        for line in completed.stderr.splitlines():
+            match = _LINE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                rows.append((int(self_us), int(cumulative_us), (len(indent) - 1) // 2, name))
+        total = next((row[1] for row in rows if row[3] == module), 0)
+        if best is None or total < best[0]:
+            best = (total, rows)
+    return best[1]
+
+
+def summarize(rows: list, module: str, top: int) -> dict:
+    total_us = next((row[1] for row in rows if row[3] == module), 0)
+
+    packages = {}
+    for self_us, _, _, name in rows:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    # Cumulative cost of each app module's direct third-party imports. importtime
+    # prints children before their parent, so walking backwards visits parents first.
+    app_imports = []
+    stack = []
+    for _, cumulative_us, depth, name in reversed(rows):
+        while stack and stack[-1][1] >= depth:
+            stack.pop()
+        parent = stack[-1][0] if stack else None
+        if parent and (parent == "app" or parent.startswith("app.")) and not name.startswith("app."):
+            app_imports.append({"app_module": parent, "imports": name, "cumulative_ms": round(cumulative_us / 1000, 1)})
+        stack.append((name, depth))
+
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "packages": [
+            {"package": name, "self_ms": round(us / 1000, 1)}
+            for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+        "app_imports": sorted(app_imports, key=lambda item: item["cumulative_ms"], reverse=True)[:top],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import-time profile of the app")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3, help="report the fastest of N cold imports")
+    parser.add_argument("--budget-ms", type=float)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    report = summarize(profile(args.module, args.runs), args.module, args.top)
+
+    print(f"import {report['module']}: {report['total_ms']:.1f} ms")
+    print("\nslowest packages (self time)")
+    for item in report["packages"]:
+        print(f"  {item['package']:<32} {item['self_ms']:8.1f} ms")
+    print("\nheaviest imports made by app modules (cumulative)")
+    for item in report["app_imports"]:
+        print(f"  {item['app_module']:<32} -> {item['imports']:<32} {item['cumulative_ms']:8.1f} ms")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.budget_ms is not None and report["total_ms"] > args.budget_ms:
+        print(f"\nimport time {report['total_ms']:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
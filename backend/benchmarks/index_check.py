@@ -0,0 +1,135 @@
+"""
+Index check
+EXPLAINs every hot query the services issue against a migrated database and
+flags sequential scans on large tables, so a missing index fails CI instead of
+showing up as a slow endpoint.
+
+Usage:
+    python -m benchmarks.index_check --database-url postgresql://localhost/vexa_ci
+    python -m benchmarks.index_check --min-rows 10000 --json index-check.json
+
+Plans come from plain EXPLAIN (nothing is executed), so the check is safe to
+point at a copy of production. Table sizes come from the planner statistics,
+so seed and ANALYZE the database first (benchmarks.loadtest.seed does both).
+Exits non-zero when any query needs a sequential scan it is not allowed.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import psycopg
+
+from app.services import admin_service, reconciliation_service
+from app.utils.database import registered_statements
+
+# Imported for their prepared_statement registrations
+import app.services.auth_service  # noqa: F401
+import app.services.entitlement_service  # noqa: F401
+import app.services.payment_service  # noqa: F401
+import app.services.workflow_service  # noqa: F401
+
+_NOW = datetime.now(timezone.utc)
+_ANALYTICS_PARAMS = {
+    "grain": "hour",
+    "start": _NOW - timedelta(days=2),
+    "end": _NOW,
+    "purchase_type": None,
+    "workflow_id": None,
+}
+
+# Hot queries that are not registered statements: (name, sql, params)
+EXTRA_QUERIES = [
+    ("reconcile_claim", reconciliation_service._CLAIM_STALE_PENDING, (300, 100)),
+    ("reconcile_oldest_pending", reconciliation_service._OLDEST_PENDING, None),
+    ("dashboard_recent_sales", admin_service._RECENT_SALES, None),
+    ("analytics_totals", admin_service._SALES_TOTALS, _ANALYTICS_PARAMS),
+    ("analytics_breakdown", admin_service._SALES_BREAKDOWN, _ANALYTICS_PARAMS),
+]
+
+# Queries that read (nearly) the whole table by design
+SEQ_SCAN_ALLOWED = {
+    "active_workflows": {"workflows"},
+    "all_workflows": {"workflows"},
+}
+
+
+def hot_queries() -> list:
+    """Every query to check, as (name, sql, params)"""
+    statements = [(s.name, str(s), s.warmup_params or None) for s in registered_statements()]
+    return sorted(statements) + EXTRA_QUERIES
+
+
+def _seq_scans(plan: dict):
+    """Yield (relation, node) for every sequential scan in a plan tree"""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"], plan
+    for child in plan.get("Plans", ()):
+        yield from _seq_scans(child)
+
+
+def check(conn, min_rows: int) -> tuple:
+    """
+    EXPLAIN every hot query
+
+    Args:
+        conn: psycopg connection to a migrated, analyzed database
+        min_rows: Tables with at least this many rows count as large
+
+    Returns:
+        tuple: (results, findings) where results has one entry per query and
+        findings lists the disallowed sequential scans on large tables
+    """
+    table_rows = dict(conn.execute(
+        "SELECT relname, reltuples::bigint FROM pg_class WHERE relkind IN ('r', 'p')"
+    ).fetchall())
+
+    results, findings = [], []
+    for name, sql, params in hot_queries():
+        # Roll back so EXPLAIN of a write never holds locks between queries
+        with conn.transaction(force_rollback=True):
+            plan = conn.execute("EXPLAIN (FORMAT JSON) " + sql, params).fetchone()[0][0]["Plan"]
+        scans = []
+        for relation, node in _seq_scans(plan):
+            rows = table_rows.get(relation, 0)
+            scans.append({"relation": relation, "table_rows": rows, "filter": node.get("Filter")})
+            if rows >= min_rows and relation not in SEQ_SCAN_ALLOWED.get(name, ()):
+                findings.append({"query": name, **scans[-1]})
+        results.append({"query": name, "total_cost": plan["Total Cost"], "seq_scans": scans})
+    return results, findings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Flag sequential scans in hot query plans")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--min-rows", type=int, default=10_000, help="Smallest table worth an index")
+    parser.add_argument("--json", help="Write the full report to this file")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+
+    with psycopg.connect(args.database_url) as conn:
+        results, findings = check(conn, args.min_rows)
+
+    for result in results:
+        scans = ", ".join(s["relation"] for s in result["seq_scans"]) or "-"
+        print(f"  {result['query']:<28} cost {result['total_cost']:>12.1f}  seq scans: {scans}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"min_rows": args.min_rows, "queries": results, "findings": findings}, f, indent=2)
+
+    if findings:
+        print(f"\n{len(findings)} sequential scan(s) on tables with >= {args.min_rows} rows:")
+        for finding in findings:
+            print(f"  {finding['query']}: {finding['relation']} ({finding['table_rows']} rows) "
+                  f"filter: {finding['filter'] or '-'}")
+        return 1
+    print(f"\nNo sequential scans on tables with >= {args.min_rows} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""End-to-end load test against a local Postgres and a Paystack stand-in"""
@@ -0,0 +1,63 @@
+"""
+Load-test report comparison
+Prints per-scenario throughput and latency deltas between two JSON reports.
+
+Usage:
+    python -m benchmarks.loadtest.compare base.json head.json [--fail-over 10]
+
+With ``--fail-over`` the exit status is non-zero when any scenario's p95
+regresses by more than that percentage.
+"""
+import argparse
+import json
+import sys
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def _delta(base: float, head: float) -> str:
+    if not base:
+        return "   n/a"
+    return f"{(head - base) / base * 100:+6.1f}%"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare two load-test reports")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--fail-over", type=float, help="max allowed p95 regression in percent")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print(f"base {base['meta']['git_revision'][:12]}  head {head['meta']['git_revision'][:12]}")
+    print(f"{'scenario':<20}" + "".join(f"{metric:>26}" for metric in METRICS))
+
+    regressions = []
+    rows = [("total", base["total"], head["total"])]
+    rows += [
+        (name, base["scenarios"].get(name, {}), stats)
+        for name, stats in sorted(head["scenarios"].items())
+    ]
+    for name, before, after in rows:
+        cells = []
+        for metric in METRICS:
+            old, new = before.get(metric, 0.0), after.get(metric, 0.0)
+            cells.append(f"{old:>9.1f} -> {new:>9.1f} {_delta(old, new)}")
+        print(f"{name:<20}" + "".join(f"{cell:>26}" for cell in cells))
+
+        old_p95, new_p95 = before.get("p95_ms", 0.0), after.get("p95_ms", 0.0)
+        if args.fail_over is not None and old_p95 and (new_p95 - old_p95) / old_p95 * 100 > args.fail_over:
+            regressions.append(name)
+
+    if regressions:
+        print(f"p95 regressed more than {args.fail_over}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
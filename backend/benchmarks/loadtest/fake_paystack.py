@@ -0,0 +1,104 @@
+"""
+Local Paystack stand-in
+Implements the transaction initialize/verify endpoints the payment routes call,
+with configurable latency, so load tests never touch the real API.
+
+Usage:
+    python -m benchmarks.loadtest.fake_paystack --port 8090 --latency-ms 80
+
+Point the app at it with ``PAYSTACK_BASE_URL=http://127.0.0.1:8090``.
+References ending in ``FAIL`` verify as failed, ``PEND`` as pending
+(``ongoing`` in Paystack terms), ``MISS`` get Paystack's "reference not
+found" 400; everything else verifies as success.
+``GET /_calls`` reports how many initialize/verify calls were received.
+"""
+import argparse
+import asyncio
+import random
+import sys
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import uvicorn
+
+app = FastAPI(title="Fake Paystack")
+app.state.latency = 0.0
+app.state.transactions = {}
+app.state.calls = {"initialize": 0, "verify": 0}
+
+
+async def _simulate_latency():
+    latency = app.state.latency
+    if latency:
+        # +-25% jitter so responses don't arrive in lockstep
+        await asyncio.sleep(latency * random.uniform(0.75, 1.25))
+
+
+@app.post("/transaction/initialize")
+async def initialize(request: Request):
+    app.state.calls["initialize"] += 1
+    await _simulate_latency()
+    payload = await request.json()
+    reference = payload["reference"]
+    app.state.transactions[reference] = payload
+    return {
+        "status": True,
+        "message": "Authorization URL created",
+        "data": {
+            "authorization_url": f"https://checkout.paystack.test/{reference}",
+            "access_code": f"AC_{reference}",
+            "reference": reference
+        }
+    }
+
+
+@app.get("/transaction/verify/{reference}")
+async def verify(reference: str):
+    app.state.calls["verify"] += 1
+    await _simulate_latency()
+    payload = app.state.transactions.get(reference, {})
+    if reference.endswith("MISS"):
+        return JSONResponse(status_code=400, content={"status": False, "message": "Transaction reference not found"})
+    if reference.endswith("FAIL"):
+        status = "failed"
+    elif reference.endswith("PEND"):
+        status = "ongoing"
+    else:
+        status = "success"
+    return {
+        "status": True,
+        "message": "Verification successful",
+        "data": {
+            "reference": reference,
+            "status": status,
+            "amount": payload.get("amount", 14900),
+            "currency": "GHS",
+            "channel": "card",
+            "paid_at": "2024-01-01T00:00:00.000Z" if status == "success" else None,
+            "customer": {"email": payload.get("email", "customer@loadtest.local")},
+            "metadata": payload.get("metadata", {}),
+            "authorization": {"channel": "card", "last4": "4081"}
+        }
+    }
+
+
+@app.get("/_calls")
+async def calls():
+    """Upstream call counts, to check caching and coalescing from a test"""
+    return app.state.calls
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local Paystack stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    args = parser.parse_args()
+
+    app.state.latency = args.latency_ms / 1000
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Local SMTP sink
+Accepts every message over plain SMTP (no TLS, any AUTH), with configurable
+latency and failure injection, so the email queue can be exercised without
+a real mail server.
+
+Usage:
+    python -m benchmarks.loadtest.fake_smtp --port 8025 --latency-ms 50
+    python -m benchmarks.loadtest.fake_smtp --fail-rate 0.2 --maildir var/mail
+
+Point the app at it with ``SMTP_HOST=127.0.0.1 SMTP_PORT=8025 SMTP_SECURITY=none``.
+``--fail-rate`` answers that share of messages with a transient 451 so the
+retry path runs. Counts (connections, messages, rejected) are printed every
+``--report-interval`` seconds and on exit.
+"""
+import argparse
+import asyncio
+import random
+import sys
+from pathlib import Path
+
+stats = {"connections": 0, "messages": 0, "rejected": 0}
+
+
+class SMTPSink:
+    def __init__(self, latency: float, fail_rate: float, maildir: Path = None):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.maildir = maildir
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        stats["connections"] += 1
+
+        async def reply(line: str):
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        await reply("220 fake-smtp ready")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                command = line.decode(errors="replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    await reply("250-fake-smtp\r\n250-AUTH PLAIN\r\n250 8BITMIME")
+                elif verb == "HELO":
+                    await reply("250 fake-smtp")
+                elif verb == "AUTH":
+                    await reply("235 authenticated")
+                elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                    await reply("250 ok")
+                elif verb == "DATA":
+                    await reply("354 end with <CRLF>.<CRLF>")
+                    data = await reader.readuntil(b"\r\n.\r\n")
+                    if self.latency:
+                        await asyncio.sleep(self.latency * random.uniform(0.75, 1.25))
+                    if random.random() < self.fail_rate:
+                        stats["rejected"] += 1
+                        await reply("451 try again later")
+                        continue
+                    stats["messages"] += 1
+                    if self.maildir:
+                        (self.maildir / f"{stats['messages']:08d}.eml").write_bytes(data[:-5])
+                    await reply("250 queued")
+                elif verb == "QUIT":
+                    await reply("221 bye")
+                    return
+                else:
+                    await reply("502 not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _report(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        print(stats, flush=True)
+
+
+async def serve(host: str, port: int, sink: SMTPSink, report_interval: float):
+    server = await asyncio.start_server(sink.handle, host, port)
+    print(f"Fake SMTP listening on {host}:{port}", flush=True)
+    reporter = asyncio.create_task(_report(report_interval))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        reporter.cancel()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local SMTP sink")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of messages answered with 451")
+    parser.add_argument("--maildir", type=Path, help="Write each accepted message here as .eml")
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.maildir:
+        args.maildir.mkdir(parents=True, exist_ok=True)
+    sink = SMTPSink(args.latency_ms / 1000, args.fail_rate, args.maildir)
+    try:
+        asyncio.run(serve(args.host, args.port, sink, args.report_interval))
+    except KeyboardInterrupt:
+        pass
+    print(stats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
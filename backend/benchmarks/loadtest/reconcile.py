@@ -0,0 +1,119 @@
+"""
+Reconciliation throughput test
+Runs the pending-sales reconciler against the local Paystack stand-in and
+reports how many references per second it settles at each concurrency level.
+
+Usage:
+    python -m benchmarks.loadtest.reconcile [--pending 2000] [--concurrency 1,10,50]
+    python -m benchmarks.loadtest.reconcile --paystack-latency-ms 250 --json reconcile.json
+
+The backlog lives in memory (claim/record are overridden), so no database is
+needed; what is measured is the verify fan-out, which is what has to keep up
+with sales volume. ``--min-rate`` fails the run below a references/second floor.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from time import perf_counter
+
+from app.config import settings
+from app.services.reconciliation_service import Reconciler
+from app.utils.http_client import close_http_client
+from benchmarks.loadtest.run import _spawn, _wait_until_ready
+
+
+class MemoryReconciler(Reconciler):
+    """Reconciler whose backlog is a list instead of the sales table"""
+
+    def __init__(self, pending: int, **kwargs):
+        super().__init__(**kwargs)
+        created_at = datetime.now(timezone.utc) - timedelta(hours=1)
+        # Every 10th reference stays pending upstream, every 20th fails
+        self.backlog = [
+            {"reference": f"VEXA-RECON{n:08d}{'PEND' if n % 10 == 0 else 'FAIL' if n % 20 == 5 else ''}",
+             "created_at": created_at}
+            for n in range(pending)
+        ]
+        self.recorded = 0
+
+    def claim_batch(self) -> list:
+        batch, self.backlog = self.backlog[:self.batch_size], self.backlog[self.batch_size:]
+        return batch
+
+    def record(self, rows: list) -> int:
+        self.recorded += len(rows)
+        return len(rows)
+
+    def pending_lag(self) -> float:
+        return 3600.0 if self.backlog else 0.0
+
+
+async def measure(pending: int, concurrency: int, batch_size: int) -> dict:
+    reconciler = MemoryReconciler(
+        pending, batch_size=batch_size, concurrency=concurrency, stale_after=0, abandon_after=86400
+    )
+    start = perf_counter()
+    totals = {"claimed": 0, "recorded": 0, "pending": 0, "errors": 0, "batches": 0}
+    while reconciler.backlog:
+        summary = await reconciler.run_once()
+        totals["batches"] += 1
+        for key in ("claimed", "recorded", "pending", "errors"):
+            totals[key] += summary[key]
+    elapsed = perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 2),
+        "refs_per_s": round(totals["claimed"] / elapsed, 1),
+        **totals,
+    }
+
+
+async def run(args) -> list:
+    results = []
+    for concurrency in args.concurrency:
+        result = await measure(args.pending, concurrency, args.batch_size)
+        print(f"concurrency {result['concurrency']:>4}: {result['refs_per_s']:8.1f} refs/s "
+              f"({result['claimed']} checked, {result['recorded']} settled, "
+              f"{result['pending']} still pending, {result['errors']} errors, {result['elapsed_s']}s)")
+        results.append(result)
+    await close_http_client()
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reconciliation throughput test")
+    parser.add_argument("--pending", type=int, default=2000, help="pending sales in the backlog")
+    parser.add_argument("--concurrency", default="1,10,50",
+                        type=lambda value: [int(n) for n in value.split(",")])
+    parser.add_argument("--batch-size", type=int, default=settings.RECONCILE_BATCH_SIZE)
+    parser.add_argument("--paystack-port", type=int, default=8091)
+    parser.add_argument("--paystack-latency-ms", type=float, default=80.0)
+    parser.add_argument("--min-rate", type=float, help="fail below this many refs/s at the highest concurrency")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    paystack = _spawn(["-m", "benchmarks.loadtest.fake_paystack", "--port", str(args.paystack_port),
+                       "--latency-ms", str(args.paystack_latency_ms)], {})
+    try:
+        settings.PAYSTACK_BASE_URL = f"http://127.0.0.1:{args.paystack_port}"
+        settings.PAYSTACK_SECRET_KEY = settings.PAYSTACK_SECRET_KEY or "sk_test_loadtest"
+        asyncio.run(_wait_until_ready(f"{settings.PAYSTACK_BASE_URL}/_calls"))
+        results = asyncio.run(run(args))
+    finally:
+        paystack.terminate()
+        paystack.wait()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.min_rate is not None and results[-1]["refs_per_s"] < args.min_rate:
+        print(f"\n{results[-1]['refs_per_s']} refs/s is below the floor of {args.min_rate}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+End-to-end load test
+Starts the app and the Paystack stand-in, drives a weighted mix of traffic and
+writes throughput and p50/p95/p99 latency per scenario as a JSON report.
+
+Usage:
+    python -m benchmarks.loadtest.seed --database-url postgresql://localhost/vexa_loadtest
+    python -m benchmarks.loadtest.run --database-url postgresql://localhost/vexa_loadtest \\
+        --duration 60 --concurrency 64 --output reports/$(git rev-parse --short HEAD).json
+    python -m benchmarks.loadtest.compare reports/base.json reports/head.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+
+import httpx
+
+from benchmarks.loadtest.seed import ADMIN_EMAIL, LOADTEST_PASSWORD
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+DEFAULT_MIX = "catalog=40,workflow_detail=15,login=5,me=20,admin_stats=5,payment=15"
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """Collects per-scenario latencies once the warm-up period is over"""
+
+    def __init__(self):
+        self.recording = False
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, scenario: str, seconds: float, ok: bool):
+        if not self.recording:
+            return
+        self.latencies.setdefault(scenario, []).append(seconds)
+        if not ok:
+            self.errors[scenario] = self.errors.get(scenario, 0) + 1
+
+    def summary(self, elapsed: float) -> dict:
+        scenarios = {}
+        every = []
+        for scenario, values in sorted(self.latencies.items()):
+            values.sort()
+            every.extend(values)
+            scenarios[scenario] = self._summarize(values, self.errors.get(scenario, 0), elapsed)
+        every.sort()
+        return {
+            "total": self._summarize(every, sum(self.errors.values()), elapsed),
+            "scenarios": scenarios,
+        }
+
+    @staticmethod
+    def _summarize(values: list, errors: int, elapsed: float) -> dict:
+        return {
+            "requests": len(values),
+            "errors": errors,
+            "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+        }
+
+
+class TrafficMix:
+    """Weighted scenarios issued by each virtual user"""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, args, tokens: list, admin_token: str):
+        self.client = client
+        self.recorder = recorder
+        self.args = args
+        self.tokens = tokens
+        self.admin_token = admin_token
+
+    async def _timed(self, scenario: str, method: str, url: str, **kwargs) -> httpx.Response:
+        start = perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(scenario, perf_counter() - start, False)
+            return None
+        self.recorder.record(scenario, perf_counter() - start, response.status_code < 400)
+        return response
+
+    async def catalog(self, rng: random.Random):
+        await self._timed("catalog", "GET", "/api/workflows")
+
+    async def workflow_detail(self, rng: random.Random):
+        await self._timed("workflow_detail", "GET", f"/api/workflows/{rng.randint(1, self.args.workflows)}")
+
+    async def login(self, rng: random.Random):
+        email = f"user{rng.randint(1, self.args.users)}@loadtest.local"
+        await self._timed("login", "POST", "/api/auth/login", json={"email": email, "password": LOADTEST_PASSWORD})
+
+    async def me(self, rng: random.Random):
+        token = rng.choice(self.tokens)
+        await self._timed("me", "GET", "/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+    async def admin_stats(self, rng: random.Random):
+        await self._timed("admin_stats", "GET", "/api/admin/stats",
+                          headers={"Authorization": f"Bearer {self.admin_token}"})
+
+    async def payment(self, rng: random.Random):
+        workflow_id = rng.randint(1, self.args.workflows)
+        response = await self._timed("payment_initialize", "POST", "/api/payment/initialize", json={
+            "email": f"user{rng.randint(1, self.args.users)}@loadtest.local",
+            "amount": 149,
+            "purchase_type": "single",
+            "workflow_id": workflow_id,
+            "workflow_name": f"Workflow {workflow_id}"
+        })
+        if response is not None and response.status_code == 200:
+            reference = response.json()["reference"]
+            await self._timed("payment_verify", "POST", f"/api/payment/verify/{reference}")
+
+
+def parse_mix(mix: str) -> list:
+    pairs = [item.split("=") for item in mix.split(",") if item]
+    return [(name.strip(), float(weight)) for name, weight in pairs]
+
+
+async def _virtual_user(mix: TrafficMix, scenarios: list, weights: list, rng: random.Random, deadline: float):
+    while perf_counter() < deadline:
+        name = rng.choices(scenarios, weights)[0]
+        await getattr(mix, name)(rng)
+
+
+async def _login(client: httpx.AsyncClient, path: str, email: str) -> str:
+    response = await client.post(path, json={"email": email, "password": LOADTEST_PASSWORD})
+    response.raise_for_status()
+    return response.json()["token"]
+
+
+async def drive(args) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        # Tokens for /api/auth/me are minted up front so login cost stays in its own scenario
+        rng = random.Random(args.seed)
+        emails = [f"user{rng.randint(1, args.users)}@loadtest.local" for _ in range(args.token_pool)]
+        tokens = [await _login(client, "/api/auth/login", email) for email in emails]
+        admin_token = await _login(client, "/api/admin/login", ADMIN_EMAIL)
+
+        recorder = Recorder()
+        mix = TrafficMix(client, recorder, args, tokens, admin_token)
+        pairs = parse_mix(args.mix)
+        scenarios = [name for name, _ in pairs]
+        weights = [weight for _, weight in pairs]
+
+        start = perf_counter()
+        deadline = start + args.warmup + args.duration
+        users = [
+            asyncio.create_task(_virtual_user(mix, scenarios, weights, random.Random(args.seed + i), deadline))
+            for i in range(args.concurrency)
+        ]
+        await asyncio.sleep(args.warmup)
+        recorder.recording = True
+        measure_start = perf_counter()
+        await asyncio.gather(*users)
+        elapsed = perf_counter() - measure_start
+
+    return recorder.summary(elapsed)
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def _wait_until_ready(url: str, timeout: float = 30.0):
+    deadline = perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while perf_counter() < deadline:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+def _spawn(args: list, env: dict) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], cwd=BACKEND_DIR, env={**os.environ, **env})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="End-to-end load test")
+    parser.add_argument("--database-url", default=os.getenv("LOADTEST_DATABASE_URL"))
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--paystack-port", type=int, default=8090)
+    parser.add_argument("--paystack-latency-ms", type=float, default=80.0)
+    parser.add_argument("--duration", type=float, default=60.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=10.0, help="unmeasured seconds before recording")
+    parser.add_argument("--concurrency", type=int, default=32, help="virtual users")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="comma-separated scenario=weight pairs")
+    parser.add_argument("--workflows", type=int, default=10_000, help="seeded workflow count")
+    parser.add_argument("--users", type=int, default=100_000, help="seeded user count")
+    parser.add_argument("--token-pool", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    parser.add_argument("--server-arg", action="append", default=[],
+                        help="extra argument for the app server command (repeatable)")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or LOADTEST_DATABASE_URL is required")
+
+    env = {
+        "DATABASE_URL": args.database_url,
+        "PAYSTACK_BASE_URL": f"http://127.0.0.1:{args.paystack_port}",
+        "PAYSTACK_SECRET_KEY": "sk_test_loadtest",
+        "DEBUG": "False",
+    }
+    paystack = _spawn(["-m", "benchmarks.loadtest.fake_paystack", "--port", str(args.paystack_port),
+                       "--latency-ms", str(args.paystack_latency_ms)], env)
+    server = _spawn(["-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning",
+                     *args.server_arg], env)
+    try:
+        asyncio.run(_wait_until_ready(f"http://127.0.0.1:{args.paystack_port}/docs"))
+        asyncio.run(_wait_until_ready(f"http://127.0.0.1:{args.port}/health"))
+        results = asyncio.run(drive(args))
+    finally:
+        for process in (server, paystack):
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = {
+        "meta": {
+            "git_revision": _git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "paystack_latency_ms": args.paystack_latency_ms,
+            "seed": args.seed,
+        },
+        **results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(text + "\n")
+    return 0 if results["total"]["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+-- ============================================
+-- Load-test schema
+-- ============================================
+-- The subset of tables the services query, with the columns they actually
+-- read and write. Applied to a disposable local database by seed.py, which
+-- then runs database/migrations/ over it.
+
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+CREATE EXTENSION IF NOT EXISTS "pgcrypto";
+
+DROP SCHEMA IF EXISTS sales_archive CASCADE;
+DROP TABLE IF EXISTS schema_migrations, analytics_events, sales_references, sales_archived_purchases, sales_unpartitioned, sales_rollups, sales_rollup_customers, all_access_members, idempotency_keys, revoked_tokens, sales, custom_requests, workflows, users CASCADE;
+
+CREATE TABLE users (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    email VARCHAR(255) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    first_name VARCHAR(100),
+    last_name VARCHAR(100),
+    phone VARCHAR(50),
+    is_verified BOOLEAN DEFAULT FALSE,
+    is_active BOOLEAN DEFAULT TRUE,
+    is_admin BOOLEAN DEFAULT FALSE,
+    last_login TIMESTAMP WITH TIME ZONE,
+    login_count INT DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE workflows (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    category VARCHAR(100) NOT NULL,
+    icon VARCHAR(10) DEFAULT '🔧',
+    description TEXT,
+    price DECIMAL(10, 2) DEFAULT 149.00,
+    tags TEXT[],
+    json_file_url TEXT,
+    downloads INT DEFAULT 0,
+    revenue DECIMAL(10, 2) DEFAULT 0,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX idx_workflows_is_active ON workflows(is_active);
+
+CREATE TABLE sales (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    reference VARCHAR(100) UNIQUE NOT NULL,
+    customer_email VARCHAR(255) NOT NULL,
+    customer_name VARCHAR(255),
+    purchase_type VARCHAR(50) NOT NULL,
+    workflow_id INT REFERENCES workflows(id) ON DELETE SET NULL,
+    workflow_name VARCHAR(255),
+    amount DECIMAL(10, 2) NOT NULL,
+    currency VARCHAR(10) DEFAULT 'GHS',
+    payment_channel VARCHAR(50),
+    payment_status VARCHAR(50) DEFAULT 'pending',
+    metadata JSONB,
+    verification JSONB,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    paid_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX idx_sales_customer_email ON sales(customer_email);
+CREATE INDEX idx_sales_payment_status ON sales(payment_status);
+CREATE INDEX idx_sales_created_at ON sales(created_at DESC);
+CREATE INDEX idx_sales_pending_updated_at ON sales(updated_at) WHERE payment_status = 'pending';
+
+CREATE TABLE all_access_members (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    email VARCHAR(255) UNIQUE NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE,
+    expires_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE custom_requests (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    phone VARCHAR(50),
+    workflow_title VARCHAR(255),
+    description TEXT,
+    workflow_description TEXT,
+    use_case TEXT,
+    budget VARCHAR(100),
+    budget_range VARCHAR(100),
+    timeline VARCHAR(100),
+    status VARCHAR(50) DEFAULT 'pending' CHECK (status IN ('pending', 'in_progress', 'completed', 'rejected', 'cancelled')),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX idx_custom_requests_created_at ON custom_requests(created_at DESC);
+
+CREATE TABLE idempotency_keys (
+    key VARCHAR(300) PRIMARY KEY,
+    request_hash CHAR(64) NOT NULL,
+    response JSONB,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
@@ -0,0 +1,127 @@
+"""
+Load-test database seeder
+Recreates the load-test schema in a local Postgres and fills it with realistic volumes.
+
+Usage:
+    python -m benchmarks.loadtest.seed --database-url postgresql://localhost/vexa_loadtest
+
+Every seeded user shares the password ``LOADTEST_PASSWORD`` so the driver can log in
+as any of them; it is hashed once rather than 100k times.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import psycopg
+
+from app.utils.auth import hash_password
+from app.utils.migrations import migrate
+
+LOADTEST_PASSWORD = "loadtest-password"
+ADMIN_EMAIL = "admin@loadtest.local"
+SCHEMA_PATH = Path(__file__).with_name("schema.sql")
+
+CATEGORIES = ["Marketing", "Sales", "Support", "Finance", "Operations", "HR", "Engineering", "Analytics"]
+
+
+def _step(conn, label: str, sql: str, params=None):
+    start = perf_counter()
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.rowcount
+    conn.commit()
+    print(f"  {label:<12} {rows:>10} rows  {perf_counter() - start:6.1f}s")
+
+
+def seed(database_url: str, workflows: int, users: int, sales: int):
+    """Recreate the schema and bulk-insert synthetic rows with generate_series"""
+    password_hash = hash_password(LOADTEST_PASSWORD)
+
+    with psycopg.connect(database_url) as conn:
+        print("Applying schema")
+        conn.execute(SCHEMA_PATH.read_text())
+        conn.commit()
+
+        print("Seeding")
+        _step(conn, "workflows", """
+            INSERT INTO workflows (name, category, icon, description, price, tags, json_file_url,
+                                   downloads, revenue, is_active, created_at)
+            SELECT
+                'Workflow ' || n,
+                (%s::text[])[1 + n %% array_length(%s::text[], 1)],
+                '⚙️',
+                repeat('Automates a business process end to end. ', 4),
+                149.00,
+                ARRAY['automation', 'n8n', 'tag' || (n %% 50)],
+                '{"nodes": [], "connections": {}}',
+                n %% 500,
+                (n %% 500) * 149.00,
+                n %% 10 <> 0,
+                NOW() - (n || ' minutes')::interval
+            FROM generate_series(1, %s) AS n
+        """, (CATEGORIES, CATEGORIES, workflows))
+
+        _step(conn, "users", """
+            INSERT INTO users (email, password_hash, first_name, last_name, is_verified, is_admin, created_at)
+            SELECT
+                'user' || n || '@loadtest.local', %s, 'User', 'No' || n, n %% 3 = 0, FALSE,
+                NOW() - (n || ' seconds')::interval
+            FROM generate_series(1, %s) AS n
+        """, (password_hash, users))
+
+        _step(conn, "admin", """
+            INSERT INTO users (email, password_hash, first_name, last_name, is_admin)
+            VALUES (%s, %s, 'Load', 'Admin', TRUE)
+        """, (ADMIN_EMAIL, password_hash))
+
+        _step(conn, "sales", """
+            INSERT INTO sales (reference, customer_email, customer_name, purchase_type, workflow_id,
+                               workflow_name, amount, payment_channel, payment_status, created_at, paid_at)
+            SELECT
+                'VEXA-SEED' || lpad(n::text, 10, '0'),
+                'user' || (1 + n %% %s) || '@loadtest.local',
+                'User No' || (1 + n %% %s),
+                CASE WHEN n %% 20 = 0 THEN 'all-access' ELSE 'single' END,
+                CASE WHEN n %% 20 = 0 THEN NULL ELSE 1 + n %% %s END,
+                CASE WHEN n %% 20 = 0 THEN NULL ELSE 'Workflow ' || (1 + n %% %s) END,
+                CASE WHEN n %% 20 = 0 THEN 799.00 ELSE 149.00 END,
+                CASE WHEN n %% 2 = 0 THEN 'card' ELSE 'mobile_money' END,
+                CASE WHEN n %% 50 = 0 THEN 'failed' WHEN n %% 25 = 0 THEN 'pending' ELSE 'success' END,
+                ts,
+                CASE WHEN n %% 25 = 0 THEN NULL ELSE ts END
+            FROM generate_series(1, %s) AS n,
+                 LATERAL (SELECT NOW() - ((%s - n) * interval '30 seconds') AS ts) t
+        """, (users, users, workflows, workflows, sales, sales))
+
+        # The migrations run after seeding so the rollups are built by one
+        # backfill instead of the insert trigger, and the indexes in one pass
+        print("Migrating")
+        conn.autocommit = True
+        for migration in migrate(conn):
+            print(f"  {migration.version}_{migration.name}")
+
+        print("Analyzing")
+        conn.execute("ANALYZE")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Seed the load-test database")
+    parser.add_argument("--database-url", default=os.getenv("LOADTEST_DATABASE_URL"))
+    parser.add_argument("--workflows", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or LOADTEST_DATABASE_URL is required")
+
+    start = perf_counter()
+    seed(args.database_url, args.workflows, args.users, args.sales)
+    print(f"Done in {perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
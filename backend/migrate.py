@@ -0,0 +1,47 @@
+"""
+Database migrations
+Applies database/migrations/NNNN_*.sql in order and records each in
+``schema_migrations``.
+
+Usage:
+    python migrate.py status
+    python migrate.py up [--to 0005]
+
+Uses ``DATABASE_URL`` unless ``--database-url`` is given. Safe to run from
+several deploys at once: runners take an advisory lock and skip what is
+already applied.
+"""
+import argparse
+import logging
+import sys
+
+import psycopg
+
+from app.config import settings
+from app.utils.migrations import migrate, status
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("command", choices=("status", "up"))
+    parser.add_argument("--to", help="Last version to apply (default: all)")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with psycopg.connect(args.database_url, autocommit=True) as conn:
+        if args.command == "up":
+            applied = migrate(conn, target=args.to)
+            print(f"Applied {len(applied)} migration(s)")
+        states = status(conn)
+
+    for migration, state in states:
+        print(f"  {migration.version}  {migration.name:<32} {state}")
+    return 1 if any(state == "changed" for _, state in states) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Production server launcher
+Runs one uvicorn worker per CPU core behind a shared listening socket.
+
+Usage:
+    python serve.py [--workers N] [--port 8000]
+
+Each worker is a separate spawned process that imports the app and runs its
+lifespan, so DB pools, caches and background flushers are created per worker.
+Workers recycle after ``MAX_REQUESTS`` (+ random jitter) requests and the
+supervisor starts a fresh one in their place.
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import random
+import sys
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from app.config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects container/affinity limits)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def pick_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") is not None else "asyncio"
+
+
+def pick_http() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") is not None else "h11"
+
+
+class RecyclingWorker:
+    """
+    Worker entry point with a per-process max-requests limit
+
+    The limit is drawn in the child, so workers started together don't all
+    recycle at the same moment.
+    """
+
+    def __init__(self, config: uvicorn.Config, max_requests: int, jitter: int):
+        self.config = config
+        self.max_requests = max_requests
+        self.jitter = jitter
+
+    def __call__(self, sockets=None):
+        if self.max_requests:
+            self.config.limit_max_requests = self.max_requests + random.randint(0, self.jitter)
+        uvicorn.Server(config=self.config).run(sockets=sockets)
+
+
+def build_config(args) -> uvicorn.Config:
+    return uvicorn.Config(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=pick_loop(),
+        http=pick_http(),
+        lifespan="on",
+        backlog=args.backlog,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+        access_log=False,
+        log_level="info",
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Production server launcher")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY or available_cpus())
+    parser.add_argument("--backlog", type=int, default=settings.SERVER_BACKLOG)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.SERVER_GRACEFUL_TIMEOUT)
+    parser.add_argument("--max-requests", type=int, default=settings.MAX_REQUESTS)
+    parser.add_argument("--max-requests-jitter", type=int, default=settings.MAX_REQUESTS_JITTER)
+    args = parser.parse_args()
+
+    config = build_config(args)
+    worker = RecyclingWorker(config, args.max_requests, args.max_requests_jitter)
+    logger.info(
+        "Starting %d worker(s) on %s:%d (loop=%s, http=%s, backlog=%d, max_requests=%d+%d)",
+        args.workers, args.host, args.port, config.loop, config.http,
+        args.backlog, args.max_requests, args.max_requests_jitter
+    )
+
+    if args.workers == 1:
+        worker()
+        return 0
+
+    sock = config.bind_socket()
+    Multiprocess(config, target=worker, sockets=[sock]).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+-- ============================================
+-- Baseline: the schema the backend services use
+-- ============================================
+-- Safe on an empty database and on one built by hand from neon_schema.sql,
+-- auth_migration.sql, create_custom_requests_table.sql or
+-- recreate_workflows_table.sql: tables are created if missing, missing
+-- columns are added, and NOT NULL constraints on columns the services never
+-- write are relaxed.
+
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Users (auth_migration.sql + add_is_admin.sql)
+CREATE TABLE IF NOT EXISTS users (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    email VARCHAR(255) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    first_name VARCHAR(100),
+    last_name VARCHAR(100),
+    phone VARCHAR(50),
+    is_verified BOOLEAN DEFAULT FALSE,
+    is_active BOOLEAN DEFAULT TRUE,
+    is_admin BOOLEAN DEFAULT FALSE,
+    last_login TIMESTAMP WITH TIME ZONE,
+    login_count INT DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS is_admin BOOLEAN DEFAULT FALSE;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS last_login TIMESTAMP WITH TIME ZONE;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS login_count INT DEFAULT 0;
+
+-- Workflows: the services store the workflow JSON in json_file_url and never
+-- write slug/workflow_json (neon_schema.sql, recreate_workflows_table.sql)
+CREATE TABLE IF NOT EXISTS workflows (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    category VARCHAR(100) NOT NULL,
+    icon VARCHAR(10) DEFAULT '🔧',
+    description TEXT,
+    price DECIMAL(10, 2) DEFAULT 149.00,
+    tags TEXT[],
+    json_file_url TEXT,
+    downloads INT DEFAULT 0,
+    revenue DECIMAL(10, 2) DEFAULT 0,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE workflows ADD COLUMN IF NOT EXISTS json_file_url TEXT;
+ALTER TABLE workflows ADD COLUMN IF NOT EXISTS tags TEXT[];
+ALTER TABLE workflows ADD COLUMN IF NOT EXISTS downloads INT DEFAULT 0;
+ALTER TABLE workflows ADD COLUMN IF NOT EXISTS revenue DECIMAL(10, 2) DEFAULT 0;
+ALTER TABLE workflows ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT TRUE;
+ALTER TABLE workflows ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+-- Sales
+CREATE TABLE IF NOT EXISTS sales (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    reference VARCHAR(100) UNIQUE NOT NULL,
+    customer_email VARCHAR(255) NOT NULL,
+    customer_name VARCHAR(255),
+    purchase_type VARCHAR(50) NOT NULL,
+    workflow_id INT REFERENCES workflows(id) ON DELETE SET NULL,
+    workflow_name VARCHAR(255),
+    amount DECIMAL(10, 2) NOT NULL,
+    currency VARCHAR(10) DEFAULT 'GHS',
+    payment_channel VARCHAR(50),
+    payment_status VARCHAR(50) DEFAULT 'pending',
+    metadata JSONB,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    paid_at TIMESTAMP WITH TIME ZONE
+);
+
+ALTER TABLE sales ADD COLUMN IF NOT EXISTS metadata JSONB;
+ALTER TABLE sales ADD COLUMN IF NOT EXISTS paid_at TIMESTAMP WITH TIME ZONE;
+
+-- Custom requests: the intake writes workflow_title/description/budget_range,
+-- the admin list still reads workflow_description/budget, so keep both
+CREATE TABLE IF NOT EXISTS custom_requests (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    phone VARCHAR(50),
+    workflow_title VARCHAR(255),
+    description TEXT,
+    workflow_description TEXT,
+    use_case TEXT,
+    budget VARCHAR(100),
+    budget_range VARCHAR(100),
+    timeline VARCHAR(100),
+    status VARCHAR(50) DEFAULT 'pending' CHECK (status IN ('pending', 'in_progress', 'completed', 'rejected', 'cancelled')),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE custom_requests ADD COLUMN IF NOT EXISTS workflow_title VARCHAR(255);
+ALTER TABLE custom_requests ADD COLUMN IF NOT EXISTS description TEXT;
+ALTER TABLE custom_requests ADD COLUMN IF NOT EXISTS workflow_description TEXT;
+ALTER TABLE custom_requests ADD COLUMN IF NOT EXISTS use_case TEXT;
+ALTER TABLE custom_requests ADD COLUMN IF NOT EXISTS budget VARCHAR(100);
+ALTER TABLE custom_requests ADD COLUMN IF NOT EXISTS budget_range VARCHAR(100);
+
+-- All Access Pass holders (neon_schema.sql has more columns; these are read)
+CREATE TABLE IF NOT EXISTS all_access_members (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    email VARCHAR(255) UNIQUE NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE,
+    expires_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS analytics_events (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    event_type VARCHAR(100) NOT NULL,
+    event_data JSONB,
+    user_id UUID,
+    session_id VARCHAR(255),
+    ip_address INET,
+    user_agent TEXT,
+    referrer TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Relax NOT NULL on columns the services never write
+DO $$
+DECLARE
+    col RECORD;
+BEGIN
+    FOR col IN
+        SELECT table_name, column_name
+        FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND is_nullable = 'NO'
+          AND (table_name, column_name) IN (
+              ('workflows', 'slug'),
+              ('workflows', 'workflow_json'),
+              ('custom_requests', 'workflow_description'),
+              ('custom_requests', 'use_case')
+          )
+    LOOP
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN %I DROP NOT NULL', col.table_name, col.column_name);
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,18 @@
+-- ============================================
+-- Idempotency Keys Table
+-- ============================================
+-- Responses to requests sent with an Idempotency-Key header (payment
+-- initialization). A row with a NULL response is a claim held by the worker
+-- currently running the request; other workers poll it until it completes.
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key VARCHAR(300) PRIMARY KEY,
+    request_hash CHAR(64) NOT NULL,
+    response JSONB,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
+
+COMMENT ON TABLE idempotency_keys IS 'Stored responses for idempotent API requests';
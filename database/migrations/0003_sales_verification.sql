@@ -0,0 +1,8 @@
+-- ============================================
+-- Sales: stored verification results
+-- ============================================
+-- The verify endpoint's response for a sale whose outcome is final
+-- (success/failed), so repeat verifications are answered without calling
+-- Paystack.
+
+ALTER TABLE sales ADD COLUMN IF NOT EXISTS verification JSONB;
@@ -0,0 +1,8 @@
+-- ============================================
+-- Sales: pending reconciliation index
+-- ============================================
+-- Lets the reconciliation worker find stale pending sales (oldest first)
+-- without scanning settled ones.
+
+CREATE INDEX IF NOT EXISTS idx_sales_pending_updated_at
+    ON sales(updated_at) WHERE payment_status = 'pending';
@@ -0,0 +1,168 @@
+-- ============================================
+-- Sales rollups
+-- ============================================
+-- Revenue, sale count and unique customers per hour/day/week bucket, per
+-- (purchase_type, workflow_id). Rows with purchase_type '*' and workflow_id 0
+-- hold the bucket totals (unique customers don't add up across a breakdown).
+-- Sales without a workflow (all-access) use workflow_id 0.
+--
+-- Kept current by statement-level triggers on sales: a sale is counted when
+-- it becomes 'success' and taken back out if it later leaves 'success'
+-- (e.g. refunded). Buckets are UTC, keyed on paid_at (created_at if unset).
+
+CREATE TABLE IF NOT EXISTS sales_rollups (
+    grain VARCHAR(10) NOT NULL CHECK (grain IN ('hour', 'day', 'week')),
+    bucket TIMESTAMP WITH TIME ZONE NOT NULL,
+    purchase_type VARCHAR(50) NOT NULL,
+    workflow_id INT NOT NULL,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    sale_count INT NOT NULL DEFAULT 0,
+    unique_customers INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (grain, bucket, purchase_type, workflow_id)
+);
+
+-- Customers already counted in a bucket; a customer is added once and kept
+-- after a refund, so unique_customers reads "customers who bought"
+CREATE TABLE IF NOT EXISTS sales_rollup_customers (
+    grain VARCHAR(10) NOT NULL,
+    bucket TIMESTAMP WITH TIME ZONE NOT NULL,
+    purchase_type VARCHAR(50) NOT NULL,
+    workflow_id INT NOT NULL,
+    customer_email VARCHAR(255) NOT NULL,
+    PRIMARY KEY (grain, bucket, purchase_type, workflow_id, customer_email)
+);
+
+COMMENT ON TABLE sales_rollups IS 'Incrementally maintained sales aggregates for the analytics dashboard';
+
+-- Apply a batch of changes: [{customer_email, purchase_type, workflow_id,
+-- amount, ts, sign}] where sign is 1 for a new success and -1 for a reversal
+CREATE OR REPLACE FUNCTION sales_rollup_apply(changes JSONB)
+RETURNS VOID AS $$
+    WITH expanded AS (
+        SELECT
+            g.grain,
+            date_trunc(g.grain, c.ts AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS bucket,
+            d.purchase_type,
+            d.workflow_id,
+            c.customer_email,
+            c.amount * c.sign AS revenue,
+            c.sign
+        FROM jsonb_to_recordset(changes) AS c(
+            customer_email VARCHAR, purchase_type VARCHAR, workflow_id INT,
+            amount DECIMAL, ts TIMESTAMPTZ, sign INT
+        )
+        CROSS JOIN (VALUES ('hour'), ('day'), ('week')) AS g(grain)
+        CROSS JOIN LATERAL (
+            VALUES (c.purchase_type, COALESCE(c.workflow_id, 0)), ('*', 0)
+        ) AS d(purchase_type, workflow_id)
+    ),
+    new_customers AS (
+        INSERT INTO sales_rollup_customers (grain, bucket, purchase_type, workflow_id, customer_email)
+        SELECT DISTINCT grain, bucket, purchase_type, workflow_id, customer_email
+        FROM expanded
+        WHERE sign > 0
+        ORDER BY 1, 2, 3, 4, 5
+        ON CONFLICT DO NOTHING
+        RETURNING grain, bucket, purchase_type, workflow_id
+    ),
+    deltas AS (
+        SELECT grain, bucket, purchase_type, workflow_id,
+               SUM(revenue) AS revenue, SUM(sign) AS sale_count, 0 AS customers
+        FROM expanded
+        GROUP BY 1, 2, 3, 4
+        UNION ALL
+        SELECT grain, bucket, purchase_type, workflow_id, 0, 0, COUNT(*)
+        FROM new_customers
+        GROUP BY 1, 2, 3, 4
+    )
+    INSERT INTO sales_rollups (grain, bucket, purchase_type, workflow_id, revenue, sale_count, unique_customers)
+    SELECT grain, bucket, purchase_type, workflow_id, SUM(revenue), SUM(sale_count), SUM(customers)
+    FROM deltas
+    GROUP BY 1, 2, 3, 4
+    -- Fixed lock order so concurrent sales can't deadlock on the total rows
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT (grain, bucket, purchase_type, workflow_id) DO UPDATE SET
+        revenue = sales_rollups.revenue + EXCLUDED.revenue,
+        sale_count = sales_rollups.sale_count + EXCLUDED.sale_count,
+        unique_customers = sales_rollups.unique_customers + EXCLUDED.unique_customers;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION sales_rollup_on_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM sales_rollup_apply(jsonb_agg(jsonb_build_object(
+        'customer_email', n.customer_email, 'purchase_type', n.purchase_type,
+        'workflow_id', n.workflow_id, 'amount', n.amount,
+        'ts', COALESCE(n.paid_at, n.created_at), 'sign', 1
+    )))
+    FROM new_rows n
+    WHERE n.payment_status = 'success'
+    HAVING COUNT(*) > 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sales_rollup_on_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM sales_rollup_apply(jsonb_agg(c.change))
+    FROM (
+        SELECT jsonb_build_object(
+            'customer_email', n.customer_email, 'purchase_type', n.purchase_type,
+            'workflow_id', n.workflow_id, 'amount', n.amount,
+            'ts', COALESCE(n.paid_at, n.created_at), 'sign', 1
+        ) AS change
+        FROM new_rows n JOIN old_rows o ON o.id = n.id
+        WHERE n.payment_status = 'success' AND o.payment_status IS DISTINCT FROM 'success'
+        UNION ALL
+        SELECT jsonb_build_object(
+            'customer_email', o.customer_email, 'purchase_type', o.purchase_type,
+            'workflow_id', o.workflow_id, 'amount', o.amount,
+            'ts', COALESCE(o.paid_at, o.created_at), 'sign', -1
+        )
+        FROM old_rows o JOIN new_rows n ON n.id = o.id
+        WHERE o.payment_status = 'success' AND n.payment_status IS DISTINCT FROM 'success'
+    ) AS c
+    HAVING COUNT(*) > 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sales_rollup_insert ON sales;
+CREATE TRIGGER sales_rollup_insert AFTER INSERT ON sales
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sales_rollup_on_insert();
+
+DROP TRIGGER IF EXISTS sales_rollup_update ON sales;
+CREATE TRIGGER sales_rollup_update AFTER UPDATE ON sales
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sales_rollup_on_update();
+
+-- Rebuild from the sales table (run once after creating the triggers, or to
+-- repair drift). Works a month at a time to keep each batch small.
+CREATE OR REPLACE FUNCTION sales_rollup_backfill()
+RETURNS VOID AS $$
+DECLARE
+    month_start TIMESTAMP;
+BEGIN
+    TRUNCATE sales_rollups, sales_rollup_customers;
+    FOR month_start IN
+        SELECT DISTINCT date_trunc('month', COALESCE(paid_at, created_at) AT TIME ZONE 'UTC')
+        FROM sales
+        WHERE payment_status = 'success'
+        ORDER BY 1
+    LOOP
+        PERFORM sales_rollup_apply(jsonb_agg(jsonb_build_object(
+            'customer_email', customer_email, 'purchase_type', purchase_type,
+            'workflow_id', workflow_id, 'amount', amount,
+            'ts', COALESCE(paid_at, created_at), 'sign', 1
+        )))
+        FROM sales
+        WHERE payment_status = 'success'
+          AND COALESCE(paid_at, created_at) >= month_start AT TIME ZONE 'UTC'
+          AND COALESCE(paid_at, created_at) < (month_start + interval '1 month') AT TIME ZONE 'UTC';
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT sales_rollup_backfill();
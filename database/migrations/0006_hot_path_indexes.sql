@@ -0,0 +1,26 @@
+-- migrate: no-transaction
+-- ============================================
+-- Hot-path indexes
+-- ============================================
+-- Built CONCURRENTLY so live tables stay writable, which means this file runs
+-- outside a transaction, one statement at a time. IF NOT EXISTS makes every
+-- statement safe to re-run after an interrupted build (drop the INVALID index
+-- that an interrupted build leaves behind first).
+
+-- Catalog: WHERE is_active = TRUE
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_workflows_is_active ON workflows(is_active);
+
+-- Admin list of custom requests, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_custom_requests_created_at ON custom_requests(created_at DESC);
+
+-- Dashboard recent sales: WHERE payment_status = ... ORDER BY created_at DESC LIMIT n
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sales_status_created_at ON sales(payment_status, created_at DESC);
+
+-- Reconciliation lag and any other newest/oldest-first reads of sales
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sales_created_at ON sales(created_at DESC);
+
+-- Entitlements and customer counts by email
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sales_customer_email ON sales(customer_email);
+
+-- Recent analytics events
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_analytics_created_at ON analytics_events(created_at DESC);
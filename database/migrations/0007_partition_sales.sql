@@ -0,0 +1,238 @@
+-- ============================================
+-- Monthly partitions for sales
+-- ============================================
+-- sales becomes a table partitioned by month on created_at (UTC), named
+-- sales_YYYY_MM. A partitioned table can only enforce uniqueness on columns
+-- that include created_at, so the unique reference moves to
+-- sales_references(reference -> created_at). Writers claim a reference there
+-- first, and lookups by reference read created_at from it so they touch one
+-- partition.
+--
+-- sales_ensure_partitions() creates partitions ahead of time (the app calls it
+-- periodically). sales_archive_partitions() detaches months past the
+-- retention period into the sales_archive schema, after copying what the
+-- customers bought into sales_archived_purchases so their entitlements stay.
+--
+-- Converting an existing table copies every row in this transaction; run it
+-- at a quiet time. Needs PostgreSQL 13 or later.
+
+CREATE TABLE IF NOT EXISTS sales_references (
+    reference VARCHAR(100) PRIMARY KEY,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE SCHEMA IF NOT EXISTS sales_archive;
+
+-- Purchases from archived partitions, one row per customer and item
+-- (workflow_id 0 for all-access)
+CREATE TABLE IF NOT EXISTS sales_archived_purchases (
+    customer_email VARCHAR(255) NOT NULL,
+    purchase_type VARCHAR(50) NOT NULL,
+    workflow_id INT NOT NULL,
+    PRIMARY KEY (customer_email, purchase_type, workflow_id)
+);
+
+-- Create the monthly partitions from from_month (default: this month) up to
+-- months_ahead months from now. Returns how many were created.
+CREATE OR REPLACE FUNCTION sales_ensure_partitions(months_ahead INT DEFAULT 3, from_month DATE DEFAULT NULL)
+RETURNS INT AS $$
+DECLARE
+    month_start DATE := date_trunc('month', COALESCE(from_month::timestamp, NOW() AT TIME ZONE 'UTC'))::date;
+    last_month DATE := (date_trunc('month', NOW() AT TIME ZONE 'UTC') + make_interval(months => months_ahead))::date;
+    partition_name TEXT;
+    created INT := 0;
+BEGIN
+    -- Every worker runs this; one at a time is enough
+    IF NOT pg_try_advisory_xact_lock(hashtext('sales_partitions')) THEN
+        RETURN 0;
+    END IF;
+    WHILE month_start <= last_month LOOP
+        partition_name := 'sales_' || to_char(month_start, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF sales FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                month_start::timestamp AT TIME ZONE 'UTC',
+                (month_start + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach every partition that ended more than retention_months ago and move
+-- it to the sales_archive schema (from there: pg_dump it, then drop it).
+-- Returns the names of the archived partitions.
+CREATE OR REPLACE FUNCTION sales_archive_partitions(retention_months INT)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', NOW() AT TIME ZONE 'UTC') - make_interval(months => retention_months))::date;
+    part RECORD;
+BEGIN
+    IF retention_months < 1 THEN
+        RAISE EXCEPTION 'retention_months must be at least 1';
+    END IF;
+    IF NOT pg_try_advisory_xact_lock(hashtext('sales_partitions')) THEN
+        RETURN;
+    END IF;
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'sales'::regclass
+          AND c.relname ~ '^sales_\d{4}_\d{2}$'
+          AND to_date(substr(c.relname, 7), 'YYYY_MM') < cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format(
+            'INSERT INTO sales_archived_purchases (customer_email, purchase_type, workflow_id)
+             SELECT DISTINCT customer_email, purchase_type, COALESCE(workflow_id, 0)
+             FROM %I WHERE payment_status = ''success''
+             ON CONFLICT DO NOTHING',
+            part.relname
+        );
+        EXECUTE format('ALTER TABLE sales DETACH PARTITION %I', part.relname);
+        EXECUTE format('ALTER TABLE %I SET SCHEMA sales_archive', part.relname);
+        RETURN NEXT part.relname;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Convert the existing table (skipped when sales is already partitioned).
+-- Foreign keys, row triggers and dependent views move to the new table;
+-- anything else that still depends on the old one stops the migration.
+DO $$
+DECLARE
+    idx RECORD;
+    con RECORD;
+    trg RECORD;
+    dep RECORD;
+    month_start DATE;
+    last_month DATE := (date_trunc('month', NOW() AT TIME ZONE 'UTC') + interval '3 months')::date;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'sales'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE sales RENAME TO sales_unpartitioned;
+    DROP TRIGGER IF EXISTS sales_rollup_insert ON sales_unpartitioned;
+    DROP TRIGGER IF EXISTS sales_rollup_update ON sales_unpartitioned;
+    -- Free the index names for the new table
+    FOR idx IN
+        SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = 'sales_unpartitioned'::regclass
+    LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', idx.relname, left(idx.relname, 45) || '_unpartitioned');
+    END LOOP;
+
+    UPDATE sales_unpartitioned SET created_at = COALESCE(paid_at, updated_at, NOW()) WHERE created_at IS NULL;
+
+    CREATE TABLE sales (LIKE sales_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        PARTITION BY RANGE (created_at);
+    ALTER TABLE sales ALTER COLUMN created_at SET NOT NULL;
+
+    -- Partitions for every month with rows, created here rather than through
+    -- sales_ensure_partitions(): its try-lock skips the work while a running
+    -- worker holds the lock, and the copy below would find no partition
+    month_start := COALESCE(
+        (SELECT date_trunc('month', MIN(created_at) AT TIME ZONE 'UTC')::date FROM sales_unpartitioned),
+        date_trunc('month', NOW() AT TIME ZONE 'UTC')::date
+    );
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF sales FOR VALUES FROM (%L) TO (%L)',
+            'sales_' || to_char(month_start, 'YYYY_MM'),
+            month_start::timestamp AT TIME ZONE 'UTC',
+            (month_start + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+        );
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+
+    INSERT INTO sales SELECT * FROM sales_unpartitioned;
+    INSERT INTO sales_references (reference, created_at)
+    SELECT reference, created_at FROM sales_unpartitioned
+    ON CONFLICT DO NOTHING;
+
+    -- Foreign keys to other tables (e.g. customer_id -> customers on
+    -- neon_schema.sql databases)
+    FOR con IN
+        SELECT conname, pg_get_constraintdef(oid) AS def FROM pg_constraint
+        WHERE conrelid = 'sales_unpartitioned'::regclass AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE sales ADD CONSTRAINT %I %s', con.conname, con.def);
+    END LOOP;
+
+    -- Row triggers (e.g. update_sales_updated_at)
+    FOR trg IN
+        SELECT pg_get_triggerdef(oid) AS def FROM pg_trigger
+        WHERE tgrelid = 'sales_unpartitioned'::regclass AND NOT tgisinternal AND tgtype & 1 = 1
+    LOOP
+        EXECUTE regexp_replace(trg.def, ' ON (\S+\.)?sales_unpartitioned ', ' ON sales ');
+    END LOOP;
+
+    -- Views (e.g. dashboard_overview, recent_activity) are redefined against
+    -- the new table rather than left reading the old copy
+    FOR dep IN
+        SELECT DISTINCT v.oid, v.relname, v.relkind, n.nspname
+        FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid
+        JOIN pg_class v ON v.oid = r.ev_class
+        JOIN pg_namespace n ON n.oid = v.relnamespace
+        WHERE d.classid = 'pg_rewrite'::regclass
+          AND d.refobjid = 'sales_unpartitioned'::regclass
+          AND v.oid <> 'sales_unpartitioned'::regclass
+    LOOP
+        IF dep.relkind <> 'v' THEN
+            RAISE EXCEPTION '%.% depends on sales and is not a plain view; move it to the new table first',
+                dep.nspname, dep.relname;
+        END IF;
+        EXECUTE format(
+            'CREATE OR REPLACE VIEW %I.%I AS %s',
+            dep.nspname, dep.relname,
+            regexp_replace(pg_get_viewdef(dep.oid), '\msales_unpartitioned\M', 'sales', 'g')
+        );
+    END LOOP;
+
+    -- Fails (and rolls the migration back) if anything still depends on it
+    DROP TABLE sales_unpartitioned;
+END;
+$$;
+
+-- Keys, foreign key and indexes (created on every partition)
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = 'sales'::regclass AND contype = 'p') THEN
+        ALTER TABLE sales ADD PRIMARY KEY (id, created_at);
+    END IF;
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'sales'::regclass AND contype = 'f'
+          AND pg_get_constraintdef(oid) LIKE 'FOREIGN KEY (workflow_id)%'
+    ) THEN
+        ALTER TABLE sales ADD FOREIGN KEY (workflow_id) REFERENCES workflows(id) ON DELETE SET NULL;
+    END IF;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_sales_reference ON sales(reference);
+CREATE INDEX IF NOT EXISTS idx_sales_customer_email ON sales(customer_email);
+CREATE INDEX IF NOT EXISTS idx_sales_created_at ON sales(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_sales_status_created_at ON sales(payment_status, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_sales_pending_updated_at ON sales(updated_at) WHERE payment_status = 'pending';
+
+-- Rollup triggers (0005). Statement-level triggers on the partitioned table
+-- see the rows of every partition in their transition tables.
+DROP TRIGGER IF EXISTS sales_rollup_insert ON sales;
+CREATE TRIGGER sales_rollup_insert AFTER INSERT ON sales
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sales_rollup_on_insert();
+
+DROP TRIGGER IF EXISTS sales_rollup_update ON sales;
+CREATE TRIGGER sales_rollup_update AFTER UPDATE ON sales
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sales_rollup_on_update();
+
+SELECT sales_ensure_partitions(3);
@@ -0,0 +1,18 @@
+-- ============================================
+-- Revoked Tokens Table
+-- ============================================
+-- Access tokens revoked before they expire (logout), by their jti claim.
+-- Every worker keeps the unexpired rows in memory and polls for new ones by
+-- revoked_at; rows are deleted once the token would have expired anyway.
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti VARCHAR(64) PRIMARY KEY,
+    user_id UUID,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked_at ON revoked_tokens(revoked_at);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens(expires_at);
+
+COMMENT ON TABLE revoked_tokens IS 'Access tokens revoked before expiry, by jti';
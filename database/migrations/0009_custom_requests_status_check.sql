@@ -0,0 +1,20 @@
+-- ============================================
+-- Custom requests: status check
+-- ============================================
+-- create_custom_requests_table.sql limited status to the values the admin
+-- UI uses; 0001 briefly created the table without that CHECK. Add it to
+-- tables that have no status check yet. NOT VALID: existing rows are left
+-- alone, every new write is checked.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'custom_requests'::regclass AND contype = 'c'
+          AND pg_get_constraintdef(oid) LIKE '%status%'
+    ) THEN
+        ALTER TABLE custom_requests ADD CONSTRAINT custom_requests_status_check
+            CHECK (status IN ('pending', 'in_progress', 'completed', 'rejected', 'cancelled')) NOT VALID;
+    END IF;
+END;
+$$;
@@ -11,6 +11,12 @@ const WorkflowModule = {
      * Fetch workflows from API
      */
     async fetchWorkflows() {
+        // The server inlines the catalog into the landing page
+        if (Array.isArray(window.__CATALOG__)) {
+            this.workflows = window.__CATALOG__;
+            return;
+        }
+
         try {
             const api = new API(AppConfig.API_URL);
             const data = await api.getWorkflows();
@@ -20,7 +26,21 @@ const WorkflowModule = {
             }
         } catch (error) {
             console.error('Error fetching workflows:', error);
-            this.workflows = [];
+            this.workflows = await this.fetchStaticCatalog();
+        }
+    },
+
+    /**
+     * Fetch the static catalog export (works while the API is down)
+     */
+    async fetchStaticCatalog() {
+        try {
+            const base = `${AppConfig.API_URL}/assets/catalog`;
+            const manifest = await (await fetch(`${base}/manifest.json`, { cache: 'no-cache' })).json();
+            return await (await fetch(`${base}/${manifest.catalog}`)).json();
+        } catch (error) {
+            console.error('Error fetching static catalog:', error);
+            return [];
         }
     },
 